@@ -0,0 +1,101 @@
+"""
+Rolling correlation: incremental vs. full recompute, parity and drift.
+
+1. Synthetic: N correlated random-walk return series, pushed one bar at a
+   time. Every --check bars the incremental matrix is compared with
+   np.corrcoef over the same window. The check runs with re-anchoring as
+   shipped and again with it turned off, which shows the drift re-anchoring
+   removes. Then times one incremental update against one full recompute.
+2. End to end on the fake market: correlations() for every TF, compared
+   with a full recompute over the same aligned returns. It is then advanced
+   by simulated bar closes, which checks the incremental path against the
+   cache's top-ups.
+
+    python bench/correlations.py [--symbols 28] [--window 100] [--bars 20000]
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("MARKET_DATA", "fake")
+os.environ.setdefault("SHARED_CACHE", "0")
+
+from controllers import candles, correlations as c  # noqa: E402
+from controllers.candles import TF_SECONDS  # noqa: E402
+from routes.correlations import CORRELATION_SYMBOLS  # noqa: E402
+
+
+def max_diff(a: np.ndarray, b: np.ndarray) -> float:
+    both = ~(np.isnan(a) | np.isnan(b))
+    assert (np.isnan(a) == np.isnan(b)).all(), "NaN pattern differs"
+    return float(np.abs(a[both] - b[both]).max()) if both.any() else 0.0
+
+
+def synthetic(n: int, window: int, bars: int, check: int) -> None:
+    rng = np.random.default_rng(3)
+    mix = rng.normal(size=(n, n)) / np.sqrt(n)
+    # Returns around a non-zero drift with a large common level: the worst case for sum/cross-product updates.
+    returns = rng.normal(size=(bars, n)) @ mix * 1e-3 + 5e-4
+    print(f"synthetic: {n} series, window {window}, {bars:,} bars, checked every {check}")
+    for label, every in (("re-anchored", None), ("never re-anchored", 10 ** 12)):
+        book = c.RollingCorrelation([str(i) for i in range(n)], window, reanchor_every=every)
+        worst = 0.0
+        for i, row in enumerate(returns):
+            book.push(row, i)
+            if i >= window and i % check == 0:
+                worst = max(worst, max_diff(book.matrix(), c.full_correlation(returns[i - window + 1:i + 1])))
+        print(f"  {label:>18}: max |incremental - full| = {worst:.2e}")
+
+    book = c.RollingCorrelation([str(i) for i in range(n)], window)
+    book.extend(returns[:window], range(window))
+    reps = min(bars - window, 5000)
+    began = time.perf_counter()
+    for i in range(window, window + reps):
+        book.push(returns[i], i)
+        book.matrix()
+    inc = (time.perf_counter() - began) / reps * 1e6
+    began = time.perf_counter()
+    for i in range(window, window + reps):
+        c.full_correlation(returns[i - window + 1:i + 1])
+    full = (time.perf_counter() - began) / reps * 1e6
+    print(f"  per bar: incremental {inc:.0f} µs, full recompute {full:.0f} µs ({full / inc:.1f}x)")
+
+
+def end_to_end(window: int, steps: int) -> None:
+    print(f"fake market: {len(CORRELATION_SYMBOLS)} pairs, window {window}")
+    real_time = time.time
+    for tf, span in TF_SECONDS.items():
+        now = real_time()
+        worst = 0.0
+        for step in range(steps):
+            # Advance the clock one bar per step so the cached blocks top up and the book takes the new bar.
+            candles.time.time = lambda: now + step * span
+            try:
+                out = c.correlations(CORRELATION_SYMBOLS, tf, window)
+                _, _, returns = c.aligned_returns(CORRELATION_SYMBOLS, tf)
+            finally:
+                candles.time.time = real_time
+            got = np.array([[np.nan if v is None else v for v in row] for row in out["matrix"]])
+            worst = max(worst, max_diff(got, np.round(c.full_correlation(returns[-window:]), 4)))
+        print(f"  {tf:>4}: {out['window']} bars to t={out['t']}, max diff over {steps} bar closes = {worst:.1e}")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--symbols", type=int, default=28)
+    ap.add_argument("--window", type=int, default=100)
+    ap.add_argument("--bars", type=int, default=20000)
+    ap.add_argument("--check", type=int, default=97)
+    ap.add_argument("--steps", type=int, default=5)
+    args = ap.parse_args()
+    synthetic(args.symbols, args.window, args.bars, args.check)
+    end_to_end(args.window, args.steps)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+"""
+End-to-end load test of index:app without a broker or TradingView.
+
+Starts the scanner replay server (bench/scanner_replay.py) and uvicorn serving
+bench.serve:app with MARKET_DATA=fake, then drives a weighted mix of
+/candles/{symbol}/{tf}, /candles/{symbol}/all, /get_analysis and /get_heatmap
+with a closed loop of N clients per concurrency level. For each level it
+reports throughput, error counts (a 200 with error cells counts too), p50/p95/p99 latency (overall and per
+endpoint) and the server's event-loop lag, and writes everything to a JSON
+report named after the current commit. --compare prints the deltas against
+an earlier report.
+
+    python bench/load_test.py --levels 1,8,32 --duration 20 --mt5-latency-ms 5 \\
+        --tv-latency-ms 150 --tv-error-rate 0.02 --compare bench/reports/load-<sha>.json
+
+Upstream counts come from the fake MT5 module of whichever worker answers
+/_bench/upstream, so they are exact only with --workers 1.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import secrets
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+import numpy as np
+
+BACKEND = Path(__file__).resolve().parents[1]
+REPORTS = BACKEND / "bench" / "reports"
+
+SYMBOLS = ["USDCAD", "USDCHF", "USDJPY", "GBPUSD", "GBPAUD", "GBPCHF", "GBPNZD", "GBPJPY", "GBPCAD",
+           "EURUSD", "EURCAD", "EURJPY", "EURAUD", "EURNZD", "EURCHF", "EURGBP", "AUDCAD", "AUDCHF",
+           "AUDNZD", "AUDUSD", "AUDJPY", "CADCHF", "CADJPY", "CHFJPY", "NZDUSD", "NZDJPY", "NZDCHF", "NZDCAD"]
+TFS = ["M1", "M5", "M15", "M30", "H1", "H4", "D"]
+TV_TIMEFRAMES = ["1m", "5m", "15m", "30m", "1h", "4h", "1d"]
+DEFAULT_MIX = "candles=60,candles_all=10,analysis=20,heatmap=10"
+
+
+def pick_request(kind: str, rng: random.Random) -> str:
+    if kind == "candles":
+        return f"/candles/{rng.choice(SYMBOLS)}/{rng.choice(TFS)}?count=300"
+    if kind == "candles_all":
+        return f"/candles/{rng.choice(SYMBOLS)}/all?count=300"
+    if kind == "analysis":
+        return f"/get_analysis?timeframe={rng.choice(TV_TIMEFRAMES)}"
+    if kind == "heatmap":
+        return "/get_heatmap"
+    raise ValueError(f"unknown request kind {kind!r}")
+
+
+def parse_mix(text: str) -> Tuple[List[str], List[float]]:
+    kinds, weights = [], []
+    for part in text.split(","):
+        kind, _, weight = part.partition("=")
+        pick_request(kind.strip(), random.Random())  # validate the name
+        kinds.append(kind.strip())
+        weights.append(float(weight or 1))
+    return kinds, weights
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def git_commit() -> Dict[str, Any]:
+    def git(*args: str) -> str:
+        return subprocess.run(["git", *args], cwd=BACKEND, capture_output=True, text=True).stdout.strip()
+    return {"sha": git("rev-parse", "--short", "HEAD") or "unknown",
+            "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+
+def percentiles(values: List[float]) -> Dict[str, Optional[float]]:
+    if not values:
+        return {"p50": None, "p95": None, "p99": None, "max": None}
+    arr = np.array(values) * 1000.0
+    p50, p95, p99 = np.percentile(arr, [50, 95, 99])
+    return {"p50": round(float(p50), 2), "p95": round(float(p95), 2),
+            "p99": round(float(p99), 2), "max": round(float(arr.max()), 2)}
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Processes under test
+class Stack:
+    """Scanner replay + uvicorn, started as child processes and torn down on exit."""
+
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        self.port = free_port()
+        self.tv_port = free_port()
+        self.base = f"http://127.0.0.1:{self.port}"
+        self.tv_base = f"http://127.0.0.1:{self.tv_port}"
+        self.procs: List[subprocess.Popen] = []
+
+    def __enter__(self) -> "Stack":
+        a = self.args
+        self.procs.append(subprocess.Popen(
+            [sys.executable, str(BACKEND / "bench" / "scanner_replay.py"), "--port", str(self.tv_port),
+             "--latency-ms", str(a.tv_latency_ms), "--jitter-ms", str(a.tv_jitter_ms),
+             "--error-rate", str(a.tv_error_rate), "--seed", str(a.seed)]
+            + (["--fixture", a.tv_fixture] if a.tv_fixture else []),
+            cwd=BACKEND, stdout=subprocess.DEVNULL))
+        env = {**os.environ, "MARKET_DATA": "fake", "TV_SCAN_URL": self.tv_base + "/",
+               "FAKE_MT5_LATENCY_MS": str(a.mt5_latency_ms), "FAKE_MT5_ERROR_RATE": str(a.mt5_error_rate),
+               "TV_CACHE_TTL": str(a.tv_cache_ttl), "SHARED_CACHE_PORT": str(free_port()),
+               "SHARED_CACHE_KEY": secrets.token_hex(16),
+               "RATING_HISTORY": "0", "WARM_STATE": "0"}
+        self.procs.append(subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "bench.serve:app", "--port", str(self.port),
+             "--workers", str(a.workers), "--log-level", "warning", "--no-access-log"],
+            cwd=BACKEND, env=env))
+        self._wait_ready()
+        return self
+
+    def _wait_ready(self, timeout: float = 60.0) -> None:
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            try:
+                if httpx.get(self.base + "/_bench/loop_lag", timeout=2).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            if any(p.poll() is not None for p in self.procs):
+                break
+            time.sleep(0.2)
+        self.__exit__()
+        raise RuntimeError("server did not come up")
+
+    def __exit__(self, *exc) -> None:
+        for p in reversed(self.procs):
+            p.terminate()
+        for p in self.procs:
+            try:
+                p.wait(10)
+            except subprocess.TimeoutExpired:
+                p.kill()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Load generation
+async def upstream_counts(client: httpx.AsyncClient, tv_base: str) -> Dict[str, int]:
+    """Fake MT5 calls/errors (of the worker that answers) and scanner requests/errors so far."""
+    mt5 = (await client.get("/_bench/upstream")).json()
+    tv = (await client.get(tv_base + "/stats")).json()
+    return {"mt5_calls": sum(mt5["calls"].values()), "mt5_errors": sum(mt5["errors"].values()),
+            "tv_requests": tv["requests"], "tv_errors": tv["errors"]}
+
+
+def cell_errors(kind: str, body: Any) -> int:
+    """Per-symbol / per-cell {"error": ...} entries inside a 200 from the TradingView endpoints."""
+    if kind == "analysis":
+        cells = body["analysis_data"].values()
+    elif kind == "heatmap":
+        cells = [cell for row in body["heatmap_data"].values() for cell in row.values()]
+    else:
+        return 0
+    return sum(1 for cell in cells if "error" in cell)
+
+
+async def run_level(stack: "Stack", concurrency: int, duration: float, kinds: List[str], weights: List[float],
+                    seed: int) -> Dict[str, Any]:
+    latencies: Dict[str, List[float]] = {k: [] for k in kinds}
+    errors: Dict[str, int] = {}
+    bad_cells: Dict[str, int] = {}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=stack.base, limits=limits, timeout=60.0) as client:
+        await client.get("/_bench/loop_lag", params={"reset": True})
+        before = await upstream_counts(client, stack.tv_base)
+        deadline = time.perf_counter() + duration
+
+        async def user(i: int) -> None:
+            rng = random.Random(seed * 1000 + i)
+            while time.perf_counter() < deadline:
+                kind = rng.choices(kinds, weights)[0]
+                began = time.perf_counter()
+                try:
+                    r = await client.get(pick_request(kind, rng))
+                    failed = None if r.status_code < 400 else f"{kind}:{r.status_code}"
+                    # A 200 whose cells are errors is a failure too.
+                    cells = cell_errors(kind, r.json()) if failed is None else 0
+                    if cells:
+                        failed = f"{kind}:cell_error"
+                        bad_cells[kind] = bad_cells.get(kind, 0) + cells
+                except httpx.HTTPError as e:
+                    failed = f"{kind}:{type(e).__name__}"
+                latencies[kind].append(time.perf_counter() - began)
+                if failed:
+                    errors[failed] = errors.get(failed, 0) + 1
+
+        began = time.perf_counter()
+        await asyncio.gather(*(user(i) for i in range(concurrency)))
+        took = time.perf_counter() - began
+        lag = (await client.get("/_bench/loop_lag", params={"reset": True})).json()
+        after = await upstream_counts(client, stack.tv_base)
+
+    everything = [x for v in latencies.values() for x in v]
+    return {
+        "concurrency": concurrency,
+        "seconds": round(took, 2),
+        "requests": len(everything),
+        "errors": sum(errors.values()),
+        "rps": round(len(everything) / took, 2),
+        "latency_ms": percentiles(everything),
+        "by_endpoint": {k: {"requests": len(v), **percentiles(v)} for k, v in latencies.items()},
+        "error_kinds": errors,
+        "error_cells": bad_cells,
+        "loop_lag_ms": lag,
+        # Upstream failures are often absorbed (empty candles, per-symbol errors in a 200), so count them here.
+        "upstream": {k: after[k] - before[k] for k in after},
+    }
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Reporting
+def _fmt(x: Optional[float]) -> str:
+    return "-" if x is None else f"{x:.1f}"
+
+
+HEADER = (f"{'conc':>5} {'req/s':>8} {'errors':>7} {'p50':>8} {'p95':>8} {'p99':>8} {'lag p99':>8} {'lag max':>8}"
+          f" {'mt5':>6} {'mt5 err':>7} {'tv':>4} {'tv err':>6}")
+
+
+def level_row(lv: Dict[str, Any]) -> str:
+    lat, lag, up = lv["latency_ms"], lv["loop_lag_ms"], lv["upstream"]
+    return (f"{lv['concurrency']:>5} {lv['rps']:>8.1f} {lv['errors']:>7} {_fmt(lat['p50']):>8} "
+            f"{_fmt(lat['p95']):>8} {_fmt(lat['p99']):>8} {_fmt(lag['p99']):>8} {_fmt(lag['max']):>8}"
+            f" {up['mt5_calls']:>6} {up['mt5_errors']:>7} {up['tv_requests']:>4} {up['tv_errors']:>6}")
+
+
+def print_compare(base: Dict[str, Any], cur: Dict[str, Any]) -> None:
+    """Relative change per concurrency level; latency going down and req/s going up are improvements."""
+    if base.get("config") != cur.get("config"):
+        print("note: the two runs used different settings")
+    print(f"vs {base['commit']['sha']}{' (dirty)' if base['commit']['dirty'] else ''}:")
+    print(f"{'conc':>5} {'req/s':>9} {'p50':>9} {'p95':>9} {'p99':>9} {'lag p99':>9}")
+    old = {lv["concurrency"]: lv for lv in base["levels"]}
+
+    def delta(a: Optional[float], b: Optional[float]) -> str:
+        return "-" if not a or b is None else f"{(b - a) / a * 100:+.1f}%"
+
+    for lv in cur["levels"]:
+        prev = old.get(lv["concurrency"])
+        if prev is None:
+            continue
+        print(f"{lv['concurrency']:>5} {delta(prev['rps'], lv['rps']):>9} "
+              + " ".join(f"{delta(prev['latency_ms'][p], lv['latency_ms'][p]):>9}" for p in ("p50", "p95", "p99"))
+              + f" {delta(prev['loop_lag_ms']['p99'], lv['loop_lag_ms']['p99']):>9}")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Load test index:app against fake MT5 and a scanner replay server.")
+    ap.add_argument("--levels", default="1,4,16,64", help="comma-separated concurrency levels")
+    ap.add_argument("--duration", type=float, default=15.0, help="seconds per level")
+    ap.add_argument("--warmup", type=float, default=5.0, help="unrecorded seconds before the first level")
+    ap.add_argument("--mix", default=DEFAULT_MIX, help="weighted request kinds: candles, candles_all, analysis, heatmap")
+    ap.add_argument("--workers", type=int, default=1, help="uvicorn workers")
+    ap.add_argument("--mt5-latency-ms", type=float, default=2.0)
+    ap.add_argument("--mt5-error-rate", type=float, default=0.0)
+    ap.add_argument("--tv-latency-ms", type=float, default=150.0)
+    ap.add_argument("--tv-jitter-ms", type=float, default=50.0)
+    ap.add_argument("--tv-error-rate", type=float, default=0.0)
+    ap.add_argument("--tv-cache-ttl", type=float, default=30.0, help="TV_CACHE_TTL for the server; lower it to hit the scanner more")
+    ap.add_argument("--tv-fixture", help="recorded scanner responses for scanner_replay.py")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--out", help="report path (default bench/reports/load-<commit>.json)")
+    ap.add_argument("--compare", help="earlier report to diff against")
+    args = ap.parse_args()
+
+    kinds, weights = parse_mix(args.mix)
+    levels = [int(x) for x in args.levels.split(",")]
+    config = {k: v for k, v in vars(args).items() if k not in ("out", "compare")}
+    commit = git_commit()
+
+    results = []
+    with Stack(args) as stack:
+        if args.warmup:
+            asyncio.run(run_level(stack, 4, args.warmup, kinds, weights, args.seed))
+        print(HEADER, flush=True)
+        for n in levels:
+            results.append(asyncio.run(run_level(stack, n, args.duration, kinds, weights, args.seed)))
+            print(level_row(results[-1]), flush=True)
+
+    report = {"commit": commit, "created": time.strftime("%Y-%m-%dT%H:%M:%S"), "config": config, "levels": results}
+    out = Path(args.out) if args.out else REPORTS / f"load-{commit['sha']}{'-dirty' if commit['dirty'] else ''}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2))
+    print(f"report → {out}")
+    if args.compare:
+        print_compare(json.loads(Path(args.compare).read_text()), report)
+
+
+if __name__ == "__main__":
+    main()
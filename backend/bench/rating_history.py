@@ -0,0 +1,126 @@
+"""
+Write throughput and range-read latency of the Mongo rating history.
+
+Generates a month of snapshots the way the screener refresher produces them
+(every symbol on M1 each minute, plus M5…D whenever their bars close), writes
+them through HistoryWriter into a scratch database, then times range reads
+and point-in-time lookups. Needs a running mongod:
+
+    python bench/rating_history.py --uri mongodb://localhost:27017 --days 30
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from pymongo import MongoClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("MARKET_DATA", "fake")
+os.environ.setdefault("SHARED_CACHE", "0")
+
+from controllers import history as h  # noqa: E402
+from controllers.candles import TF_SECONDS  # noqa: E402
+
+RATINGS = np.array(["Strong Sell", "Sell", "Neutral", "Buy", "Strong Buy"])
+
+
+def refresher_batches(symbols, days: int, start_ms: int):
+    """One batch per minute, as the refresher would hand them to the writer."""
+    rng = np.random.default_rng(7)
+    for minute in range(days * 1440):
+        t_close = start_ms + (minute + 1) * 60_000
+        rows = []
+        for tf, span in TF_SECONDS.items():
+            span_ms = span * 1000
+            if t_close % span_ms:
+                continue
+            scores = rng.uniform(-1, 1, len(symbols))
+            ratings = RATINGS[np.digitize(scores, [-0.5, -0.1, 0.1, 0.5])]
+            rows.extend(zip(symbols, [tf] * len(symbols), [t_close - span_ms] * len(symbols),
+                            scores.tolist(), ratings.tolist()))
+        yield rows
+
+
+def timed(fn, reps: int):
+    took = []
+    for _ in range(reps):
+        began = time.perf_counter()
+        out = fn()
+        took.append(time.perf_counter() - began)
+    ms = np.array(took) * 1000
+    return out, float(np.percentile(ms, 50)), float(np.percentile(ms, 95))
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--uri", default=os.getenv("MONGO_URI", "mongodb://localhost:27017"))
+    ap.add_argument("--db", default="fd_bench")
+    ap.add_argument("--symbols", type=int, default=28)
+    ap.add_argument("--days", type=int, default=30)
+    ap.add_argument("--reps", type=int, default=50)
+    args = ap.parse_args()
+
+    coll = MongoClient(args.uri)[args.db][h.COLLECTION]
+    coll.drop()
+    writer = h.HistoryWriter(lambda: coll, flush_seconds=0.5)
+    coll.create_index([("symbol", 1), ("tf", 1), ("day", 1)], unique=True)
+
+    symbols = [f"SYM{i:03d}" for i in range(args.symbols)]
+    start = int(time.time() * 1000) // h.DAY_MS * h.DAY_MS - args.days * h.DAY_MS
+
+    # ── writes: the refresher cadence, one flush per simulated minute, for the first day ──
+    flush_ms = []
+    batches = refresher_batches(symbols, args.days, start)
+    rows_total = 0
+    for _, rows in zip(range(1440), batches):
+        began = time.perf_counter()
+        writer._write(rows)
+        flush_ms.append((time.perf_counter() - began) * 1000)
+        rows_total += len(rows)
+    print(f"per-minute flush ({args.symbols} symbols): p50 {np.percentile(flush_ms, 50):.2f} ms, "
+          f"p95 {np.percentile(flush_ms, 95):.2f} ms")
+
+    # ── writes: the rest of the month through the background writer (backlog catch-up) ──
+    began = time.perf_counter()
+    for rows in batches:
+        writer.add(rows)
+        rows_total += len(rows)
+    writer.close(timeout=3600)
+    took = time.perf_counter() - began
+    print(f"bulk catch-up: {writer.stats['queued']:,} snapshots in {took:.1f}s → "
+          f"{writer.stats['queued'] / took:,.0f} snapshots/s ({writer.stats['batches']} batches, "
+          f"{writer.stats['errors']} errors)")
+
+    stats = next(coll.aggregate([{"$collStats": {"storageStats": {}}}]))["storageStats"]
+    print(f"{rows_total:,} snapshots in {coll.count_documents({}):,} documents, "
+          f"{stats['size'] / rows_total:.1f} B/snapshot ({stats['storageSize'] / 2**20:.1f} MiB on disk)")
+
+    # ── idempotency: replaying a day must not add entries ──
+    before = coll.find_one({"symbol": symbols[0], "tf": "M1", "day": h.day_of(start)})["n"]
+    writer._write([r for rows in refresher_batches(symbols, 1, start) for r in rows])
+    after = coll.find_one({"symbol": symbols[0], "tf": "M1", "day": h.day_of(start)})["n"]
+    print(f"replayed day: bucket n {before} → {after} ({'ok' if before == after else 'DUPLICATED'})")
+
+    # ── reads ──
+    end = start + args.days * h.DAY_MS
+    rnd = random.Random(1)
+    print(f"{'range':>8} {'tf':>4} {'rows':>8} {'p50 ms':>8} {'p95 ms':>8}")
+    for label, span in (("1h", 3_600_000), ("1d", h.DAY_MS), ("7d", 7 * h.DAY_MS), (f"{args.days}d", args.days * h.DAY_MS)):
+        for tf in ("M1", "H1"):
+            def read():
+                lo = rnd.randrange(start, max(start + 1, end - span))
+                return h.history(rnd.choice(symbols), tf, lo, lo + span, coll=coll)
+            out, p50, p95 = timed(read, args.reps)
+            print(f"{label:>8} {tf:>4} {len(out['t']):>8} {p50:>8.2f} {p95:>8.2f}")
+
+    _, p50, p95 = timed(lambda: h.rating_at(rnd.choice(symbols), "H4", rnd.randrange(start, end), coll=coll), args.reps)
+    print(f"rating_at H4: p50 {p50:.2f} ms, p95 {p95:.2f} ms")
+    coll.drop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Local stand-in for the TradingView scanner (POST /<screener>/scan).
+
+Answers with deterministic indicator values per (ticker, interval) in the same
+shape as the real scanner, or replays recorded responses from a fixture file
+({"<screener>|<interval suffix>": <scanner response>}). Latency, jitter and an
+error rate (alternating 429 / 500) can be injected. Point the backend at it
+with TV_SCAN_URL=http://127.0.0.1:<port>/
+
+    python bench/scanner_replay.py --port 8765 --latency-ms 150 --error-rate 0.02
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+from tradingview_ta import TradingView
+
+_PRICE_LIKE = ("close", "open", "high", "low", "EMA", "SMA", "Ichimoku.BLine", "VWMA", "HullMA9",
+               "Pivot.", "P.SAR", "BB.")
+
+
+def _unit(*parts: str) -> float:
+    """Stable pseudo-random number in [0, 1) for a tuple of strings."""
+    return zlib.crc32("|".join(parts).encode()) / 2 ** 32
+
+
+def synth_row(ticker: str, columns: List[str]) -> List[Optional[float]]:
+    """Plausible values for each requested column: ratings in [-1, 1], prices near one level, rest 0-100."""
+    base = 0.5 + 1.5 * _unit(ticker)
+    row: List[Optional[float]] = []
+    for col in columns:
+        name = col.split("|", 1)[0]
+        u = _unit(ticker, col)
+        if name.startswith(("Recommend.", "Rec.")):
+            row.append(round(2 * u - 1, 4) if name.startswith("Recommend.") else float(round(2 * u) - 1))
+        elif name.startswith(_PRICE_LIKE):
+            row.append(round(base * (0.99 + 0.02 * u), 5))
+        elif name in ("volume", "change"):
+            row.append(round(1000 * u, 2))
+        else:
+            row.append(round(100 * u - (50 if name.startswith(("AO", "Mom", "MACD", "CCI20", "W.R", "BBPower")) else 0), 4))
+    return row
+
+
+class ReplayState:
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0, error_rate: float = 0.0,
+                 fixture: Optional[Dict[str, Any]] = None, seed: int = 0):
+        self.latency = latency_ms / 1000.0
+        self.jitter = jitter_ms / 1000.0
+        self.error_rate = error_rate
+        self.fixture = fixture or {}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+
+    def draw(self):
+        """(delay seconds, error status or None) for one request."""
+        with self._lock:
+            self.requests += 1
+            delay = self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0.0)
+            if self.error_rate and self._rng.random() < self.error_rate:
+                self.errors += 1
+                return delay, 429 if self.errors % 2 else 500
+            return delay, None
+
+
+def make_handler(state: ReplayState):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status: int, body: Dict[str, Any]) -> None:
+            raw = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(raw)))
+            self.end_headers()
+            self.wfile.write(raw)
+
+        def do_GET(self):
+            if self.path.rstrip("/") == "/stats":
+                return self._send(200, {"requests": state.requests, "errors": state.errors})
+            self._send(404, {"error": "not found"})
+
+        def do_POST(self):
+            screener = self.path.strip("/").split("/")[0]
+            payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            delay, error = state.draw()
+            if delay:
+                time.sleep(delay)
+            if error:
+                return self._send(error, {"error": "injected", "status": error})
+            tickers = payload.get("symbols", {}).get("tickers", [])
+            columns = payload.get("columns", [])
+            suffix = columns[0].split("|", 1)[1] if columns and "|" in columns[0] else ""
+            recorded = state.fixture.get(f"{screener}|{suffix}")
+            if recorded is not None:
+                wanted = set(tickers)
+                return self._send(200, {**recorded, "data": [r for r in recorded["data"] if r["s"] in wanted]})
+            self._send(200, {"totalCount": len(tickers),
+                             "data": [{"s": t, "d": synth_row(t, columns)} for t in tickers]})
+
+    return Handler
+
+
+def serve(port: int, state: ReplayState, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((host, port), make_handler(state))
+    server.daemon_threads = True
+    return server
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--latency-ms", type=float, default=0.0)
+    ap.add_argument("--jitter-ms", type=float, default=0.0)
+    ap.add_argument("--error-rate", type=float, default=0.0)
+    ap.add_argument("--fixture", help="recorded scanner responses keyed by '<screener>|<interval suffix>'")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+    fixture = json.load(open(args.fixture)) if args.fixture else None
+    server = serve(args.port, ReplayState(args.latency_ms, args.jitter_ms, args.error_rate, fixture, args.seed))
+    print(f"scanner replay on http://127.0.0.1:{args.port}/ ({len(TradingView.indicators)} indicator columns)", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
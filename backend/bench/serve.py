@@ -0,0 +1,61 @@
+"""
+index:app with an event-loop lag probe, for load runs.
+
+A background task sleeps PROBE_SECONDS in a loop and records how late it wakes
+up; GET /_bench/loop_lag returns the percentiles since the last reset.
+GET /_bench/upstream returns this worker's fake MT5 call and failure counts.
+
+    MARKET_DATA=fake TV_SCAN_URL=http://127.0.0.1:8765/ uvicorn bench.serve:app
+"""
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import List
+
+import numpy as np
+from fastapi import FastAPI
+
+from controllers import fake_market
+from index import app
+
+PROBE_SECONDS = 0.02
+_lags: List[float] = []
+
+
+async def _probe() -> None:
+    while True:
+        began = time.perf_counter()
+        await asyncio.sleep(PROBE_SECONDS)
+        _lags.append(time.perf_counter() - began - PROBE_SECONDS)
+
+
+_app_lifespan = app.router.lifespan_context
+
+
+@asynccontextmanager
+async def _lifespan(app: FastAPI):
+    task = asyncio.create_task(_probe())
+    async with _app_lifespan(app) as state:
+        yield state
+    task.cancel()
+
+
+app.router.lifespan_context = _lifespan
+
+
+@app.get("/_bench/loop_lag")
+async def loop_lag(reset: bool = False):
+    """Event-loop lag in ms since the last reset: samples, p50, p99, max."""
+    lags = np.array(_lags) * 1000.0
+    if reset:
+        _lags.clear()
+    if not len(lags):
+        return {"samples": 0, "p50": None, "p99": None, "max": None}
+    return {"samples": int(len(lags)), "p50": float(np.percentile(lags, 50)),
+            "p99": float(np.percentile(lags, 99)), "max": float(lags.max())}
+
+
+@app.get("/_bench/upstream")
+async def upstream():
+    """Fake MT5 calls and injected failures of this worker so far, by function."""
+    return {"calls": dict(fake_market.calls), "errors": dict(fake_market.errors)}
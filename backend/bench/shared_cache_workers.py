@@ -0,0 +1,74 @@
+"""
+Broker / TradingView load vs. number of workers, with the fake market source.
+
+Starts N processes at once (like `uvicorn index:app --workers N`); each one
+fetches candles for every default pair and TF, computes the screener
+snapshots and asks for the TradingView heatmap summaries. Upstream call counts
+stay flat as N grows because only one worker per key loads through the shared cache.
+
+    python bench/shared_cache_workers.py [max_workers]
+"""
+import multiprocessing as mp
+import os
+import secrets
+import sys
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parents[1]
+
+
+def worker(port: int, key: str, barrier, results) -> None:
+    os.environ.update(MARKET_DATA="fake", SHARED_CACHE="1", SHARED_CACHE_PORT=str(port), SHARED_CACHE_KEY=key)
+    sys.path.insert(0, str(BACKEND))
+    from controllers import candles, fake_market, screener
+    from controllers.candles import fetch_candles, TF_SECONDS
+    from controllers import tradingview
+    import routes.ratings as ratings
+
+    # Long TTLs so entries don't expire mid-run: only sharing is being measured.
+    candles.candle_ttl = lambda tf: 600.0
+    tradingview.TV_CACHE_TTL = 600.0
+
+    tv_calls = []
+    def fake_tv(screener, interval, symbols):
+        tv_calls.append(interval)
+        return {s: None for s in symbols}
+    tradingview.scan = fake_tv
+
+    computed = []
+    compute = screener.compute_snapshot
+    screener.compute_snapshot = lambda *a, **k: computed.append(a) or compute(*a, **k)
+
+    pairs = [p.split(":", 1)[-1] for p in ratings.DEFAULT_PAIRS_FOREX]
+    barrier.wait()
+    for _ in range(3):
+        for sym in pairs:
+            for tf in TF_SECONDS:
+                fetch_candles(sym, tf)
+        for interval in ratings.TIMEFRAME_MAP.values():
+            tradingview.tv_summaries("forex", interval, ratings.DEFAULT_PAIRS_FOREX)
+    screener.refresh(pairs, list(TF_SECONDS), force=True)
+    results.put((sum(fake_market.calls.values()), len(tv_calls), len(computed)))
+
+
+def run(n: int, port: int):
+    ctx = mp.get_context("spawn")
+    barrier, results = ctx.Barrier(n), ctx.Queue()
+    key = secrets.token_hex(16)
+    procs = [ctx.Process(target=worker, args=(port, key, barrier, results)) for _ in range(n)]
+    for p in procs:
+        p.start()
+    totals = [results.get(timeout=300) for _ in procs]
+    for p in procs:
+        p.join()
+    return [sum(col) for col in zip(*totals)]
+
+
+if __name__ == "__main__":
+    top = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    print(f"{'workers':>7} {'mt5 calls':>10} {'tv calls':>9} {'snapshots':>10}")
+    n, port = 1, 47700
+    while n <= top:
+        mt5_calls, tv_calls, snaps = run(n, port)
+        print(f"{n:>7} {mt5_calls:>10} {tv_calls:>9} {snaps:>10}")
+        n, port = n * 2, port + 1
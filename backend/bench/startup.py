@@ -0,0 +1,100 @@
+"""
+Import time, time-to-ready and first-request latency, cold vs. warm restart.
+
+Runs uvicorn index:app with the fake market source (FAKE_MT5_LATENCY_MS per
+broker call) twice: once with no warm-state file, and again after a clean
+shutdown has written one. "Ready" means the screener has a rating for every
+symbol on every TF. --backend points at another checkout to get the numbers
+from before a change (e.g. a `git worktree` of the previous commit).
+
+    python bench/startup.py [--backend /path/to/old/backend] [--mt5-latency-ms 20]
+"""
+import argparse
+import os
+import secrets
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+TFS = ["M1", "M5", "M15", "M30", "H1", "H4", "D"]
+READY_FILTER = " and ".join(f"{tf}.score > -9" for tf in TFS)
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def import_time(backend: Path, env: dict, runs: int) -> float:
+    code = "import time; t = time.perf_counter(); import index; print(time.perf_counter() - t)"
+    took = [float(subprocess.run([sys.executable, "-c", code], cwd=backend, env=env, capture_output=True,
+                                 text=True, check=True).stdout.strip().splitlines()[-1]) for _ in range(runs)]
+    return statistics.median(took) * 1000
+
+
+def boot(backend: Path, env: dict) -> dict:
+    """Start the server; time to first answered request, its latency, and time until the screener is full."""
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    began = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-m", "uvicorn", "index:app", "--port", str(port),
+                             "--log-level", "warning"], cwd=backend, env=env)
+    out = {}
+    try:
+        with httpx.Client(base_url=base, timeout=60) as client:
+            while "first_ms" not in out:
+                try:
+                    t0 = time.perf_counter()
+                    client.get("/candles/EURUSD/H1").raise_for_status()
+                    out["first_ms"] = (time.perf_counter() - began) * 1000
+                    out["first_request_ms"] = (time.perf_counter() - t0) * 1000
+                except httpx.TransportError:
+                    time.sleep(0.02)
+            t0 = time.perf_counter()
+            client.get("/screener", params={"limit": 1})
+            out["screener_first_ms"] = (time.perf_counter() - t0) * 1000
+            while True:
+                r = client.get("/screener", params={"filter": READY_FILTER, "limit": 1})
+                # 400 (unknown column) until some TF has no data at all yet
+                if r.status_code == 200 and 0 < r.json()["count"] == r.json()["universe"]:
+                    out["ready_ms"] = (time.perf_counter() - began) * 1000
+                    break
+                time.sleep(0.05)
+    finally:
+        proc.send_signal(signal.SIGINT)  # clean shutdown so the lifespan writes the warm state
+        proc.wait(60)
+    return out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--backend", default=str(Path(__file__).resolve().parents[1]))
+    ap.add_argument("--mt5-latency-ms", type=float, default=20.0)
+    ap.add_argument("--runs", type=int, default=5)
+    args = ap.parse_args()
+    backend = Path(args.backend)
+
+    state = Path(tempfile.mkdtemp()) / "warm.bin"
+    env = {**os.environ, "MARKET_DATA": "fake", "SHARED_CACHE_PORT": str(free_port()),
+           "SHARED_CACHE_KEY": secrets.token_hex(16), "RATING_HISTORY": "0", "TV_PREWARM": "0",
+           "FAKE_MT5_LATENCY_MS": str(args.mt5_latency_ms), "WARM_STATE_PATH": str(state)}
+
+    print(f"import index: {import_time(backend, env, args.runs):.0f} ms (median of {args.runs})")
+    print(f"{'boot':>6} {'first response':>15} {'first req':>10} {'screener req':>13} {'ready':>9}")
+    for label in ("cold", "warm"):
+        r = boot(backend, env)
+        print(f"{label:>6} {r['first_ms']:>12.0f} ms {r['first_request_ms']:>7.0f} ms "
+              f"{r['screener_first_ms']:>10.0f} ms {r['ready_ms']:>6.0f} ms")
+    print(f"warm state file: {state.stat().st_size if state.exists() else 0:,} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Vote-rule parameter sweep: parity with the single-bar rating, and throughput.
+
+1. Parity: score_series() at the default parameters against tv_rating_for_df
+   run on each prefix of the same history, at --samples bars; likewise
+   closes_score_series() against compute_score_from_closes.
+2. Sweep: a grid of --configs size (RSI/CCI/ADX/Stoch/Williams periods and
+   thresholds, MA sets, rating bands) over --count bars. Prints the time, the
+   configurations per second and the best rows of the table. Then the same
+   for a grid over the closes-only recipe's periods and weights.
+
+    python bench/sweep.py [--symbol EURUSD] [--tf H1] [--count 5000] [--samples 40]
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("MARKET_DATA", "fake")
+os.environ.setdefault("SHARED_CACHE", "0")
+
+from controllers import sweep as sw  # noqa: E402
+from controllers.ratings import compute_score_from_closes, tv_rating_for_df  # noqa: E402
+
+GRID = {
+    "ma_periods": [(10, 20, 30, 50, 100, 200), (10, 20, 50, 100), (20, 50, 200)],
+    "rsi_period": [7, 14, 21],
+    "rsi_low": [25, 30, 35],
+    "cci_period": [14, 20],
+    "cci_level": [100, 150],
+    "adx_min": [15, 20, 25],
+    "stoch_period": [9, 14],
+    "willr_period": [10, 14],
+    "buy": [0.1, 0.2],
+    "strong": [0.4, 0.5],
+}
+
+GRID_CLOSES = {
+    "trend_period": [50, 100, 200],
+    "trend_weight": [0.1, 0.2, 0.3],
+    "slope_period": [10, 20],
+    "slope_bars": [3, 5, 8],
+    "rsi_period": [7, 14, 21],
+    "macd_weight": [0.05, 0.1, 0.2],
+    "buy": [0.1, 0.2],
+    "strong": [0.4, 0.5],
+}
+
+
+def parity(df, samples: int) -> None:
+    score = sw.score_series(df)
+    start = int(np.argmax(~np.isnan(score)))
+    bars = np.linspace(start, len(df) - 1, samples).astype(int)
+    mismatches, took = 0, 0.0
+    for i in bars:
+        began = time.perf_counter()
+        ref = tv_rating_for_df(df.iloc[:i + 1].reset_index(drop=True))
+        took += time.perf_counter() - began
+        if ref["score"] != round(float(score[i]), 4):
+            mismatches += 1
+            print(f"  bar {i}: sweep {score[i]:.4f} vs tv_rating_for_df {ref['score']:.4f}")
+    print(f"parity: {len(bars) - mismatches}/{len(bars)} bars match tv_rating_for_df "
+          f"(first scored bar {start}, single-bar path {took / len(bars) * 1000:.0f} ms/bar)")
+
+
+def parity_closes(df, samples: int) -> None:
+    score = sw.closes_score_series(df)
+    start = int(np.argmax(~np.isnan(score)))
+    bars = np.linspace(start, len(df) - 1, samples).astype(int)
+    closes = df["c"].tolist()
+    mismatches = sum(compute_score_from_closes(closes[:i + 1])["score"] != score[i] for i in bars)
+    print(f"parity (closes recipe): {len(bars) - mismatches}/{len(bars)} bars match compute_score_from_closes")
+
+
+def run_sweep(label: str, run, df, grid, defaults, horizon: int) -> None:
+    n = int(np.prod([len(v) for v in grid.values()]))
+    began = time.perf_counter()
+    table = run(df, grid, horizon)
+    took = time.perf_counter() - began
+    print(f"sweep ({label}): {n:,} configurations × {table.attrs['bars']:,} bars in {took:.2f}s "
+          f"({n / took:,.0f} configurations/s)")
+    default = table[np.logical_and.reduce([table[k].map(lambda v, k=k: v == defaults[k]) for k in grid])]
+    print("defaults:")
+    print(default.to_string(index=False))
+    print("best by avg_return_bp (≥ 50 signals):")
+    print(table[table["signals"] >= 50].sort_values("avg_return_bp", ascending=False).head(8).to_string(index=False))
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--symbol", default="EURUSD")
+    ap.add_argument("--tf", default="H1")
+    ap.add_argument("--count", type=int, default=5000)
+    ap.add_argument("--samples", type=int, default=40)
+    ap.add_argument("--horizon", type=int, default=5)
+    args = ap.parse_args()
+
+    df = sw.history_frame(args.symbol, args.tf, args.count)
+    recent = df.iloc[-min(len(df), 1500):].reset_index(drop=True)
+    parity(recent, args.samples)
+    parity_closes(recent, args.samples)
+
+    run_sweep("votes", sw.sweep, df, GRID, sw.DEFAULTS, args.horizon)
+    run_sweep("closes", sw.sweep_closes, df, GRID_CLOSES, sw.CLOSES_DEFAULTS, args.horizon)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+Rating-change events and alert rules.
+
+Every worker runs the screener refresher, so every worker's engine sees the
+same snapshots and keeps the same per-symbol counts. What clients read and
+write lives in the host-wide store instead of any one worker: the two event
+logs, and the rules (each engine re-syncs its copy when their version moves).
+Only the worker holding the publisher lease appends events, so a change is
+logged once however many workers there are; if it dies, another one takes the
+lease over after PUBLISHER_LEASE seconds.
+"""
+import threading
+import uuid
+from typing import Any, Dict, FrozenSet, List, Set, Tuple
+
+from controllers.candles import TF_SECONDS
+from controllers.screener import on_snapshots
+from controllers.shared_cache import cache
+from schemas.alerts import AlertRule
+
+PUBLISHER_LEASE = 120.0
+RULES = "alert_rules"
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Event logs in the shared store
+class SharedLog:
+    """A named EventLog in the host-wide store: one sequence and cursor space for all workers."""
+
+    def __init__(self, name: str, maxlen: int = 10_000):
+        self.name = name
+        self.maxlen = maxlen
+
+    def append_many(self, items: List[Dict[str, Any]]) -> None:
+        if items:
+            cache.log_append(self.name, items, self.maxlen)
+
+    def read(self, cursor: int = 0, limit: int = 500) -> Dict[str, Any]:
+        return cache.log_read(self.name, cursor, limit)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Rating change tracking + incremental rule evaluation
+#
+# Rules sharing the same condition (rating, TF set, min_tfs) are grouped, and
+# each group keeps a per-symbol count of TFs currently at the target rating.
+# A change event only touches the groups whose (rating, TF) it affects, so the
+# work per batch scales with the number of changed cells, not with the rule count.
+
+Condition = Tuple[str, FrozenSet[str], int]
+
+
+class _Group:
+    def __init__(self):
+        self.counts: Dict[str, int] = {}
+        self.any_symbol: Set[str] = set()            # rule ids without a symbol filter
+        self.by_symbol: Dict[str, Set[str]] = {}      # symbol → rule ids
+
+
+class AlertEngine:
+    def __init__(self, changes: SharedLog, alerts: SharedLog, rules: str = RULES):
+        self._lock = threading.RLock()
+        self.changes = changes
+        self.alerts = alerts
+        self._rules_name = rules
+        self._rules_version: Any = None
+        self._ratings: Dict[Tuple[str, str], str] = {}
+        self._rules: Dict[str, Tuple[AlertRule, Condition]] = {}
+        self._groups: Dict[Condition, _Group] = {}
+        self._by_cell: Dict[Tuple[str, str], Set[Condition]] = {}  # (rating, tf) → conditions
+
+    # ── rules ───────────────────────────────────────────────────────────────
+    def rules(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            self._sync_rules()
+            return {rid: rule.dict() for rid, (rule, _) in self._rules.items()}
+
+    def add_rule(self, rule: AlertRule) -> str:
+        _condition(rule)
+        rid = uuid.uuid4().hex[:12]
+        cache.map_set(self._rules_name, rid, rule.dict())
+        with self._lock:
+            self._sync_rules()
+        return rid
+
+    def remove_rule(self, rid: str) -> bool:
+        removed = cache.map_del(self._rules_name, rid)
+        with self._lock:
+            self._sync_rules()
+        return removed
+
+    def _sync_rules(self) -> None:
+        """Bring the local rule groups in line with the shared rule map, if it changed."""
+        latest = cache.map_get(self._rules_name, self._rules_version)
+        if latest is None:
+            return
+        self._rules_version, shared = latest
+        for rid in set(self._rules) - set(shared):
+            self._drop(rid)
+        for rid in set(shared) - set(self._rules):
+            self._add(rid, AlertRule(**shared[rid]))
+
+    def _add(self, rid: str, rule: AlertRule) -> None:
+        cond = _condition(rule)
+        tfs = cond[1]
+        with self._lock:
+            group = self._groups.get(cond)
+            if group is None:
+                group = self._groups[cond] = _Group()
+                for (sym, tf), r in self._ratings.items():
+                    if tf in tfs and r == rule.rating:
+                        group.counts[sym] = group.counts.get(sym, 0) + 1
+                for tf in tfs:
+                    self._by_cell.setdefault((rule.rating, tf), set()).add(cond)
+            if rule.symbols:
+                for sym in rule.symbols:
+                    group.by_symbol.setdefault(sym.upper(), set()).add(rid)
+            else:
+                group.any_symbol.add(rid)
+            self._rules[rid] = (rule, cond)
+
+    def _drop(self, rid: str) -> None:
+        with self._lock:
+            entry = self._rules.pop(rid, None)
+            if entry is None:
+                return
+            rule, cond = entry
+            group = self._groups[cond]
+            group.any_symbol.discard(rid)
+            for sym in rule.symbols or []:
+                group.by_symbol.get(sym.upper(), set()).discard(rid)
+            if not group.any_symbol and not any(group.by_symbol.values()):
+                del self._groups[cond]
+                for tf in cond[1]:
+                    self._by_cell[(cond[0], tf)].discard(cond)
+
+    # ── snapshots ───────────────────────────────────────────────────────────
+    def ingest(self, snaps: List[Dict[str, Any]]) -> None:
+        """Diff fresh snapshots against the previous ratings and run affected rules."""
+        events: List[Dict[str, Any]] = []
+        fired: List[Dict[str, Any]] = []
+        with self._lock:
+            self._sync_rules()
+            for snap in snaps:
+                sym, tf, new = snap["symbol"], snap["tf"], snap["rating"]
+                old = self._ratings.get((sym, tf))
+                if old == new:
+                    continue
+                self._ratings[(sym, tf)] = new
+                touched = self._by_cell.get((old, tf), set()) | self._by_cell.get((new, tf), set())
+                for cond in touched:
+                    rating, _, min_tfs = cond
+                    group = self._groups[cond]
+                    before = group.counts.get(sym, 0)
+                    after = before + (new == rating) - (old == rating)
+                    group.counts[sym] = after
+                    if old is not None and before < min_tfs <= after:
+                        for rid in group.any_symbol | group.by_symbol.get(sym, set()):
+                            rule = self._rules[rid][0]
+                            fired.append({
+                                "rule_id": rid, "name": rule.name, "symbol": sym,
+                                "rating": rating, "tfs_matched": after, "trigger_tf": tf, "t": snap.get("t"),
+                            })
+                if old is not None:
+                    events.append({
+                        "symbol": sym, "tf": tf, "old": old, "new": new,
+                        "score": snap["score"], "t": snap.get("t"),
+                    })
+        # Every worker tracks the ratings; one of them publishes.
+        if (events or fired) and cache.lease(("alerts", "publisher"), PUBLISHER_LEASE):
+            self.changes.append_many(events)
+            self.alerts.append_many(fired)
+
+
+def _condition(rule: AlertRule) -> Condition:
+    tfs = frozenset(tf.upper() for tf in rule.tfs) if rule.tfs else frozenset(TF_SECONDS)
+    unknown = tfs - set(TF_SECONDS)
+    if unknown:
+        raise ValueError(f"Unknown timeframes: {', '.join(sorted(unknown))}")
+    if rule.min_tfs > len(tfs):
+        raise ValueError(f"min_tfs={rule.min_tfs} exceeds the {len(tfs)} TFs in the rule.")
+    return rule.rating, tfs, rule.min_tfs
+
+
+changes = SharedLog("rating_changes")
+alerts = SharedLog("alerts")
+engine = AlertEngine(changes, alerts)
+on_snapshots(engine.ingest)
@@ -1,10 +1,20 @@
 
-from typing import List, Dict
-import MetaTrader5 as mt5
-import pandas as pd
+from typing import List, Dict, Optional, Tuple
+import threading
+import time
+import zlib
+import numpy as np
 from schemas.candles import Candle
+from controllers.shared_cache import cache
 import os
 
+# MARKET_DATA=fake swaps the terminal for a deterministic in-process stand-in
+# (same API), for development, tests and load runs without a broker.
+if os.getenv("MARKET_DATA", "mt5").lower() == "fake":
+    from controllers import fake_market as mt5
+else:
+    import MetaTrader5 as mt5
+
 # ─────────────────────────────────────────────────────────────────────────────
 # Credentials (RECOMMENDED: set via environment variables)
 #   setx EXN_LOGIN  "41247366"
@@ -16,10 +26,22 @@ PASSWORD = os.getenv("EXN_PWD", "") or "v@]Ed(3c4$45"
 SERVER   = os.getenv("EXN_SERVER", "") or "Exness-MT5Trial3"
 # MT_PATH  = os.getenv("MT_PATH")  # optional path to terminal64.exe
 
-if not mt5.initialize(  # add MT_PATH as first arg if you need a specific install
-    login=LOGIN, password=PASSWORD, server=SERVER
-):
-    raise RuntimeError(f"MT5 init failed → {mt5.last_error()}")
+_connected = False
+_connect_lock = threading.Lock()
+
+def ensure_connected() -> None:
+    """Connect to the terminal on first use; workers that only read the shared cache never do."""
+    global _connected
+    if _connected:
+        return
+    with _connect_lock:
+        if _connected:
+            return
+        if not mt5.initialize(  # add MT_PATH as first arg if you need a specific install
+            login=LOGIN, password=PASSWORD, server=SERVER
+        ):
+            raise RuntimeError(f"MT5 init failed → {mt5.last_error()}")
+        _connected = True
 
 # ─────────────────────────────────────────────────────────────────────────────
 # class Candle(BaseModel):
@@ -41,23 +63,77 @@ TIMEFRAME: Dict[str, int] = {
     "D":   mt5.TIMEFRAME_D1,
 }
 
+# Bar length per TF, used to know when a new bar has closed.
+TF_SECONDS: Dict[str, int] = {
+    "M1":  60,
+    "M5":  5 * 60,
+    "M15": 15 * 60,
+    "M30": 30 * 60,
+    "H1":  60 * 60,
+    "H4":  4 * 60 * 60,
+    "D":   24 * 60 * 60,
+}
+
+# Cached candle blocks live at most this long, so a broker clock that is not
+# aligned with ours (D bars, odd offsets) still picks up the new bar quickly.
+CANDLE_TTL_CAP = 60.0
+
+def candle_ttl(tf: str) -> float:
+    """Seconds until the current bar of `tf` closes (capped)."""
+    span = TF_SECONDS[tf]
+    return min(span - time.time() % span + 1.0, CANDLE_TTL_CAP)
+
 # ─────────────────────────────────────────────────────────────────────────────
 # Helpers
+def fetch_rates(symbol: str, tf: str, count: int = 300) -> Optional[np.ndarray]:
+    """Raw MT5 rates for the last `count` closed bars, shared by all workers until the bar closes."""
+    if tf not in TIMEFRAME:
+        return None
+    def load():
+        ensure_connected()
+        return mt5.copy_rates_from_pos(symbol, TIMEFRAME[tf], 1, count)
+    def top_up(stale):
+        # Closed bars don't change, so only fetch the ones newer than the cached block
+        # (one bar of overlap; more than `count` missing → plain reload).
+        if stale is None or len(stale) < count:
+            return load()
+        ensure_connected()
+        # Count from the broker's newest closed bar, not our clock: they need not agree.
+        probe = mt5.copy_rates_from_pos(symbol, TIMEFRAME[tf], 1, 1)
+        if probe is None or len(probe) == 0:
+            return stale  # keep serving what we have; get_or_load retries shortly
+        last = stale["time"][-1]
+        if probe["time"][-1] == last:
+            return stale  # no new bar at the broker yet: same short retry
+        # An upper bound: session gaps mean fewer bars than elapsed spans.
+        missing = int(probe["time"][-1] - last) // TF_SECONDS[tf]
+        if missing < 0 or missing + 1 >= count:
+            return load()
+        new = mt5.copy_rates_from_pos(symbol, TIMEFRAME[tf], 1, missing + 1)
+        if new is None or len(new) == 0:
+            return stale
+        # The fetch must overlap our newest bar exactly, or the splice would skip or shift bars.
+        if new["time"][0] > last or last not in new["time"]:
+            return load()
+        return np.concatenate([stale[stale["time"] < new["time"][0]], new])[-count:]
+    return cache.get_or_load(("rates", symbol, tf, count), candle_ttl(tf), load, top_up=top_up)
+
+def _to_candles(rates: np.ndarray) -> List[Candle]:
+    cols = [rates[k].astype(float).tolist() for k in ("time", "open", "high", "low", "close")]
+    vols = rates["tick_volume"].astype(float).tolist() if "tick_volume" in rates.dtype.names else [None] * len(rates)
+    return [
+        Candle(t=int(t * 1000), o=o, h=h, l=l, c=c, v=v)
+        for t, o, h, l, c, v in zip(*cols, vols)
+    ]
+
 def fetch_candles(symbol: str, tf: str, count: int = 300) -> List[Candle]:
     """Fetch OHLC for one symbol + timeframe."""
     if tf not in TIMEFRAME:
         return []
-    tf_enum = TIMEFRAME[tf]
-    rates = mt5.copy_rates_from_pos(symbol, tf_enum, 1, count)
+    rates = fetch_rates(symbol, tf, count)
     if rates is None:
         return []
-    df = pd.DataFrame(rates)
-    return [
-    Candle(t=int(row["time"]*1000), o=row["open"], h=row["high"],
-           l=row["low"], c=row["close"],
-           v=row.get("tick_volume") if "tick_volume" in row else None)
-    for _, row in df.iterrows()
-]
+    return _to_candles(rates)
 
 def fetch_all_tfs_for_symbol(symbol: str, tfs: List[str], count: int = 300) -> Dict[str, List[Candle]]:
     """Return a dict: { TF: [Candle, ...], ... } for one symbol."""
@@ -66,3 +142,68 @@ def fetch_all_tfs_for_symbol(symbol: str, tfs: List[str], count: int = 300) -> D
         if tf in TIMEFRAME:
             out[tf] = fetch_candles(symbol, tf, count)
     return out
+
+def last_closed_bar_time(symbol: str, tf: str) -> Optional[int]:
+    """Open time (unix ms) of the last closed bar, without pulling the full history."""
+    if tf not in TIMEFRAME:
+        return None
+    rates = fetch_rates(symbol, tf, 1)
+    if rates is None or len(rates) == 0:
+        return None
+    return int(rates[0]["time"] * 1000)
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Incremental sync
+#
+# A cursor is "<t>.<crc>": the open time (unix ms) of the newest bar the client
+# holds and a checksum of its last SYNC_CHECK_BARS bars. Nothing is kept per
+# client, so any worker can answer. The bars newer than `t` are found with a
+# binary search over the cached block's times. When the checksum no longer
+# matches, the broker revised those bars and they are sent again with a
+# `replace_from` marker: the client drops its bars with t >= replace_from,
+# then appends `candles`. replace_from = 0 means drop everything, e.g. when the
+# client is further behind than `count` bars.
+SYNC_CHECK_BARS = 3
+
+def _tail_crc(rates: np.ndarray, end: int) -> int:
+    tail = rates[max(0, end - SYNC_CHECK_BARS):end]
+    return zlib.crc32(np.stack([tail[k].astype(float) for k in ("time", "open", "high", "low", "close")]).tobytes())
+
+def make_cursor(rates: np.ndarray) -> Optional[str]:
+    if rates is None or len(rates) == 0:
+        return None
+    return f"{int(rates['time'][-1]) * 1000}.{_tail_crc(rates, len(rates)):08x}"
+
+def parse_cursor(cursor: str) -> Tuple[int, int]:
+    t, _, crc = cursor.partition(".")
+    try:
+        return int(t), int(crc, 16)
+    except ValueError:
+        raise ValueError(f"Invalid cursor '{cursor}'.")
+
+def sync_candles(symbol: str, tf: str, count: int = 300,
+                 since: Optional[int] = None, cursor: Optional[str] = None) -> Dict:
+    """
+    Bars newer than the client's `cursor` (or `since`, unix ms):
+    {"candles": [...], "cursor": "<t>.<crc>", "replace_from": None | unix ms}.
+    With neither, the whole block with replace_from = 0.
+    """
+    crc = None
+    if cursor:
+        since, crc = parse_cursor(cursor)
+    rates = fetch_rates(symbol, tf, count) if tf in TIMEFRAME else None
+    if rates is None or len(rates) == 0:
+        return {"candles": [], "cursor": cursor, "replace_from": None}
+
+    times = rates["time"]
+    start, replace_from = 0, 0
+    if since is not None:
+        i = int(np.searchsorted(times, since // 1000, side="right"))
+        if i == 0 or (crc is not None and int(times[i - 1]) * 1000 != since):
+            pass  # older than the block, or a bar we never had: full resend
+        elif crc is not None and _tail_crc(rates, i) != crc:
+            start = max(0, i - SYNC_CHECK_BARS)
+            replace_from = int(times[start]) * 1000
+        else:
+            start, replace_from = i, None
+    return {"candles": _to_candles(rates[start:]), "cursor": make_cursor(rates), "replace_from": replace_from}
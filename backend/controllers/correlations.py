@@ -0,0 +1,207 @@
+"""
+Rolling return correlations between symbols, per timeframe.
+
+RollingCorrelation keeps the last `window` log-return rows in a ring buffer,
+plus running sums of the returns and their cross-products. Adding a bar adds
+the new row's terms and removes the oldest row's: O(N²) per bar instead of
+O(N²·W) for a full recompute. Adding and removing accumulates rounding error,
+so the sums are rebuilt from the buffer every `reanchor_every` bars. That
+rebuild costs O(N²·W) and runs once per W bars, so it stays O(N²) per bar
+amortised.
+
+correlations() builds one of these per (TF, window) from the cached candle
+blocks that fetch_candles is served from. After that, each closed bar costs
+one aligned row: the new bar times of every block are intersected and turned
+into returns against the last aligned closes kept with the book, instead of
+re-aligning 300 bars of every pair. Between bar closes the last response is
+served as is.
+"""
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from controllers.candles import candle_ttl, fetch_rates
+
+# Candle blocks are fetched with the screener's count, so they come from the same cache entries.
+RATES_COUNT = 300
+MAX_WINDOW = RATES_COUNT - 1
+
+
+class RollingCorrelation:
+    """Pearson correlation of N series over their last `window` rows, updated per row in O(N²)."""
+
+    def __init__(self, names: Sequence[str], window: int, reanchor_every: Optional[int] = None):
+        self.names = list(names)
+        self.window = window
+        self.reanchor_every = reanchor_every or window
+        n = len(self.names)
+        self._buf = np.zeros((window, n))
+        self._head = 0     # next slot to write
+        self._rows = 0     # rows held (≤ window)
+        self._sum = np.zeros(n)
+        self._cross = np.zeros((n, n))
+        self._since_anchor = 0
+        self.t: Optional[int] = None  # time of the last row pushed
+
+    def __len__(self) -> int:
+        return self._rows
+
+    def push(self, row: np.ndarray, t: Optional[int] = None) -> None:
+        row = np.asarray(row, dtype=float)
+        if self._rows == self.window:
+            old = self._buf[self._head]
+            self._sum -= old
+            self._cross -= np.outer(old, old)
+        else:
+            self._rows += 1
+        self._buf[self._head] = row
+        self._sum += row
+        self._cross += np.outer(row, row)
+        self._head = (self._head + 1) % self.window
+        self.t = None if t is None else int(t)
+        self._since_anchor += 1
+        if self._since_anchor >= self.reanchor_every:
+            self.reanchor()
+
+    def extend(self, rows: np.ndarray, times: Sequence[int]) -> None:
+        for row, t in zip(rows, times):
+            self.push(row, t)
+
+    def reanchor(self) -> None:
+        """Rebuild the running sums from the buffered rows, dropping accumulated rounding error."""
+        rows = self.rows()
+        self._sum = rows.sum(axis=0)
+        self._cross = rows.T @ rows
+        self._since_anchor = 0
+
+    def rows(self) -> np.ndarray:
+        """Buffered rows, oldest first."""
+        if self._rows < self.window:
+            return self._buf[:self._rows]
+        return np.roll(self._buf, -self._head, axis=0)
+
+    def matrix(self) -> np.ndarray:
+        """N×N correlation matrix; NaN for series with no variance in the window."""
+        n = self._rows
+        if n < 2:
+            return np.full((len(self.names),) * 2, np.nan)
+        mean = self._sum / n
+        cov = self._cross / n
+        cov -= np.outer(mean, mean)
+        var = cov.diagonal()
+        flat = var <= 0
+        inv_sd = 1.0 / np.sqrt(np.where(flat, 1.0, var))
+        corr = cov * inv_sd[:, None] * inv_sd[None, :]
+        np.clip(corr, -1.0, 1.0, out=corr)
+        np.fill_diagonal(corr, 1.0)
+        if flat.any():
+            corr[flat, :] = np.nan
+            corr[:, flat] = np.nan
+        return corr
+
+
+def full_correlation(rows: np.ndarray) -> np.ndarray:
+    """The same matrix recomputed from scratch (reference for RollingCorrelation)."""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.corrcoef(rows, rowvar=False)
+
+
+def _blocks(symbols: Sequence[str], tf: str, count: int) -> Tuple[List[str], List[np.ndarray]]:
+    names, blocks = [], []
+    for symbol in symbols:
+        rates = fetch_rates(symbol, tf, count)
+        if rates is not None and len(rates) > 1:
+            names.append(symbol)
+            blocks.append(rates)
+    return names, blocks
+
+
+def _aligned(blocks: Sequence[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    """(bar times every block has, closes [bars × blocks] at those times)."""
+    times = blocks[0]["time"]
+    for rates in blocks[1:]:
+        times = np.intersect1d(times, rates["time"], assume_unique=True)
+    closes = np.column_stack([r["close"][np.searchsorted(r["time"], times)] for r in blocks]).astype(float)
+    return times, closes
+
+
+def _log_returns(closes: np.ndarray) -> np.ndarray:
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.diff(np.log(closes), axis=0)
+
+
+def aligned_returns(symbols: Sequence[str], tf: str, count: int = RATES_COUNT
+                    ) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """(symbols with data, bar times in ms, log returns [bars × symbols]) over the bars all of them have."""
+    names, blocks = _blocks(symbols, tf, count)
+    if not blocks:
+        return [], np.empty(0, dtype=np.int64), np.empty((0, 0))
+    times, closes = _aligned(blocks)
+    return names, times[1:].astype(np.int64) * 1000, _log_returns(closes)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Per-TF state
+
+class _Book:
+    """A RollingCorrelation plus what the next update needs: the last aligned bar and its closes."""
+
+    def __init__(self, names: List[str], window: int, blocks: Sequence[np.ndarray]):
+        times, closes = _aligned(blocks)
+        returns = _log_returns(closes)
+        self.corr = RollingCorrelation(names, window)
+        self.corr.extend(returns[-window:], times[1:][-window:].astype(np.int64) * 1000)
+        self.last_time = int(times[-1]) if len(times) else None   # unix s
+        self.last_close = closes[-1] if len(closes) else None
+        self.payload: Optional[Dict[str, Any]] = None
+        self.next_check = 0.0
+
+    def advance(self, blocks: Sequence[np.ndarray]) -> bool:
+        """Push the bars every block has closed since the last one; False if a gap needs a rebuild."""
+        tails = []
+        for rates in blocks:
+            i = int(np.searchsorted(rates["time"], self.last_time, side="left"))
+            if i == len(rates) or rates["time"][i] != self.last_time:
+                return False  # our last bar left the block (or never was in it)
+            tails.append(rates[i + 1:])
+        # Only times every block has reached: a pair whose newest bar lags is waited for, not skipped.
+        if any(len(t) == 0 for t in tails):
+            return True
+        upto = min(int(t["time"][-1]) for t in tails)
+        times, closes = _aligned([t[t["time"] <= upto] for t in tails])
+        if len(times):
+            returns = _log_returns(np.vstack([self.last_close, closes]))
+            self.corr.extend(returns, times.astype(np.int64) * 1000)
+            self.last_time, self.last_close = int(times[-1]), closes[-1]
+        return True
+
+
+_books: Dict[Tuple[str, int], _Book] = {}
+_lock = threading.Lock()
+
+
+def correlations(symbols: Sequence[str], tf: str, window: int = 100) -> Dict[str, Any]:
+    """Correlation matrix of `symbols`' returns over the last `window` closed bars of `tf`."""
+    with _lock:
+        book = _books.get((tf, window))
+        if book is not None and book.payload is not None and time.time() < book.next_check:
+            return book.payload
+        names, blocks = _blocks(symbols, tf, RATES_COUNT)
+        if book is None or book.corr.names != names or book.last_time is None or not book.advance(blocks):
+            # First call, a symbol came or went, or more than a block of bars passed: start over.
+            book = _books[(tf, window)] = _Book(names, window, blocks) if blocks else None
+            if book is None:
+                return {"tf": tf, "t": None, "window": 0, "symbols": [], "matrix": []}
+        corr = book.corr.matrix()
+        book.payload = {
+            "tf": tf,
+            "t": book.corr.t,
+            "window": len(book.corr),
+            "symbols": names,
+            "matrix": np.where(np.isnan(corr), None, corr.round(4)).tolist(),
+        }
+        # Nothing changes before the current bar closes.
+        book.next_check = time.time() + candle_ttl(tf)
+        return book.payload
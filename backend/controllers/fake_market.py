@@ -0,0 +1,136 @@
+"""
+Deterministic stand-in for the MetaTrader5 module (MARKET_DATA=fake).
+
+Implements the subset the backend uses with the same call signatures and
+array layouts. Prices are a pure function of (symbol, time), so every process
+and every run sees the same bars. FAKE_MT5_LATENCY_MS adds a delay per call and
+FAKE_MT5_ERROR_RATE makes that fraction of data calls fail (return None, like
+the real module does).
+`calls` / `errors` count calls and injected failures per function so tests can
+measure broker load.
+"""
+import os
+import random
+import time
+import zlib
+from collections import Counter
+from types import SimpleNamespace
+
+import numpy as np
+
+TIMEFRAME_M1 = 1
+TIMEFRAME_M5 = 5
+TIMEFRAME_M15 = 15
+TIMEFRAME_M30 = 30
+TIMEFRAME_H1 = 16385
+TIMEFRAME_H4 = 16388
+TIMEFRAME_D1 = 16408
+COPY_TICKS_ALL = -1
+
+_SECONDS = {
+    TIMEFRAME_M1: 60, TIMEFRAME_M5: 300, TIMEFRAME_M15: 900, TIMEFRAME_M30: 1800,
+    TIMEFRAME_H1: 3600, TIMEFRAME_H4: 14400, TIMEFRAME_D1: 86400,
+}
+_RATES = np.dtype([
+    ("time", "<i8"), ("open", "<f8"), ("high", "<f8"), ("low", "<f8"), ("close", "<f8"),
+    ("tick_volume", "<u8"), ("spread", "<i4"), ("real_volume", "<u8"),
+])
+_TICKS = np.dtype([
+    ("time", "<i8"), ("bid", "<f8"), ("ask", "<f8"), ("last", "<f8"), ("volume", "<u8"),
+    ("time_msc", "<i8"), ("flags", "<u4"), ("volume_real", "<f8"),
+])
+TICK_MS = 250  # one synthetic tick every 250 ms
+
+LATENCY = float(os.getenv("FAKE_MT5_LATENCY_MS", "0")) / 1000.0
+ERROR_RATE = float(os.getenv("FAKE_MT5_ERROR_RATE", "0"))
+calls: Counter = Counter()
+errors: Counter = Counter()
+
+
+def _wait(name: str) -> bool:
+    """Count and delay the call; False when this call should fail."""
+    calls[name] += 1
+    if LATENCY:
+        time.sleep(LATENCY)
+    if ERROR_RATE and random.random() < ERROR_RATE:
+        errors[name] += 1
+        return False
+    return True
+
+
+def _hash01(x: np.ndarray, seed: int) -> np.ndarray:
+    """splitmix64 → uniform [0, 1); vectorized and stable across processes."""
+    z = (x.astype(np.uint64) + np.uint64(seed)) * np.uint64(0x9E3779B97F4A7C15)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    z = z ^ (z >> np.uint64(31))
+    return (z >> np.uint64(11)).astype(np.float64) / float(1 << 53)
+
+
+def price(symbol: str, t_ms: np.ndarray) -> np.ndarray:
+    """Bid at t_ms: a few slow waves per symbol plus hashed noise."""
+    seed = zlib.crc32(symbol.encode())
+    base = 0.5 + (seed % 1500) / 1000.0
+    s = np.asarray(t_ms, dtype=np.float64) / 1000.0
+    phase = (seed % 628) / 100.0
+    wave = (0.010 * np.sin(s / 86_400.0 * 2 * np.pi + phase)
+            + 0.004 * np.sin(s / 14_400.0 * 2 * np.pi + 2 * phase)
+            + 0.001 * np.sin(s / 900.0 * 2 * np.pi + 3 * phase))
+    noise = (_hash01(np.asarray(t_ms, dtype=np.int64) // TICK_MS, seed) - 0.5) * 0.0004
+    return base * (1.0 + wave + noise)
+
+
+# ── MetaTrader5 API subset ───────────────────────────────────────────────────
+def initialize(*args, **kwargs) -> bool:
+    _wait("initialize")
+    return True
+
+
+def last_error():
+    return (1, "Success")
+
+
+def copy_rates_from_pos(symbol: str, timeframe: int, start_pos: int, count: int):
+    if not _wait("copy_rates_from_pos"):
+        return None
+    span = _SECONDS.get(timeframe)
+    if span is None or count <= 0:
+        return None
+    now = int(time.time())
+    newest = now - now % span - start_pos * span
+    opens = newest - span * np.arange(count - 1, -1, -1, dtype=np.int64)
+    # Sample each bar at a handful of points for a plausible high/low.
+    pts = opens[:, None] * 1000 + np.linspace(0, span * 1000 - TICK_MS, 8).astype(np.int64)[None, :]
+    pts = np.minimum(pts, now * 1000)  # the forming bar (start_pos=0) only has ticks up to now
+    p = price(symbol, pts)
+    out = np.zeros(count, dtype=_RATES)
+    out["time"] = opens
+    out["open"], out["close"] = p[:, 0], p[:, -1]
+    out["high"], out["low"] = p.max(axis=1), p.min(axis=1)
+    out["tick_volume"] = span * 1000 // TICK_MS
+    out["spread"] = 10
+    return out
+
+
+def copy_ticks_from(symbol: str, date_from, count: int, flags: int):
+    if not _wait("copy_ticks_from"):
+        return None
+    start = int(date_from.timestamp() if hasattr(date_from, "timestamp") else date_from) * 1000
+    now = int(time.time() * 1000)
+    first = start + (-start) % TICK_MS
+    n = max(0, min(count, (now - first) // TICK_MS + 1))
+    out = np.zeros(n, dtype=_TICKS)
+    out["time_msc"] = first + TICK_MS * np.arange(n, dtype=np.int64)
+    out["time"] = out["time_msc"] // 1000
+    out["bid"] = price(symbol, out["time_msc"])
+    out["ask"] = out["bid"] + 0.0001
+    return out
+
+
+def symbol_info_tick(symbol: str):
+    if not _wait("symbol_info_tick"):
+        return None
+    t = int(time.time() * 1000)
+    t -= t % TICK_MS
+    bid = float(price(symbol, np.array([t]))[0])
+    return SimpleNamespace(time=t // 1000, time_msc=t, bid=bid, ask=bid + 0.0001, last=0.0, volume=0)
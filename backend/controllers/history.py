@@ -0,0 +1,201 @@
+"""
+Rating snapshot history in MongoDB.
+
+One document per (symbol, TF, UTC day) holds the day's snapshots as parallel
+arrays: {symbol, tf, day, t: [...], score: [...], rating: [...], last, n}.
+Screener snapshots are queued in memory and a background thread appends them
+in bulk, one update per bucket per flush. Appends are idempotent: entries at or
+before the bucket's `last` bar time are skipped server-side, so several
+workers (or a restart) writing the same bars store them once.
+"""
+import logging
+import os
+import threading
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from controllers.screener import on_snapshots
+
+log = logging.getLogger(__name__)
+
+COLLECTION = "rating_history"
+DAY_MS = 86_400_000
+# Only with an explicitly configured database: dev and bench runs never write anywhere by default.
+CONFIGURED = bool(os.getenv("MONGO_URI"))
+ENABLED = CONFIGURED and os.getenv("RATING_HISTORY", "1").lower() not in ("0", "off", "false")
+
+Row = Tuple[str, str, int, float, str]  # symbol, tf, t (ms), score, rating
+
+
+def _collection():
+    # config.db connects on import, so only pay for it when used.
+    if not CONFIGURED:
+        raise RuntimeError("rating history needs MONGO_URI")
+    from config.db import db
+    coll = db[COLLECTION]
+    coll.create_index([("symbol", 1), ("tf", 1), ("day", 1)], unique=True)
+    return coll
+
+
+def day_of(t_ms: int) -> datetime:
+    return datetime.fromtimestamp((t_ms - t_ms % DAY_MS) / 1000, tz=timezone.utc)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Writes
+def _append(ts: List[int], scores: List[float], ratings: List[str]) -> List[Dict[str, Any]]:
+    """Update pipeline appending the entries newer than the bucket's `last` (ts sorted, unique)."""
+    last = {"$ifNull": ["$last", -1]}
+    skip = {"$size": {"$filter": {"input": {"$literal": ts}, "cond": {"$lte": ["$$this", last]}}}}
+
+    def tail(field: str, values: List[Any]) -> Dict[str, Any]:
+        return {"$concatArrays": [{"$ifNull": [f"${field}", []]},
+                                  {"$slice": [{"$literal": values}, "$_skip", len(values)]}]}
+
+    return [
+        {"$set": {"_skip": skip}},
+        {"$set": {"t": tail("t", ts), "score": tail("score", scores), "rating": tail("rating", ratings),
+                  "last": {"$max": [last, ts[-1]]}}},
+        {"$set": {"n": {"$size": "$t"}}},
+        {"$unset": "_skip"},
+    ]
+
+
+def bucket_updates(rows: Sequence[Row]) -> List[Any]:
+    """Group rows by (symbol, tf, day) into one upsert each."""
+    from pymongo import UpdateOne
+    buckets: Dict[Tuple[str, str, int], Dict[int, Tuple[float, str]]] = {}
+    for sym, tf, t, score, rating in rows:
+        buckets.setdefault((sym, tf, t - t % DAY_MS), {})[t] = (score, rating)  # newest wins per bar
+    ops = []
+    for (sym, tf, day), by_t in buckets.items():
+        ts = sorted(by_t)
+        ops.append(UpdateOne(
+            {"symbol": sym, "tf": tf, "day": day_of(day)},
+            _append(ts, [float(by_t[t][0]) for t in ts], [by_t[t][1] for t in ts]),
+            upsert=True,
+        ))
+    return ops
+
+
+class HistoryWriter:
+    """Buffers rows and writes them from a background thread every `flush_seconds` (or `max_batch` rows)."""
+
+    def __init__(self, collection: Callable[[], Any] = _collection, flush_seconds: float = 2.0,
+                 max_batch: int = 20_000, max_pending: int = 500_000):
+        self._get_collection = collection
+        self._coll = None
+        self._cond = threading.Condition()
+        self._pending: List[Row] = []
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self.flush_seconds = flush_seconds
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+        self.stats = {"queued": 0, "written": 0, "dropped": 0, "batches": 0, "errors": 0}
+
+    def collection(self):
+        if self._coll is None:
+            self._coll = self._get_collection()
+        return self._coll
+
+    def add(self, rows: Sequence[Row]) -> None:
+        with self._cond:
+            self._pending.extend(rows)
+            self.stats["queued"] += len(rows)
+            over = len(self._pending) - self.max_pending
+            if over > 0:  # Mongo is down or slow: keep the newest
+                del self._pending[:over]
+                self.stats["dropped"] += over
+            if self._thread is None and not self._closed:
+                self._thread = threading.Thread(target=self._run, daemon=True, name="rating-history")
+                self._thread.start()
+            if len(self._pending) >= self.max_batch:
+                self._cond.notify()
+
+    def add_snapshots(self, snaps: List[Dict[str, Any]]) -> None:
+        self.add([(s["symbol"], s["tf"], int(s["t"]), s["score"], s["rating"]) for s in snaps if s.get("t") is not None])
+
+    def _take(self) -> List[Row]:
+        batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                if len(self._pending) < self.max_batch and not self._closed:
+                    self._cond.wait(self.flush_seconds)
+                batch = self._take()
+                if not batch and self._closed:
+                    return
+            if batch:
+                self._write(batch)
+
+    def _write(self, batch: List[Row]) -> None:
+        try:
+            self.collection().bulk_write(bucket_updates(batch), ordered=False)
+        except Exception:
+            log.exception("rating history: dropped a batch of %d snapshots", len(batch))
+            self.stats["errors"] += 1
+            self.stats["dropped"] += len(batch)
+            return
+        self.stats["written"] += len(batch)
+        self.stats["batches"] += 1
+
+    def flush(self) -> None:
+        """Write everything queued so far on the calling thread."""
+        while True:
+            with self._cond:
+                batch = self._take()
+            if not batch:
+                return
+            self._write(batch)
+
+    def close(self, timeout: float = 10.0) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.flush()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Reads
+def history(symbol: str, tf: str, start: int, end: int, coll=None) -> Dict[str, Any]:
+    """Snapshots with start <= t <= end (unix ms) as columns: {t, score, rating}."""
+    coll = coll if coll is not None else writer.collection()
+    docs = coll.find(
+        {"symbol": symbol, "tf": tf, "day": {"$gte": day_of(start), "$lte": day_of(end)}},
+        {"_id": 0, "t": 1, "score": 1, "rating": 1},
+    ).sort("day", 1)
+    ts: List[int] = []
+    scores: List[float] = []
+    ratings: List[str] = []
+    for doc in docs:
+        ts.extend(doc["t"]); scores.extend(doc["score"]); ratings.extend(doc["rating"])
+    t = np.asarray(ts, dtype=np.int64)
+    lo, hi = np.searchsorted(t, start, "left"), np.searchsorted(t, end, "right")
+    return {"symbol": symbol, "tf": tf, "t": t[lo:hi].tolist(), "score": scores[lo:hi], "rating": ratings[lo:hi]}
+
+
+def rating_at(symbol: str, tf: str, at: int, coll=None) -> Optional[Dict[str, Any]]:
+    """The snapshot in force at `at` (unix ms): the newest bar with t <= at, or None."""
+    coll = coll if coll is not None else writer.collection()
+    # The bar may sit in an earlier bucket (first bar of the day, weekends, holidays).
+    docs = coll.find(
+        {"symbol": symbol, "tf": tf, "day": {"$lte": day_of(at)}},
+        {"_id": 0, "t": 1, "score": 1, "rating": 1},
+    ).sort("day", -1).limit(7)
+    for doc in docs:
+        i = int(np.searchsorted(np.asarray(doc["t"], dtype=np.int64), at, "right")) - 1
+        if i >= 0:
+            return {"symbol": symbol, "tf": tf, "t": doc["t"][i], "score": doc["score"][i], "rating": doc["rating"][i]}
+    return None
+
+
+writer = HistoryWriter()
+if ENABLED:
+    on_snapshots(writer.add_snapshots)
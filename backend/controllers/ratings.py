@@ -1,5 +1,6 @@
 # ─── Add near the top with imports ───────────────────────────────────────────
 from typing import List, Dict, Optional, Tuple, Any
+import math
 import numpy as np
 from ta.trend import SMAIndicator, EMAIndicator, IchimokuIndicator, ADXIndicator, MACD
 from ta.momentum import RSIIndicator, StochasticOscillator, StochRSIIndicator, AwesomeOscillatorIndicator, WilliamsRIndicator, ROCIndicator
@@ -377,8 +378,6 @@ def tv_rating_text(score: float) -> str:
 #     return {"MAs": votes_ma, "Oscillators": votes_osc}
 
 def tv_indicator_votes(df: pd.DataFrame, trace: bool = False) -> Tuple[Dict[str, Dict[str, int]], Dict[str, Dict[str, Any]]]:
-    votes_ma: Dict[str, int] = {}
-    votes_osc: Dict[str, int] = {}
     raw_ma: Dict[str, Any] = {"close": float(df["c"].iloc[-1])}
     raw_osc: Dict[str, Any] = {}
 
@@ -391,101 +390,68 @@ def tv_indicator_votes(df: pd.DataFrame, trace: bool = False) -> Tuple[Dict[str,
         sv = float(sma_n.iloc[-1]) if not np.isnan(sma_n.iloc[-1]) else None
         ev = float(ema_n.iloc[-1]) if not np.isnan(ema_n.iloc[-1]) else None
         raw_ma[f"SMA{n}"] = sv; raw_ma[f"EMA{n}"] = ev
-        if sv is not None:
-            votes_ma[f"SMA{n}"] = 1 if close.iloc[-1] > sv else -1 if close.iloc[-1] < sv else 0
-        if ev is not None:
-            votes_ma[f"EMA{n}"] = 1 if close.iloc[-1] > ev else -1 if close.iloc[-1] < ev else 0
 
     # Ichimoku baseline (Kijun)
     tenkan, kijun, span_a_vis, span_b_vis = ichimoku_core(high, low)
-    kv = float(kijun.iloc[-1]) if not np.isnan(kijun.iloc[-1]) else None
-    raw_ma["IchimokuBase"] = kv
-    if kv is not None:
-        eps = max(1e-8, 1e-6 * float(close.iloc[-1]))
-        votes_ma["IchimokuBase"] = 1 if close.iloc[-1] > kv + eps else -1 if close.iloc[-1] < kv - eps else 0
+    raw_ma["IchimokuBase"] = float(kijun.iloc[-1]) if not np.isnan(kijun.iloc[-1]) else None
 
     # VWMA(20)
     if "v" in df.columns and df["v"].notna().any():
         vw = vwma(close, df["v"].fillna(0), 20)
-        vv = float(vw.iloc[-1]) if not np.isnan(vw.iloc[-1]) else None
-        raw_ma["VWMA20"] = vv
-        if vv is not None:
-            votes_ma["VWMA20"] = 1 if close.iloc[-1] > vv else -1 if close.iloc[-1] < vv else 0
+        raw_ma["VWMA20"] = float(vw.iloc[-1]) if not np.isnan(vw.iloc[-1]) else None
 
     # HMA(9)
     h = hma(close, 9)
-    hv = float(h.iloc[-1]) if not np.isnan(h.iloc[-1]) else None
-    raw_ma["HMA9"] = hv
-    if hv is not None:
-        votes_ma["HMA9"] = 1 if close.iloc[-1] > hv else -1 if close.iloc[-1] < hv else 0
+    raw_ma["HMA9"] = float(h.iloc[-1]) if not np.isnan(h.iloc[-1]) else None
 
     # ── Oscillators (same rules you have, but we log last/prev)
     rsi = RSIIndicator(close=close, window=14).rsi()
     if len(rsi.dropna()) >= 2:
-        r_last, r_prev = float(rsi.iloc[-1]), float(rsi.iloc[-2])
-        raw_osc["RSI"] = {"last": r_last, "prev": r_prev}
-        votes_osc["RSI"] = 1 if (r_last < 30 and r_last > r_prev) else -1 if (r_last > 70 and r_last < r_prev) else 0
+        raw_osc["RSI"] = {"last": float(rsi.iloc[-1]), "prev": float(rsi.iloc[-2])}
 
     stoch = StochasticOscillator(high=high, low=low, close=close, window=14, smooth_window=3)
     k, d = stoch.stoch(), stoch.stoch_signal()
     if len(k.dropna()) >= 1 and len(d.dropna()) >= 1:
-        k1, d1 = float(k.iloc[-1]), float(d.iloc[-1])
-        raw_osc["Stoch"] = {"k": k1, "d": d1}
-        votes_osc["Stoch"] = 1 if (k1 < 20 and d1 < 20 and k1 > d1) else -1 if (k1 > 80 and d1 > 80 and k1 < d1) else 0
+        raw_osc["Stoch"] = {"k": float(k.iloc[-1]), "d": float(d.iloc[-1])}
 
     tp = (high + low + close) / 3.0
     cci = (tp - tp.rolling(20).mean()) / (0.015 * tp.rolling(20).apply(lambda x: np.mean(np.abs(x - np.mean(x))), raw=True))
     if len(cci.dropna()) >= 2:
-        c_last, c_prev = float(cci.iloc[-1]), float(cci.iloc[-2])
-        raw_osc["CCI"] = {"last": c_last, "prev": c_prev}
-        votes_osc["CCI"] = 1 if (c_last < -100 and c_last > c_prev) else -1 if (c_last > 100 and c_last < c_prev) else 0
+        raw_osc["CCI"] = {"last": float(cci.iloc[-1]), "prev": float(cci.iloc[-2])}
 
     adx_obj = ADXIndicator(high=high, low=low, close=close, window=14)
     adx, di_pos, di_neg = adx_obj.adx(), adx_obj.adx_pos(), adx_obj.adx_neg()
     if len(adx.dropna()) >= 2:
-        a_last, a_prev = float(adx.iloc[-1]), float(adx.iloc[-2])
-        dip, din = float(di_pos.iloc[-1]), float(di_neg.iloc[-1])
-        raw_osc["ADX"] = {"adx": a_last, "prev": a_prev, "+di": dip, "-di": din}
-        strong = (a_last > 20) and (a_last > a_prev)
-        votes_osc["ADX"] = 1 if (strong and dip > din) else -1 if (strong and din > dip) else 0
+        raw_osc["ADX"] = {"adx": float(adx.iloc[-1]), "prev": float(adx.iloc[-2]),
+                          "+di": float(di_pos.iloc[-1]), "-di": float(di_neg.iloc[-1])}
 
     try:
         ao = AwesomeOscillatorIndicator(high=high, low=low, window1=5, window2=34).awesome_oscillator()
         if len(ao.dropna()) >= 2:
-            ao_last, ao_prev = float(ao.iloc[-1]), float(ao.iloc[-2])
-            raw_osc["AO"] = {"last": ao_last, "prev": ao_prev}
-            votes_osc["AO"] = 1 if (ao_last > 0 and ao_prev <= 0) else -1 if (ao_last < 0 and ao_prev >= 0) else (1 if (ao_last>ao_prev and ao_last>0) else (-1 if (ao_last<ao_prev and ao_last<0) else 0))
+            raw_osc["AO"] = {"last": float(ao.iloc[-1]), "prev": float(ao.iloc[-2])}
     except Exception:
         pass
 
     mom = ROCIndicator(close=close, window=10).roc() * 100.0
     if len(mom.dropna()) >= 2:
-        m_last, m_prev = float(mom.iloc[-1]), float(mom.iloc[-2])
-        raw_osc["Momentum"] = {"last": m_last, "prev": m_prev}
-        votes_osc["Momentum"] = 1 if (m_last > 0 and m_last > m_prev) else -1 if (m_last < 0 and m_last < m_prev) else 0
+        raw_osc["Momentum"] = {"last": float(mom.iloc[-1]), "prev": float(mom.iloc[-2])}
 
     macd_obj = MACD(close=close, window_fast=12, window_slow=26, window_sign=9)
     ml, ms = macd_obj.macd(), macd_obj.macd_signal()
     if not np.isnan(ml.iloc[-1]) and not np.isnan(ms.iloc[-1]):
-        ml1, ms1 = float(ml.iloc[-1]), float(ms.iloc[-1])
-        raw_osc["MACD"] = {"line": ml1, "signal": ms1}
-        votes_osc["MACD"] = 1 if ml1 > ms1 else -1
+        raw_osc["MACD"] = {"line": float(ml.iloc[-1]), "signal": float(ms.iloc[-1])}
 
     try:
         st_rsi = StochRSIIndicator(close=close, window=14, smooth1=3, smooth2=3)
         k2, d2 = st_rsi.stochrsi_k()*100.0, st_rsi.stochrsi_d()*100.0
         if len(k2.dropna()) >= 1 and len(d2.dropna()) >= 1:
-            kk, dd = float(k2.iloc[-1]), float(d2.iloc[-1])
-            raw_osc["StochRSI"] = {"k": kk, "d": dd}
-            votes_osc["StochRSI"] = 1 if (kk < 20 and dd < 20 and kk > dd) else -1 if (kk > 80 and dd > 80 and kk < dd) else 0
+            raw_osc["StochRSI"] = {"k": float(k2.iloc[-1]), "d": float(d2.iloc[-1])}
     except Exception:
         pass
 
     willr = WilliamsRIndicator(high=high, low=low, close=close, lbp=14).williams_r()
     if len(willr.dropna()) >= 2:
-        w_last, w_prev = float(willr.iloc[-1]), float(willr.iloc[-2])
-        raw_osc["WilliamsR"] = {"last": w_last, "prev": w_prev}
-        votes_osc["WilliamsR"] = 1 if (w_last < -80 and w_last > w_prev) else -1 if (w_last > -20 and w_last < w_prev) else 0
+        raw_osc["WilliamsR"] = {"last": float(willr.iloc[-1]), "prev": float(willr.iloc[-2])}
 
     ema13 = EMAIndicator(close=close, window=13).ema_indicator()
     if len(ema13.dropna()) >= 2:
@@ -493,20 +459,92 @@ def tv_indicator_votes(df: pd.DataFrame, trace: bool = False) -> Tuple[Dict[str,
         bull = float(df["h"].iloc[-1] - e_last)
         bear = float(df["l"].iloc[-1] - e_last)
         raw_osc["BullsBears"] = {"ema13": e_last, "ema_prev": e_prev, "bull": bull, "bear": bear}
-        uptrend = (close.iloc[-1] > e_last) and (e_last > e_prev)
-        downtrend = (close.iloc[-1] < e_last) and (e_last < e_prev)
-        votes_osc["BullsBears"] = 1 if (uptrend and bear < 0 and bear > (df["l"].iloc[-2] - e_prev)) else (-1 if (downtrend and bull > 0 and bull < (df["h"].iloc[-2] - e_prev)) else 0)
 
     uo = ultimate_oscillator(high, low, close)
     if not np.isnan(uo.iloc[-1]):
-        u_last = float(uo.iloc[-1])
-        raw_osc["Ultimate"] = {"last": u_last}
-        votes_osc["Ultimate"] = 1 if u_last > 70 else -1 if u_last < 30 else 0
+        raw_osc["Ultimate"] = {"last": float(uo.iloc[-1])}
 
-    votes = {"MAs": votes_ma, "Oscillators": votes_osc}
     raw   = {"MAs": raw_ma,  "Oscillators": raw_osc}
+    prev_h = float(df["h"].iloc[-2]) if len(df) >= 2 else np.nan
+    prev_l = float(df["l"].iloc[-2]) if len(df) >= 2 else np.nan
+    votes = tv_votes_from_raw(raw, prev_h, prev_l)
     return votes, raw
 
+# ─── Vote rules, applied to the values gathered above ────────────────────────
+# Kept separate so the live (forming-bar) path votes with exactly the same rules.
+
+# %K and %D within this of each other count as level (no cross). A saturated
+# StochRSI has k == d, and the two paths average in different orders, so the
+# last bits of k and d would otherwise decide the vote.
+# This applies to closed bars too (tv_rating_for_df, the sweep, stored history),
+# so both paths keep one rule: a closed bar whose k and d differ only in the last
+# bits now votes 0 where it used to vote +/-1 on that noise.
+CROSS_TOL = 1e-9
+
+def tv_votes_from_raw(raw: Dict[str, Dict[str, Any]], prev_high: float, prev_low: float) -> Dict[str, Dict[str, int]]:
+    votes_ma: Dict[str, int] = {}
+    votes_osc: Dict[str, int] = {}
+    ma, osc = raw["MAs"], raw["Oscillators"]
+    c = ma["close"]
+
+    for name, v in ma.items():
+        if name == "close" or v is None:
+            continue
+        if name == "IchimokuBase":
+            eps = max(1e-8, 1e-6 * c)
+            votes_ma[name] = 1 if c > v + eps else -1 if c < v - eps else 0
+        else:
+            votes_ma[name] = 1 if c > v else -1 if c < v else 0
+
+    if "RSI" in osc:
+        r_last, r_prev = osc["RSI"]["last"], osc["RSI"]["prev"]
+        votes_osc["RSI"] = 1 if (r_last < 30 and r_last > r_prev) else -1 if (r_last > 70 and r_last < r_prev) else 0
+
+    if "Stoch" in osc:
+        k1, d1 = osc["Stoch"]["k"], osc["Stoch"]["d"]
+        votes_osc["Stoch"] = 1 if (k1 < 20 and d1 < 20 and k1 > d1 + CROSS_TOL) else -1 if (k1 > 80 and d1 > 80 and k1 < d1 - CROSS_TOL) else 0
+
+    if "CCI" in osc:
+        c_last, c_prev = osc["CCI"]["last"], osc["CCI"]["prev"]
+        votes_osc["CCI"] = 1 if (c_last < -100 and c_last > c_prev) else -1 if (c_last > 100 and c_last < c_prev) else 0
+
+    if "ADX" in osc:
+        a = osc["ADX"]
+        strong = (a["adx"] > 20) and (a["adx"] > a["prev"])
+        votes_osc["ADX"] = 1 if (strong and a["+di"] > a["-di"]) else -1 if (strong and a["-di"] > a["+di"]) else 0
+
+    if "AO" in osc:
+        ao_last, ao_prev = osc["AO"]["last"], osc["AO"]["prev"]
+        votes_osc["AO"] = 1 if (ao_last > 0 and ao_prev <= 0) else -1 if (ao_last < 0 and ao_prev >= 0) else (1 if (ao_last>ao_prev and ao_last>0) else (-1 if (ao_last<ao_prev and ao_last<0) else 0))
+
+    if "Momentum" in osc:
+        m_last, m_prev = osc["Momentum"]["last"], osc["Momentum"]["prev"]
+        votes_osc["Momentum"] = 1 if (m_last > 0 and m_last > m_prev) else -1 if (m_last < 0 and m_last < m_prev) else 0
+
+    if "MACD" in osc:
+        votes_osc["MACD"] = 1 if osc["MACD"]["line"] > osc["MACD"]["signal"] else -1
+
+    if "StochRSI" in osc:
+        kk, dd = osc["StochRSI"]["k"], osc["StochRSI"]["d"]
+        votes_osc["StochRSI"] = 1 if (kk < 20 and dd < 20 and kk > dd + CROSS_TOL) else -1 if (kk > 80 and dd > 80 and kk < dd - CROSS_TOL) else 0
+
+    if "WilliamsR" in osc:
+        w_last, w_prev = osc["WilliamsR"]["last"], osc["WilliamsR"]["prev"]
+        votes_osc["WilliamsR"] = 1 if (w_last < -80 and w_last > w_prev) else -1 if (w_last > -20 and w_last < w_prev) else 0
+
+    if "BullsBears" in osc:
+        bb = osc["BullsBears"]
+        e_last, e_prev, bull, bear = bb["ema13"], bb["ema_prev"], bb["bull"], bb["bear"]
+        uptrend = (c > e_last) and (e_last > e_prev)
+        downtrend = (c < e_last) and (e_last < e_prev)
+        votes_osc["BullsBears"] = 1 if (uptrend and bear < 0 and bear > (prev_low - e_prev)) else (-1 if (downtrend and bull > 0 and bull < (prev_high - e_prev)) else 0)
+
+    if "Ultimate" in osc:
+        u_last = osc["Ultimate"]["last"]
+        votes_osc["Ultimate"] = 1 if u_last > 70 else -1 if u_last < 30 else 0
+
+    return {"MAs": votes_ma, "Oscillators": votes_osc}
+
 # ─── Core TV rating calculator for one symbol+TF ─────────────────────────────
 # def tv_rating_for_df(df: pd.DataFrame, group: str = "All") -> Dict[str, float | str | Dict]:
 #     votes = tv_indicator_votes(df)
@@ -529,6 +567,10 @@ def tv_indicator_votes(df: pd.DataFrame, trace: bool = False) -> Tuple[Dict[str,
 # use_closed=True drops the forming bar; trace=True returns raw numbers
 def tv_rating_for_df(df: pd.DataFrame, group: str = "All", *, trace: bool = False) -> Dict[str, Any]:
     votes, raw = tv_indicator_votes(df, trace=trace)  # << return (votes, raw)
+    return tv_rating_from_votes(votes, raw, group, trace=trace)
+
+def tv_rating_from_votes(votes: Dict[str, Dict[str, int]], raw: Dict[str, Dict[str, Any]],
+                         group: str = "All", *, trace: bool = False) -> Dict[str, Any]:
     ma_score  = _avg(list(votes["MAs"].values()))
     osc_score = _avg(list(votes["Oscillators"].values()))
     overall   = ma_score if group=="MAs" else osc_score if group=="Oscillators" else (ma_score+osc_score)/2
@@ -547,3 +589,163 @@ def tv_rating_for_df(df: pd.DataFrame, group: str = "All", *, trace: bool = Fals
 
 # --------------------------------------------------------------------------------------------
 
+# ─── Live rating: frozen closed-bar state + the forming bar ──────────────────
+# tv_frozen_state() runs once per bar close and keeps, for every indicator, the
+# recursion state or the short tail of closed values it needs. tv_live_rating()
+# then rates "closed bars + forming bar" with a few small numpy ops, giving the
+# same values as tv_rating_for_df on the extended frame.
+LIVE_MIN_BARS = 210
+_EMA_SPANS = (10, 12, 13, 20, 26, 30, 50, 100, 200)
+
+def _wilder_sum(x: np.ndarray, n: int = 14) -> float:
+    """
+    Wilder running sum through the last bar, as ta's ADX smooths TR, +DM and
+    -DM: seeded with the sum of the first n values, then s - s/n + x.
+    """
+    s = float(pd.Series(x).dropna().iloc[:n].sum())
+    for value in x[n + 1:]:
+        s = s - s / float(n) + value
+    return s
+
+def tv_frozen_state(df: pd.DataFrame) -> Optional[Dict[str, Any]]:
+    """Indicator state after the last closed bar; None if there is not enough history."""
+    if len(df) < LIVE_MIN_BARS:
+        return None
+    close, high, low = df["c"].astype(float), df["h"].astype(float), df["l"].astype(float)
+    c, h, l = close.to_numpy(), high.to_numpy(), low.to_numpy()
+
+    st: Dict[str, Any] = {"c": c[-199:].copy(), "h": h[-33:].copy(), "l": l[-33:].copy()}
+    st["ema"] = {n: float(close.ewm(span=n, adjust=False).mean().iloc[-1]) for n in _EMA_SPANS}
+    st["ema13_prev"] = float(EMAIndicator(close=close, window=13).ema_indicator().iloc[-1])
+
+    st["has_volume"] = "v" in df.columns and df["v"].notna().any()
+    if st["has_volume"]:
+        v = df["v"].fillna(0).astype(float).to_numpy()
+        st["cv"], st["v"] = c[-19:] * v[-19:], v[-19:]
+
+    inner = 2 * wma(close.iloc[-20:], 4) - wma(close.iloc[-20:], 9)
+    st["hma_inner"] = inner.to_numpy()[-2:]
+
+    diff = close.diff()
+    st["rsi_up"] = float(diff.where(diff > 0, 0.0).ewm(alpha=1/14, adjust=False).mean().iloc[-1])
+    st["rsi_dn"] = float((-diff.where(diff < 0, 0.0)).ewm(alpha=1/14, adjust=False).mean().iloc[-1])
+    st["rsi"] = RSIIndicator(close=close, window=14).rsi().to_numpy()[-13:]
+    st_rsi = StochRSIIndicator(close=close, window=14, smooth1=3, smooth2=3)
+    st["srsi"] = st_rsi.stochrsi().to_numpy()[-2:]
+    st["srsi_k"] = st_rsi.stochrsi_k().to_numpy()[-2:]
+
+    st["stoch_k"] = StochasticOscillator(high=high, low=low, close=close, window=14, smooth_window=3).stoch().to_numpy()[-2:]
+
+    tp = (high + low + close) / 3.0
+    st["tp"] = tp.to_numpy()[-19:]
+    tail = tp.iloc[-40:]
+    cci = (tail - tail.rolling(20).mean()) / (0.015 * tail.rolling(20).apply(lambda x: np.mean(np.abs(x - np.mean(x))), raw=True))
+    st["cci_prev"] = float(cci.iloc[-1])
+
+    st["adx_prev"] = float(ADXIndicator(high=high, low=low, close=close, window=14).adx().iloc[-1])
+    pc = np.append(np.nan, c[:-1])
+    up_move = np.append(np.nan, h[1:] - h[:-1])
+    down_move = np.append(np.nan, l[:-1] - l[1:])
+    st["trs"] = _wilder_sum(np.maximum(h, pc) - np.minimum(l, pc))
+    st["dip"] = _wilder_sum(np.abs(((up_move > down_move) & (up_move > 0)) * up_move))
+    st["din"] = _wilder_sum(np.abs(((down_move > up_move) & (down_move > 0)) * down_move))
+
+    med = 0.5 * (h + l)
+    st["med"] = med[-33:]
+    st["ao_prev"] = float(AwesomeOscillatorIndicator(high=high, low=low, window1=5, window2=34).awesome_oscillator().iloc[-1])
+    st["mom_prev"] = float(ROCIndicator(close=close, window=10).roc().iloc[-1] * 100.0)
+    st["macd_signal"] = float(MACD(close=close, window_fast=12, window_slow=26, window_sign=9).macd_signal().iloc[-1])
+    st["willr_prev"] = float(WilliamsRIndicator(high=high, low=low, close=close, lbp=14).williams_r().iloc[-1])
+
+    prev_close = close.shift(1)
+    bp = close - pd.concat([low, prev_close], axis=1).min(axis=1)
+    tr = pd.concat([high, prev_close], axis=1).max(axis=1) - pd.concat([low, prev_close], axis=1).min(axis=1)
+    st["bp"], st["tr"] = bp.to_numpy()[-27:], tr.to_numpy()[-27:]
+    return st
+
+def _mean(x: np.ndarray) -> float:
+    # pandas' rolling mean returns the value itself for a constant window; keep
+    # that so flat markets tie (vote 0) exactly like the full pipeline.
+    if x.min() == x.max():
+        return float(x[0])
+    return math.fsum(x) / len(x)
+
+def _wdot(x: np.ndarray) -> float:
+    w = np.arange(1, len(x) + 1)
+    return float(np.dot(x, w) / w.sum())
+
+def tv_live_raw(st: Dict[str, Any], o: float, h: float, l: float, c: float, v: float = 0.0) -> Dict[str, Dict[str, Any]]:
+    """Indicator values at the forming bar, shaped like the `raw` of tv_indicator_votes."""
+    cs, hs, ls = st["c"], st["h"], st["l"]
+    ema = {n: e + (c - e) * 2.0 / (n + 1) for n, e in st["ema"].items()}
+
+    raw_ma: Dict[str, Any] = {"close": float(c)}
+    for n in [10, 20, 30, 50, 100, 200]:
+        raw_ma[f"SMA{n}"] = _mean(np.append(cs[len(cs) - (n - 1):], c))
+        raw_ma[f"EMA{n}"] = float(ema[n])
+    raw_ma["IchimokuBase"] = (max(hs[-25:].max(), h) + min(ls[-25:].min(), l)) / 2.0
+    if st["has_volume"]:
+        den = math.fsum(np.append(st["v"], v))
+        raw_ma["VWMA20"] = math.fsum(np.append(st["cv"], c * v)) / den if den else None
+    inner = 2 * _wdot(np.append(cs[-3:], c)) - _wdot(np.append(cs[-8:], c))
+    raw_ma["HMA9"] = _wdot(np.append(st["hma_inner"], inner))
+
+    raw_osc: Dict[str, Any] = {}
+    with np.errstate(invalid="ignore", divide="ignore"):
+        d = c - cs[-1]
+        up = st["rsi_up"] + (max(d, 0.0) - st["rsi_up"]) / 14
+        dn = st["rsi_dn"] + (max(-d, 0.0) - st["rsi_dn"]) / 14
+        rsi = 100.0 if dn == 0 else 100 - 100 / (1 + up / dn)
+        raw_osc["RSI"] = {"last": float(rsi), "prev": float(st["rsi"][-1])}
+
+        lo14, hi14 = min(ls[-13:].min(), l), max(hs[-13:].max(), h)
+        k = 100 * (c - lo14) / (hi14 - lo14)
+        raw_osc["Stoch"] = {"k": float(k), "d": _mean(np.append(st["stoch_k"], k))}
+
+        tp = np.append(st["tp"], (h + l + c) / 3.0)
+        raw_osc["CCI"] = {"last": float((tp[-1] - tp.mean()) / (0.015 * np.mean(np.abs(tp - tp.mean())))),
+                          "prev": st["cci_prev"]}
+
+        pc = cs[-1]
+        trs = st["trs"] - st["trs"] / 14 + (max(h, pc) - min(l, pc))
+        up_move, down_move = h - hs[-1], ls[-1] - l
+        dip = st["dip"] - st["dip"] / 14 + (up_move if (up_move > down_move and up_move > 0) else 0.0)
+        din = st["din"] - st["din"] / 14 + (down_move if (down_move > up_move and down_move > 0) else 0.0)
+        di_p = 100 * dip / trs if trs != 0 else 0.0
+        di_n = 100 * din / trs if trs != 0 else 0.0
+        dx = 100 * abs((di_p - di_n) / (di_p + di_n)) if di_p + di_n != 0 else 0.0
+        raw_osc["ADX"] = {"adx": float((st["adx_prev"] * 13 + dx) / 14), "prev": st["adx_prev"],
+                          "+di": float(di_p), "-di": float(di_n)}
+
+        med = np.append(st["med"], 0.5 * (h + l))
+        raw_osc["AO"] = {"last": _mean(med[-5:]) - _mean(med[-34:]), "prev": st["ao_prev"]}
+
+        raw_osc["Momentum"] = {"last": float((c - cs[-10]) / cs[-10] * 100.0 * 100.0), "prev": st["mom_prev"]}
+
+        line = ema[12] - ema[26]
+        signal = st["macd_signal"] + (line - st["macd_signal"]) * 2.0 / 10
+        raw_osc["MACD"] = {"line": float(line), "signal": float(signal)}
+
+        rsi_win = np.append(st["rsi"], rsi)
+        srsi = (rsi - rsi_win.min()) / (rsi_win.max() - rsi_win.min())
+        srsi_k = _mean(np.append(st["srsi"], srsi))
+        raw_osc["StochRSI"] = {"k": srsi_k * 100.0, "d": _mean(np.append(st["srsi_k"], srsi_k)) * 100.0}
+
+        raw_osc["WilliamsR"] = {"last": float(-100 * (hi14 - c) / (hi14 - lo14)), "prev": st["willr_prev"]}
+
+        e13 = ema[13]
+        raw_osc["BullsBears"] = {"ema13": float(e13), "ema_prev": st["ema13_prev"], "bull": float(h - e13), "bear": float(l - e13)}
+
+        bp = np.append(st["bp"], c - min(l, pc))
+        tr = np.append(st["tr"], max(h, pc) - min(l, pc))
+        uo = 100 * (4 * bp[-7:].sum() / tr[-7:].sum() + 2 * bp[-14:].sum() / tr[-14:].sum() + bp.sum() / tr.sum()) / 7
+        if not np.isnan(uo):
+            raw_osc["Ultimate"] = {"last": float(uo)}
+
+    return {"MAs": raw_ma, "Oscillators": raw_osc}
+
+def tv_live_rating(st: Dict[str, Any], o: float, h: float, l: float, c: float, v: float = 0.0,
+                   group: str = "All", *, trace: bool = False) -> Dict[str, Any]:
+    raw = tv_live_raw(st, o, h, l, c, v)
+    votes = tv_votes_from_raw(raw, float(st["h"][-1]), float(st["l"][-1]))
+    return tv_rating_from_votes(votes, raw, group, trace=trace)
@@ -0,0 +1,355 @@
+import ast
+import asyncio
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from controllers.candles import fetch_candles, last_closed_bar_time, TF_SECONDS
+from controllers.shared_cache import cache
+
+log = logging.getLogger(__name__)
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Latest-indicator index
+#
+# One row per symbol, one set of columns per TF. Every number `tv_indicator_votes`
+# puts into `raw` becomes a float column (e.g. H1.RSI, H1.RSI_prev, D.SMA200),
+# every vote becomes `vote_<name>`, plus score / ma_score / osc_score / rating / t.
+# Columns are plain 1-D numpy arrays so a filter over the whole universe is a
+# handful of vectorized comparisons.
+
+TEXT_COLUMNS = {"rating"}
+_MAIN_KEYS = ("last", "adx", "line")
+
+
+def _field_name(indicator: str, key: str) -> str:
+    if key in _MAIN_KEYS:
+        return indicator
+    key = key.replace("+", "plus_").replace("-", "minus_")
+    return f"{indicator}_{key}"
+
+
+def flatten_snapshot(snap: Dict[str, Any]) -> Dict[str, Any]:
+    """Flatten a `tv_rating_for_df(..., trace=True)` result into `{column: value}`."""
+    row: Dict[str, Any] = {
+        "t": snap.get("t"),
+        "score": snap["score"],
+        "ma_score": snap["ma_score"],
+        "osc_score": snap["osc_score"],
+        "rating": snap["rating"],
+    }
+    for group in snap.get("raw", {}).values():
+        for name, val in group.items():
+            if isinstance(val, dict):
+                for key, v in val.items():
+                    row[_field_name(name, key)] = v
+            else:
+                row[name] = val
+    for group in snap["votes"].values():
+        for name, vote in group.items():
+            row[f"vote_{name}"] = vote
+    return row
+
+
+class IndicatorIndex:
+    """Columnar store of the latest rating snapshot per (symbol, TF)."""
+
+    def __init__(self, tfs: Sequence[str], capacity: int = 64):
+        self._lock = threading.RLock()
+        self.tfs: List[str] = list(tfs)
+        self.symbols: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._capacity = capacity
+        self._cols: Dict[str, Dict[str, np.ndarray]] = {tf: {} for tf in self.tfs}
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    # ── writes ──────────────────────────────────────────────────────────────
+    def _new_column(self, name: str) -> np.ndarray:
+        if name in TEXT_COLUMNS:
+            return np.full(self._capacity, None, dtype=object)
+        return np.full(self._capacity, np.nan)
+
+    def _row_for(self, symbol: str) -> int:
+        row = self._rows.get(symbol)
+        if row is not None:
+            return row
+        row = len(self.symbols)
+        if row >= self._capacity:
+            self._capacity *= 2
+            for cols in self._cols.values():
+                for name, arr in cols.items():
+                    grown = self._new_column(name)
+                    grown[: len(arr)] = arr
+                    cols[name] = grown
+        self.symbols.append(symbol)
+        self._rows[symbol] = row
+        return row
+
+    def update(self, symbol: str, tf: str, snap: Dict[str, Any]) -> None:
+        values = flatten_snapshot(snap)
+        with self._lock:
+            if tf not in self._cols:
+                self.tfs.append(tf)
+                self._cols[tf] = {}
+            cols = self._cols[tf]
+            row = self._row_for(symbol)
+            # Indicators without enough data are omitted from the snapshot → clear them.
+            for name, arr in cols.items():
+                arr[row] = None if name in TEXT_COLUMNS else np.nan
+            for name, val in values.items():
+                if name not in cols:
+                    cols[name] = self._new_column(name)
+                if val is None:
+                    continue
+                cols[name][row] = val if name in TEXT_COLUMNS else float(val)
+
+    # ── reads ───────────────────────────────────────────────────────────────
+    def bar_time(self, symbol: str, tf: str) -> Optional[int]:
+        with self._lock:
+            row = self._rows.get(symbol)
+            col = self._cols.get(tf, {}).get("t")
+            if row is None or col is None or np.isnan(col[row]):
+                return None
+            return int(col[row])
+
+    def fields(self) -> Dict[str, List[str]]:
+        with self._lock:
+            return {tf: sorted(cols) for tf, cols in self._cols.items()}
+
+    def _view(self):
+        with self._lock:
+            n = len(self.symbols)
+            # Copies: update() writes rows in place, and a query must not see half a snapshot.
+            cols = {tf: {name: arr[:n].copy() for name, arr in c.items()} for tf, c in self._cols.items()}
+            return np.array(self.symbols, dtype=object), cols
+
+    def query(
+        self,
+        where: Optional[str] = None,
+        sort: Optional[str] = None,
+        descending: bool = True,
+        limit: int = 50,
+        fields: Sequence[str] = (),
+    ) -> Dict[str, Any]:
+        """Evaluate `where` as a mask over every symbol, then sort and keep the top `limit`."""
+        symbols, cols = self._view()
+        n = len(symbols)
+        ev = _Evaluator(symbols, cols)
+
+        mask = np.ones(n, dtype=bool)
+        if where:
+            mask = ev.run(where)
+            if not _is_bool(mask):
+                raise ValueError(f"Filter '{where}' is not a condition, e.g. 'H1.RSI < 30'")
+            mask = np.asarray(mask, dtype=bool)
+            if mask.shape != (n,):
+                mask = np.broadcast_to(mask, (n,))
+        rows = np.flatnonzero(mask)
+
+        if sort and len(rows):
+            key = ev.run(sort)
+            if _is_text(key):
+                raise ValueError(f"Sort '{sort}' is text; sort by a number")
+            # A constant (e.g. sort=1) sorts nothing but must not fail the query.
+            key = np.broadcast_to(np.asarray(key, dtype=float), (n,))[rows]
+            key = np.where(np.isnan(key), -np.inf if descending else np.inf, key)
+            key = -key if descending else key
+            k = min(limit, len(rows))
+            top = np.argpartition(key, k - 1)[:k] if k < len(rows) else np.arange(len(rows))
+            rows = rows[top[np.argsort(key[top], kind="stable")]]
+        else:
+            rows = rows[:limit]
+
+        # Field TFs are normalised like filter references: h1.RSI is H1.RSI.
+        fields = [f"{tf.upper()}.{name}" for tf, _, name in (f.partition(".") for f in fields)]
+        columns = list(dict.fromkeys([*ev.refs, *fields]))
+        data = []
+        for r in rows:
+            item: Dict[str, Any] = {"symbol": symbols[r]}
+            for ref in columns:
+                tf, name = ref.split(".", 1)
+                arr = cols.get(tf, {}).get(name)
+                val = None if arr is None else arr[r]
+                if isinstance(val, np.floating):
+                    val = None if np.isnan(val) else float(val)
+                item[ref] = val
+            data.append(item)
+        return {"count": int(mask.sum()), "universe": n, "data": data}
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Filter expressions
+#
+# Python-like syntax over `<TF>.<column>` references, e.g.
+#   H1.RSI < 30 and D.close > D.SMA200
+#   (H4.rating == "Strong Buy") & (H4.ADX > 25)
+# Only comparisons, boolean and arithmetic operators are allowed. Text (rating,
+# symbol) only compares for (in)equality with text; and/or/not take conditions.
+
+_CMP = {
+    ast.Lt: np.less, ast.LtE: np.less_equal, ast.Gt: np.greater,
+    ast.GtE: np.greater_equal, ast.Eq: np.equal, ast.NotEq: np.not_equal,
+}
+_BIN = {
+    ast.Add: np.add, ast.Sub: np.subtract, ast.Mult: np.multiply, ast.Div: np.divide,
+    ast.BitAnd: np.logical_and, ast.BitOr: np.logical_or,
+}
+
+
+def _is_text(v) -> bool:
+    return isinstance(v, str) or (isinstance(v, np.ndarray) and v.dtype == object)
+
+
+def _is_bool(v) -> bool:
+    return isinstance(v, (bool, np.bool_)) or (isinstance(v, np.ndarray) and v.dtype == bool)
+
+
+def _condition(v):
+    if not _is_bool(v):
+        raise ValueError("and / or / not / & / | need conditions on both sides, e.g. 'H1.RSI < 30'")
+    return v
+
+
+class _Evaluator:
+    def __init__(self, symbols: np.ndarray, cols: Dict[str, Dict[str, np.ndarray]]):
+        self.symbols = symbols
+        self.cols = cols
+        self.refs: List[str] = []
+
+    def run(self, expr: str):
+        try:
+            tree = ast.parse(expr, mode="eval")
+        except SyntaxError as e:
+            raise ValueError(f"Invalid expression '{expr}': {e.msg}")
+        with np.errstate(invalid="ignore", divide="ignore"):
+            try:
+                return self._eval(tree.body)
+            except TypeError as e:  # anything the checks below let through
+                raise ValueError(f"Invalid expression '{expr}': {e}")
+
+    def _eval(self, node: ast.AST):
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float, str)):
+            return node.value
+        if isinstance(node, ast.Name) and node.id == "symbol":
+            return self.symbols
+        if isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name):
+            tf, name = node.value.id.upper(), node.attr
+            if tf not in self.cols:
+                raise ValueError(f"Unknown timeframe '{tf}'")
+            if name not in self.cols[tf]:
+                raise ValueError(f"Unknown column '{tf}.{name}'")
+            self.refs.append(f"{tf}.{name}")
+            return self.cols[tf][name]
+        if isinstance(node, ast.BoolOp):
+            op = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+            out = _condition(self._eval(node.values[0]))
+            for v in node.values[1:]:
+                out = op(out, _condition(self._eval(v)))
+            return out
+        if isinstance(node, ast.UnaryOp):
+            val = self._eval(node.operand)
+            if isinstance(node.op, (ast.Not, ast.Invert)):
+                return np.logical_not(_condition(val))
+            if isinstance(node.op, ast.USub):
+                if _is_text(val):
+                    raise ValueError("Arithmetic needs numbers, not text")
+                return np.negative(val)
+        if isinstance(node, ast.BinOp) and type(node.op) in _BIN:
+            left, right = self._eval(node.left), self._eval(node.right)
+            if isinstance(node.op, (ast.BitAnd, ast.BitOr)):
+                return _BIN[type(node.op)](_condition(left), _condition(right))
+            if _is_text(left) or _is_text(right):
+                raise ValueError("Arithmetic needs numbers, not text")
+            return _BIN[type(node.op)](left, right)
+        if isinstance(node, ast.Compare):
+            left, out = self._eval(node.left), None
+            for op, comp in zip(node.ops, node.comparators):
+                if type(op) not in _CMP:
+                    raise ValueError(f"Unsupported comparison '{type(op).__name__}'")
+                right = self._eval(comp)
+                if _is_text(left) != _is_text(right):
+                    raise ValueError("Cannot compare text with a number (rating and symbol are text)")
+                if _is_text(left) and not isinstance(op, (ast.Eq, ast.NotEq)):
+                    raise ValueError("Text only compares with == or !=")
+                res = _CMP[type(op)](left, right)
+                out = res if out is None else np.logical_and(out, res)
+                left = right
+            return out
+        raise ValueError(f"Unsupported expression element '{ast.dump(node)[:40]}'")
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Refresh on bar close
+
+index = IndicatorIndex(list(TF_SECONDS))
+_listeners: List[Callable[[List[Dict[str, Any]]], None]] = []
+
+def on_snapshots(fn: Callable[[List[Dict[str, Any]]], None]):
+    """Register a callback that receives every batch of fresh snapshots."""
+    _listeners.append(fn)
+    return fn
+
+
+def compute_snapshot(symbol: str, tf: str, count: int = 300) -> Optional[Dict[str, Any]]:
+    # pandas/ta load on the first computation, not at startup (a warm restart may never need them).
+    import pandas as pd
+    from controllers.ratings import tv_rating_for_df
+    candles = fetch_candles(symbol, tf, count)
+    if not candles:
+        return None
+    df = pd.DataFrame([c.dict() for c in candles])
+    df = df.sort_values("t").reset_index(drop=True)
+    snap = tv_rating_for_df(df, trace=True)
+    snap.update(symbol=symbol, tf=tf, t=int(df["t"].iloc[-1]))
+    return snap
+
+
+def refresh_cell(symbol: str, tf: str, count: int = 300, force: bool = False) -> Optional[Dict[str, Any]]:
+    """Recompute one (symbol, TF) if a new bar has closed since the last refresh."""
+    t = last_closed_bar_time(symbol, tf)
+    if t is None or (not force and index.bar_time(symbol, tf) == t):
+        return None
+    # Every worker keeps its own index, but a snapshot is computed once per host.
+    snap = cache.get_or_load(("snapshot", symbol, tf, t, count), 2 * TF_SECONDS[tf],
+                             lambda: compute_snapshot(symbol, tf, count))
+    if snap is None:
+        return None
+    index.update(symbol, tf, snap)
+    return snap
+
+
+def refresh(symbols: Sequence[str], tfs: Sequence[str], force: bool = False) -> List[Dict[str, Any]]:
+    fresh: List[Dict[str, Any]] = []
+    for tf in tfs:
+        for sym in symbols:
+            try:
+                snap = refresh_cell(sym, tf, force=force)
+            except Exception:
+                log.exception("screener refresh failed for %s %s", sym, tf)
+                continue
+            if snap is not None:
+                fresh.append(snap)
+    if fresh:
+        for fn in _listeners:
+            try:
+                fn(fresh)
+            except Exception:
+                log.exception("snapshot listener %r failed", fn)
+    return fresh
+
+
+async def run_refresher(symbols: Sequence[str], tfs: Sequence[str], poll_seconds: float = 5.0) -> None:
+    """
+    Fill the index once, then recompute a (symbol, TF) whenever the broker's last
+    closed bar for it changes. Polled every cycle rather than derived from our
+    clock, so bars that close at a broker offset (H4, D) are not missed; the poll
+    is a cached read until the rates block expires.
+    """
+    await asyncio.to_thread(refresh, symbols, tfs, True)
+    while True:
+        await asyncio.sleep(poll_seconds)
+        await asyncio.to_thread(refresh, symbols, tfs)
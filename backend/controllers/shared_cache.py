@@ -0,0 +1,369 @@
+"""
+Host-wide cache shared by every uvicorn worker.
+
+The first worker to bind SHARED_CACHE_PORT on 127.0.0.1 hosts the store in a
+background thread; the others connect to it. If the host worker goes away the
+next request re-runs the election. Each key has a refresh lease, so when an
+entry expires exactly one worker on the host reloads it from upstream while the
+rest keep serving the stale value (or wait for the first load). The store also
+keeps named token buckets, so an upstream rate limit holds host-wide, and named
+event logs and maps for state every worker must see the same way (alerts).
+
+Messages are pickled, so the store is only shared when SHARED_CACHE_KEY holds a
+random per-deployment secret (e.g. `python -c "import secrets; print(secrets.token_hex(32))"`).
+Both ends prove they know it before anything is unpickled, and a process that
+squats the port without it is rejected instead of serving data. Without a key
+the cache is in-process only. SHARED_CACHE=1 without a key refuses to start,
+and SHARED_CACHE=0 forces in-process mode.
+"""
+import logging
+import os
+import socket
+import threading
+import time
+from collections import deque
+from multiprocessing.connection import Client, Listener
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+log = logging.getLogger(__name__)
+
+ADDRESS = ("127.0.0.1", int(os.getenv("SHARED_CACHE_PORT", "47600")))
+AUTHKEY = os.getenv("SHARED_CACHE_KEY", "").encode()
+MIN_KEY_BYTES = 16
+_MODE = os.getenv("SHARED_CACHE", "").lower()
+ENABLED = bool(AUTHKEY) if not _MODE else _MODE not in ("0", "off", "false")
+MAX_ENTRIES = 50_000
+# A load that failed (None / empty) is retried after this long instead of its TTL.
+RETRY_TTL = 5.0
+
+
+def _no_delay(conn):
+    # Connection sends messages over 16 KiB as header + body; with Nagle on, the
+    # body waits for the peer's delayed ACK (~40 ms) on every large get/put.
+    with socket.socket(fileno=os.dup(conn.fileno())) as s:
+        s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return conn
+
+
+class EventLog:
+    """
+    Keeps the newest `maxlen` events; readers resume from the last `seq` they saw.
+    Sequence numbers start at the creation time in ms, so a log recreated after a
+    restart continues above the cursors clients hold from the previous one.
+    """
+
+    def __init__(self, maxlen: int = 10_000):
+        self._lock = threading.Lock()
+        self._events: deque = deque(maxlen=maxlen)
+        self._seq = int(time.time() * 1000)
+
+    @property
+    def cursor(self) -> int:
+        return self._seq
+
+    def append_many(self, items: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            for item in items:
+                self._seq += 1
+                self._events.append({"seq": self._seq, **item})
+
+    def read(self, cursor: int = 0, limit: int = 500) -> Dict[str, Any]:
+        with self._lock:
+            oldest = self._events[0]["seq"] if self._events else self._seq + 1
+            if cursor > self._seq:
+                # A cursor from a log that no longer exists (the clock went back): start over.
+                start, missed = 0, True
+            else:
+                # seq is contiguous, so the first unseen event sits at a known offset.
+                start, missed = max(0, cursor + 1 - oldest), 0 < cursor < oldest - 1
+            items = [self._events[i] for i in range(start, min(len(self._events), start + limit))]
+            return {
+                "events": items,
+                "cursor": items[-1]["seq"] if items else (self._seq if missed else max(cursor, oldest - 1)),
+                "missed": missed,
+            }
+
+
+class CacheStore:
+    """The store itself: values with expiry plus per-key refresh leases."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data: Dict[Hashable, Tuple[Any, float]] = {}
+        self._leases: Dict[Hashable, Tuple[str, float]] = {}
+        self._buckets: Dict[str, Tuple[float, float, float]] = {}  # name → (tokens, stamp, hold_until)
+        self._logs: Dict[str, EventLog] = {}
+        self._maps: Dict[str, Dict[Hashable, Any]] = {}
+        self._versions: Dict[str, int] = {}
+        self._epoch = time.time()  # tells a map version apart from the same number in a previous store
+        self.stats = {"get": 0, "hit": 0, "put": 0, "lease_granted": 0, "lease_denied": 0}
+
+    def handle(self, msg: Tuple) -> Any:
+        op, *args = msg
+        now = time.time()
+        with self._lock:
+            if op == "get":
+                self.stats["get"] += 1
+                hit = self._data.get(args[0])
+                if hit is not None and hit[1] > now:
+                    self.stats["hit"] += 1
+                return hit
+            if op in ("put", "put_many"):
+                for key, value, ttl in ([args] if op == "put" else args[0]):
+                    self.stats["put"] += 1
+                    self._data.pop(key, None)
+                    self._data[key] = (value, now + ttl)
+                if len(self._data) > MAX_ENTRIES:
+                    self._evict(now)
+                return True
+            if op == "lease":
+                key, owner, seconds = args
+                held = self._leases.get(key)
+                if held is not None and held[1] > now and held[0] != owner:
+                    self.stats["lease_denied"] += 1
+                    return False
+                self._leases[key] = (owner, now + seconds)
+                self.stats["lease_granted"] += 1
+                return True
+            if op == "release":
+                key, owner = args
+                if self._leases.get(key, (None,))[0] == owner:
+                    del self._leases[key]
+                return True
+            if op == "stats":
+                return {**self.stats, "entries": len(self._data), "leases": len(self._leases)}
+            if op == "take":
+                name, rate, burst = args
+                tokens, stamp, hold = self._buckets.get(name, (burst, now, 0.0))
+                tokens = min(burst, tokens + (now - stamp) * rate)
+                wait = max(hold - now, 0.0, (1.0 - tokens) / rate)
+                self._buckets[name] = (tokens - 1.0 if wait == 0 else tokens, now, hold)
+                return wait
+            if op == "hold":
+                name, until = args
+                tokens, stamp, hold = self._buckets.get(name, (0.0, now, 0.0))
+                self._buckets[name] = (tokens, stamp, max(hold, until))
+                return True
+            if op == "items":
+                kinds = set(args[0])
+                return [(k, v, exp) for k, (v, exp) in self._data.items() if isinstance(k, tuple) and k and k[0] in kinds]
+            if op == "log_append":
+                name, items, maxlen = args
+                events = self._logs.setdefault(name, EventLog(maxlen))
+                events.append_many(items)
+                return events.cursor
+            if op == "log_read":
+                name, cursor, limit = args
+                return self._logs.setdefault(name, EventLog()).read(cursor, limit)
+            if op == "map_set":
+                name, key, value = args
+                self._maps.setdefault(name, {})[key] = value
+                self._versions[name] = self._versions.get(name, 0) + 1
+                return True
+            if op == "map_del":
+                name, key = args
+                if self._maps.get(name, {}).pop(key, None) is None:
+                    return False
+                self._versions[name] += 1
+                return True
+            if op == "map_get":
+                name, since = args
+                version = (self._epoch, self._versions.get(name, 0))
+                return None if version == since else (version, dict(self._maps.get(name, {})))
+        raise ValueError(f"unknown cache op {op!r}")
+
+    def _evict(self, now: float) -> None:
+        for key in [k for k, (_, exp) in self._data.items() if exp <= now]:
+            del self._data[key]
+        while len(self._data) > MAX_ENTRIES:
+            del self._data[next(iter(self._data))]  # oldest insert first
+
+    def serve(self, listener: Listener) -> None:
+        while True:
+            try:
+                conn = listener.accept()
+            except Exception:
+                log.exception("shared cache: accept failed")
+                continue
+            threading.Thread(target=self._serve_conn, args=(_no_delay(conn),), daemon=True).start()
+
+    def _serve_conn(self, conn) -> None:
+        with conn:
+            while True:
+                try:
+                    msg = conn.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    reply = self.handle(msg)
+                except Exception as e:
+                    reply = e
+                conn.send(reply)
+
+
+class SharedCache:
+    def __init__(self, enabled: bool = ENABLED, address: Tuple[str, int] = ADDRESS):
+        self._lock = threading.Lock()
+        self._address = address
+        self._conn = None
+        if enabled and len(AUTHKEY) < MIN_KEY_BYTES:
+            raise RuntimeError(f"SHARED_CACHE_KEY must be a random secret of at least {MIN_KEY_BYTES} bytes "
+                               "to share the cache between workers (or set SHARED_CACHE=0)")
+        self._local: Optional[CacheStore] = None if enabled else CacheStore()
+        self.hosting = False
+
+    @property
+    def owns_store(self) -> bool:
+        """True when the store lives in this process (local mode or the elected host)."""
+        return self._local is not None or self.hosting
+
+    # ── transport ───────────────────────────────────────────────────────────
+    def _connect(self):
+        try:
+            return _no_delay(Client(self._address, authkey=AUTHKEY))
+        except OSError:
+            pass
+        # Nobody is serving: try to become the host. Losing the bind race is fine.
+        try:
+            listener = Listener(self._address, authkey=AUTHKEY)
+        except OSError:
+            time.sleep(0.05)
+            return _no_delay(Client(self._address, authkey=AUTHKEY))
+        store = CacheStore()
+        threading.Thread(target=store.serve, args=(listener,), daemon=True, name="shared-cache").start()
+        self.hosting = True
+        log.info("shared cache: hosting on %s:%s (pid %s)", *self._address, os.getpid())
+        return _no_delay(Client(self._address, authkey=AUTHKEY))
+
+    def _call(self, *msg) -> Any:
+        if self._local is not None:
+            return self._local.handle(msg)
+        with self._lock:
+            for attempt in range(3):
+                try:
+                    if self._conn is None:
+                        self._conn = self._connect()
+                    self._conn.send(msg)
+                    reply = self._conn.recv()
+                    break
+                except (OSError, EOFError):
+                    self._conn = None
+                    if attempt == 2:
+                        raise
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+    # ── API ─────────────────────────────────────────────────────────────────
+    def get(self, key: Hashable) -> Optional[Tuple[Any, float]]:
+        """(value, expires_at) or None; expired entries are still returned."""
+        return self._call("get", key)
+
+    def put(self, key: Hashable, value: Any, ttl: float) -> None:
+        self._call("put", key, value, ttl)
+
+    def put_many(self, entries: Sequence[Tuple[Hashable, Any, float]]) -> None:
+        """Several (key, value, ttl) in one round trip."""
+        self._call("put_many", list(entries))
+
+    def stats(self) -> Dict[str, Any]:
+        return self._call("stats")
+
+    def take(self, bucket: str, rate: float, burst: float) -> float:
+        """Take a token from a host-wide bucket: 0 if granted, else seconds until one could be."""
+        return self._call("take", bucket, rate, burst)
+
+    def hold(self, bucket: str, seconds: float) -> None:
+        """Grant no tokens from `bucket` for `seconds` (upstream asked us to back off)."""
+        self._call("hold", bucket, time.time() + seconds)
+
+    def items(self, kinds: Sequence[str]) -> List[Tuple[Hashable, Any, float]]:
+        """(key, value, expires_at) of every entry whose tuple key starts with one of `kinds`."""
+        return self._call("items", tuple(kinds))
+
+    def lease(self, name: Hashable, seconds: float) -> bool:
+        """Hold (or renew) the named lease for this process; False while another process holds it."""
+        return self._call("lease", name, f"{os.getpid()}", seconds)
+
+    def log_append(self, name: str, items: List[Dict[str, Any]], maxlen: int = 10_000) -> int:
+        """Append to the host-wide EventLog `name`; returns its cursor."""
+        return self._call("log_append", name, list(items), maxlen)
+
+    def log_read(self, name: str, cursor: int = 0, limit: int = 500) -> Dict[str, Any]:
+        return self._call("log_read", name, cursor, limit)
+
+    def map_set(self, name: str, key: Hashable, value: Any) -> None:
+        self._call("map_set", name, key, value)
+
+    def map_del(self, name: str, key: Hashable) -> bool:
+        return self._call("map_del", name, key)
+
+    def map_get(self, name: str, since: Any = None) -> Optional[Tuple[Any, Dict[Hashable, Any]]]:
+        """(version, contents) of map `name`, or None if its version is still `since`."""
+        return self._call("map_get", name, since)
+
+    def get_or_load(self, key: Hashable, ttl: float, loader: Callable[[], Any], lease_seconds: float = 30.0,
+                    top_up: Optional[Callable[[Any], Any]] = None, lease: Optional[Hashable] = None,
+                    wait_seconds: Optional[float] = None, refresh_ahead: float = 0.0) -> Any:
+        """
+        Fresh cached value, or load it. Only the lease holder calls `loader`
+        (or `top_up(stale_value)` when an expired value is cached); other
+        callers get the stale value if there is one, else wait for the load.
+        A load that returns None, something empty or the stale value itself
+        never replaces a good value: the stale value (if any) is kept and
+        retried after RETRY_TTL.
+
+        `lease` names the lease instead of `key`, so callers that must not wait
+        on each other (e.g. different priority lanes) load the same key
+        independently. A caller with nothing cached waits at most
+        `wait_seconds` for another holder's load, then raises TimeoutError.
+        `refresh_ahead` treats a value as due that many seconds before it
+        expires, so a pre-warmer reloads it before any reader sees a miss.
+        """
+        hit = self.get(key)
+        if hit is not None and hit[1] - refresh_ahead > time.time():
+            return hit[0]
+        owner = f"{os.getpid()}-{threading.get_ident()}"
+        lease = key if lease is None else lease
+        deadline = None if wait_seconds is None else time.monotonic() + wait_seconds
+        while True:
+            if self._call("lease", lease, owner, lease_seconds):
+                try:
+                    # Another worker may have stored it between our miss and the lease.
+                    latest = self.get(key)
+                    if latest is not None and latest[1] - refresh_ahead > time.time():
+                        return latest[0]
+                    hit = latest or hit
+                    stale = hit[0] if hit is not None else None
+                    value = top_up(stale) if top_up is not None and stale is not None else loader()
+                    if _failed(value) or value is stale:
+                        value = stale if stale is not None else value
+                        # A refresh ahead of expiry that fails leaves the value's own expiry alone.
+                        left = hit[1] - time.time() if hit is not None else 0.0
+                        self.put(key, value, max(min(ttl, RETRY_TTL), left))
+                    else:
+                        self.put(key, value, ttl)
+                    return value
+                finally:
+                    self._call("release", lease, owner)
+            if hit is not None:
+                return hit[0]
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError(f"no value for {key!r} within {wait_seconds:.1f}s")
+            time.sleep(0.01)
+            hit = self.get(key)
+            if hit is not None and hit[1] > time.time():
+                return hit[0]
+            hit = None  # still stale/missing: retry the lease (the holder may have died)
+
+
+def _failed(value: Any) -> bool:
+    if value is None:
+        return True
+    try:
+        return len(value) == 0
+    except TypeError:
+        return False
+
+
+cache = SharedCache()
@@ -0,0 +1,488 @@
+"""
+Parameter sweep over the TradingView-style vote rules.
+
+tv_indicator_votes hard-codes its periods and thresholds (RSI 14 at 30/70,
+CCI 20 at ±100, ADX > 20, SMA/EMA 10…200, the 0.1/0.5 rating bands). sweep()
+evaluates a grid of alternatives over a symbol's whole history in one pass:
+
+- every indicator series is computed once per distinct period, with the
+  same `ta` classes and helpers the live rating uses;
+- every vote series is computed once per distinct (period, thresholds);
+- configurations then only differ in which vote rows they add up, so the
+  score series of a chunk of configurations is a few gathers and adds over
+  a (configs × bars) array.
+
+At the defaults the score series equals tv_rating_for_df run on each prefix
+of the history (bar i rated from bars ≤ i), see bench/sweep.py. Bars before
+every indicator in the grid has enough history are skipped.
+
+sweep_closes() does the same for the closes-only recipe of
+compute_score_from_closes (SMA trend, SMA slope, Wilder RSI, MACD, and their
+weights), over CLOSES_DEFAULTS. Both report the same signal statistics.
+
+    python -m controllers.sweep EURUSD H1 --count 5000 \
+        --grid '{"rsi_period": [7, 14, 21], "rsi_low": [25, 30], "buy": [0.1, 0.2]}'
+    python -m controllers.sweep EURUSD H1 --recipe closes --grid '{"trend_period": [100, 200], "slope_bars": [3, 5]}'
+"""
+import itertools
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from ta.momentum import (AwesomeOscillatorIndicator, ROCIndicator, RSIIndicator, StochasticOscillator,
+                         StochRSIIndicator, WilliamsRIndicator)
+from ta.trend import ADXIndicator, EMAIndicator, MACD, SMAIndicator
+
+from controllers.candles import fetch_rates
+from controllers.ratings import CROSS_TOL, hma, ichimoku_core, macd_signal, rsi_wilder, sma, ultimate_oscillator, vwma
+
+# Tunable parameters and the values tv_indicator_votes uses.
+DEFAULTS: Dict[str, Any] = {
+    "ma_periods": (10, 20, 30, 50, 100, 200),
+    "rsi_period": 14, "rsi_low": 30, "rsi_high": 70,
+    "stoch_period": 14, "stoch_low": 20, "stoch_high": 80,
+    "cci_period": 20, "cci_level": 100,
+    "adx_period": 14, "adx_min": 20,
+    "mom_period": 10,
+    "willr_period": 14, "willr_low": -80, "willr_high": -20,
+    "buy": 0.1, "strong": 0.5,
+}
+
+# compute_score_from_closes's parameters: component periods, weights (the RSI term
+# is always (RSI - 50) / 100) and the rating_from_score bands.
+CLOSES_DEFAULTS: Dict[str, Any] = {
+    "trend_period": 200, "trend_weight": 0.2,
+    "slope_period": 20, "slope_bars": 5, "slope_weight": 0.1,
+    "rsi_period": 14,
+    "macd_fast": 12, "macd_slow": 26, "macd_signal": 9, "macd_weight": 0.1,
+    "buy": 0.1, "strong": 0.5,
+}
+
+# Oscillator votes that depend on the grid, and the parameters each one reads.
+_OSC_VOTES: Dict[str, Tuple[str, ...]] = {
+    "RSI": ("rsi_period", "rsi_low", "rsi_high"),
+    "Stoch": ("stoch_period", "stoch_low", "stoch_high"),
+    "CCI": ("cci_period", "cci_level"),
+    "ADX": ("adx_period", "adx_min"),
+    "Momentum": ("mom_period",),
+    "WilliamsR": ("willr_period", "willr_low", "willr_high"),
+}
+
+
+def history_frame(symbol: str, tf: str, count: int = 5000) -> Optional[pd.DataFrame]:
+    """Closed bars as the t/o/h/l/c/v frame the rating functions take."""
+    rates = fetch_rates(symbol, tf, count)
+    if rates is None or len(rates) == 0:
+        return None
+    df = pd.DataFrame({"t": rates["time"].astype(np.int64) * 1000, "o": rates["open"], "h": rates["high"],
+                       "l": rates["low"], "c": rates["close"]})
+    if "tick_volume" in rates.dtype.names:
+        df["v"] = rates["tick_volume"].astype(float)
+    return df
+
+
+def grid_configs(grid: Dict[str, Sequence[Any]], defaults: Dict[str, Any] = DEFAULTS) -> List[Dict[str, Any]]:
+    """Every combination of `grid`, other parameters at their defaults."""
+    unknown = set(grid) - set(defaults)
+    if unknown:
+        raise ValueError(f"Unknown sweep parameter(s): {', '.join(sorted(unknown))}")
+    names = list(grid)
+    values = [[tuple(v) if isinstance(v, list) else v for v in grid[n]] for n in names]
+    return [{**defaults, **dict(zip(names, combo))} for combo in itertools.product(*values)]
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Shared intermediates
+def _cmp(c: np.ndarray, v: np.ndarray) -> np.ndarray:
+    return (c > v).astype(np.int8) - (c < v).astype(np.int8)
+
+
+def _first_valid(*series: np.ndarray) -> int:
+    """First bar from which all of `series` are defined."""
+    start = 0
+    for s in series:
+        bad = np.flatnonzero(np.isnan(s))
+        if len(bad):
+            start = max(start, int(bad[-1]) + 1)
+    return start
+
+
+class _Votes:
+    """Indicator and vote series for one history, each computed once and reused across configurations."""
+
+    def __init__(self, df: pd.DataFrame):
+        self.close, self.high, self.low = df["c"].astype(float), df["h"].astype(float), df["l"].astype(float)
+        self.c, self.h, self.l = self.close.to_numpy(), self.high.to_numpy(), self.low.to_numpy()
+        self.volume = df["v"].fillna(0) if "v" in df.columns and df["v"].notna().any() else None
+        self._series: Dict[Tuple, Any] = {}
+        self._votes: Dict[Tuple, Tuple[np.ndarray, int]] = {}
+
+    def series(self, key: Tuple) -> Any:
+        if key not in self._series:
+            self._series[key] = self._compute(*key)
+        return self._series[key]
+
+    def _compute(self, name: str, *p):
+        close, high, low = self.close, self.high, self.low
+        if name == "sma":
+            return SMAIndicator(close=close, window=p[0]).sma_indicator().to_numpy()
+        if name == "ema":
+            return EMAIndicator(close=close, window=p[0]).ema_indicator().to_numpy()
+        if name == "rsi":
+            return RSIIndicator(close=close, window=p[0]).rsi().to_numpy()
+        if name == "stoch":
+            st = StochasticOscillator(high=high, low=low, close=close, window=p[0], smooth_window=3)
+            return st.stoch().to_numpy(), st.stoch_signal().to_numpy()
+        if name == "cci":
+            n = p[0]
+            tp = (high + low + close) / 3.0
+            mad = np.full(len(tp), np.nan)
+            if len(tp) >= n:
+                w = sliding_window_view(tp.to_numpy(), n)
+                mad[n - 1:] = np.abs(w - w.mean(axis=1, keepdims=True)).mean(axis=1)
+            return ((tp - tp.rolling(n).mean()) / (0.015 * mad)).to_numpy()
+        if name == "adx":
+            a = ADXIndicator(high=high, low=low, close=close, window=p[0])
+            return a.adx().to_numpy(), a.adx_pos().to_numpy(), a.adx_neg().to_numpy()
+        if name == "roc":
+            return (ROCIndicator(close=close, window=p[0]).roc() * 100.0).to_numpy()
+        if name == "willr":
+            return WilliamsRIndicator(high=high, low=low, close=close, lbp=p[0]).williams_r().to_numpy()
+        raise KeyError(name)
+
+    # ── vote series: (int8 votes, first bar where they are defined) ─────────
+    def vote(self, name: str, *p) -> Tuple[np.ndarray, int]:
+        key = (name, *p)
+        if key not in self._votes:
+            self._votes[key] = self._vote(name, *p)
+        return self._votes[key]
+
+    def _vote(self, name: str, *p) -> Tuple[np.ndarray, int]:
+        c = self.c
+        with np.errstate(invalid="ignore"):
+            if name in ("SMA", "EMA"):
+                v = self.series((name.lower(), p[0]))
+                return _cmp(c, v), _first_valid(v)
+            if name == "RSI":
+                last = self.series(("rsi", p[0])); prev = np.roll(last, 1); prev[0] = np.nan
+                low, high = p[1], p[2]
+                vote = ((last < low) & (last > prev)).astype(np.int8) - ((last > high) & (last < prev)).astype(np.int8)
+                return vote, _first_valid(last, prev)
+            if name == "Stoch":
+                k, d = self.series(("stoch", p[0])); low, high = p[1], p[2]
+                vote = (((k < low) & (d < low) & (k > d + CROSS_TOL)).astype(np.int8)
+                        - ((k > high) & (d > high) & (k < d - CROSS_TOL)).astype(np.int8))
+                return vote, _first_valid(k, d)
+            if name == "CCI":
+                last = self.series(("cci", p[0])); prev = np.roll(last, 1); prev[0] = np.nan
+                lvl = p[1]
+                vote = ((last < -lvl) & (last > prev)).astype(np.int8) - ((last > lvl) & (last < prev)).astype(np.int8)
+                return vote, _first_valid(last, prev)
+            if name == "ADX":
+                adx, dip, din = self.series(("adx", p[0]))
+                prev = np.roll(adx, 1); prev[0] = np.nan
+                strong = (adx > p[1]) & (adx > prev)
+                vote = (strong & (dip > din)).astype(np.int8) - (strong & (din > dip)).astype(np.int8)
+                # ta fills ADX's warm-up with zeros rather than NaN.
+                return vote, 2 * p[0]
+            if name == "Momentum":
+                last = self.series(("roc", p[0])); prev = np.roll(last, 1); prev[0] = np.nan
+                vote = ((last > 0) & (last > prev)).astype(np.int8) - ((last < 0) & (last < prev)).astype(np.int8)
+                return vote, _first_valid(last, prev)
+            if name == "WilliamsR":
+                last = self.series(("willr", p[0])); prev = np.roll(last, 1); prev[0] = np.nan
+                low, high = p[1], p[2]
+                vote = ((last < low) & (last > prev)).astype(np.int8) - ((last > high) & (last < prev)).astype(np.int8)
+                return vote, _first_valid(last, prev)
+        raise KeyError(name)
+
+    def fixed(self) -> Tuple[np.ndarray, int, np.ndarray, int, int]:
+        """Votes the grid does not touch: (MA vote sum, MA count, oscillator vote sum, oscillator count, first bar)."""
+        close, high, low, c, h, l = self.close, self.high, self.low, self.c, self.h, self.l
+        ma: List[np.ndarray] = []
+        osc: List[np.ndarray] = []
+        used: List[np.ndarray] = []
+        with np.errstate(invalid="ignore"):
+            _, kijun, _, _ = ichimoku_core(high, low)
+            base = kijun.to_numpy()
+            eps = np.maximum(1e-8, 1e-6 * c)
+            ma.append((c > base + eps).astype(np.int8) - (c < base - eps).astype(np.int8))
+            used.append(base)
+            if self.volume is not None:
+                vw = vwma(close, self.volume, 20).to_numpy()
+                ma.append(_cmp(c, vw)); used.append(vw)
+            hm = hma(close, 9).to_numpy()
+            ma.append(_cmp(c, hm)); used.append(hm)
+
+            ao = AwesomeOscillatorIndicator(high=high, low=low, window1=5, window2=34).awesome_oscillator().to_numpy()
+            ao_prev = np.roll(ao, 1); ao_prev[0] = np.nan
+            cross = (ao > 0) & (ao_prev <= 0), (ao < 0) & (ao_prev >= 0)
+            slope = (ao > ao_prev) & (ao > 0), (ao < ao_prev) & (ao < 0)
+            osc.append(np.where(cross[0], 1, np.where(cross[1], -1, np.where(slope[0], 1, np.where(slope[1], -1, 0)))))
+            used += [ao, ao_prev]
+
+            m = MACD(close=close, window_fast=12, window_slow=26, window_sign=9)
+            line, signal = m.macd().to_numpy(), m.macd_signal().to_numpy()
+            osc.append(np.where(line > signal, 1, -1)); used += [line, signal]
+
+            sr = StochRSIIndicator(close=close, window=14, smooth1=3, smooth2=3)
+            kk, dd = sr.stochrsi_k().to_numpy() * 100.0, sr.stochrsi_d().to_numpy() * 100.0
+            osc.append(((kk < 20) & (dd < 20) & (kk > dd + CROSS_TOL)).astype(np.int8)
+                       - ((kk > 80) & (dd > 80) & (kk < dd - CROSS_TOL)).astype(np.int8))
+            used += [kk, dd]
+
+            e13 = EMAIndicator(close=close, window=13).ema_indicator().to_numpy()
+            e_prev = np.roll(e13, 1); e_prev[0] = np.nan
+            h_prev = np.roll(h, 1); l_prev = np.roll(l, 1)
+            bull, bear = h - e13, l - e13
+            up = (c > e13) & (e13 > e_prev) & (bear < 0) & (bear > l_prev - e_prev)
+            down = (c < e13) & (e13 < e_prev) & (bull > 0) & (bull < h_prev - e_prev)
+            osc.append(up.astype(np.int8) - down.astype(np.int8)); used += [e13, e_prev]
+
+            uo = ultimate_oscillator(high, low, close).to_numpy()
+            osc.append((uo > 70).astype(np.int8) - (uo < 30).astype(np.int8)); used.append(uo)
+
+        return (np.sum(ma, axis=0, dtype=np.int16), len(ma),
+                np.sum(osc, axis=0, dtype=np.int16), len(osc) + len(_OSC_VOTES), _first_valid(*used))
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Sweep
+def _stack(votes: _Votes, keys: List[Tuple], fn) -> Tuple[np.ndarray, int]:
+    """Rows of `fn(key)` for each distinct key, stacked, and the latest first-defined bar among them."""
+    rows, start = [], 0
+    for key in keys:
+        row, first = fn(key)
+        rows.append(row); start = max(start, first)
+    return np.stack(rows).astype(np.int16), start
+
+
+def _ma_sum(votes: _Votes, periods: Tuple[int, ...]) -> Tuple[np.ndarray, int]:
+    total, start = np.zeros(len(votes.c), dtype=np.int16), 0
+    for n in periods:
+        for kind in ("SMA", "EMA"):
+            v, first = votes.vote(kind, n)
+            total += v; start = max(start, first)
+    return total, start
+
+
+def score_series(df: pd.DataFrame, params: Optional[Dict[str, Any]] = None) -> np.ndarray:
+    """Score at every bar for one configuration (NaN before it is defined)."""
+    cfg = {**DEFAULTS, **(params or {})}
+    votes = _Votes(df)
+    fixed_ma, n_fixed_ma, fixed_osc, n_osc, start = votes.fixed()
+    ma, first = _ma_sum(votes, tuple(cfg["ma_periods"]))
+    start = max(start, first)
+    osc = fixed_osc.astype(np.int16)
+    for name, keys in _OSC_VOTES.items():
+        v, first = votes.vote(name, *(cfg[k] for k in keys))
+        osc = osc + v; start = max(start, first)
+    score = ((ma + fixed_ma) / (2 * len(cfg["ma_periods"]) + n_fixed_ma) + osc / n_osc) / 2
+    score[:start] = np.nan
+    return score
+
+
+def sweep(df: pd.DataFrame, grid: Dict[str, Sequence[Any]], horizon: int = 5,
+          chunk: int = 256) -> pd.DataFrame:
+    """
+    One row per configuration in `grid`: its parameters, plus how its Buy/Sell signals did
+    over the next `horizon` bars. hit_rate is the share of signals whose forward return had
+    the signal's sign. avg_return_bp is the mean signed forward return in basis points.
+    The strong_* columns cover Strong Buy/Sell only.
+    """
+    configs = grid_configs(grid)
+    votes = _Votes(df)
+    fixed_ma, n_fixed_ma, fixed_osc, n_osc, start = votes.fixed()
+
+    # Distinct vote rows per group, and each configuration's row in them.
+    ma_keys = sorted({tuple(cfg["ma_periods"]) for cfg in configs})
+    ma_rows, first = _stack(votes, ma_keys, lambda key: _ma_sum(votes, key))
+    start = max(start, first)
+    ma_idx = np.array([ma_keys.index(tuple(cfg["ma_periods"])) for cfg in configs])
+    ma_n = np.array([2 * len(key) + n_fixed_ma for key in ma_keys])[ma_idx].astype(float)
+
+    osc_rows, osc_idx = [], []
+    for name, params in _OSC_VOTES.items():
+        keys = sorted({tuple(cfg[p] for p in params) for cfg in configs})
+        rows, first = _stack(votes, keys, lambda key: votes.vote(name, *key))
+        start = max(start, first)
+        osc_rows.append(rows)
+        pos = {key: i for i, key in enumerate(keys)}
+        osc_idx.append(np.array([pos[tuple(cfg[p] for p in params)] for cfg in configs]))
+
+    c = votes.c
+    end = len(c) - horizon
+    if end <= start:
+        raise ValueError(f"Not enough history: {len(c)} bars, indicators need {start} and the horizon {horizon}.")
+    window = slice(start, end)
+    fixed_ma, fixed_osc = fixed_ma[window], fixed_osc[window]
+    ma_rows = ma_rows[:, window]
+    osc_rows = [rows[:, window] for rows in osc_rows]
+
+    def scores(sel: slice) -> np.ndarray:
+        osc = fixed_osc + sum(rows[idx[sel]] for rows, idx in zip(osc_rows, osc_idx))
+        return ((ma_rows[ma_idx[sel]] + fixed_ma) / ma_n[sel, None] + osc / n_osc) / 2
+
+    return _signal_table(df, grid, configs, scores, start, end, horizon, chunk)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# compute_score_from_closes recipe
+class _Closes:
+    """compute_score_from_closes's component series for one history, once per distinct period."""
+
+    def __init__(self, df: pd.DataFrame):
+        self.close = df["c"].astype(float).reset_index(drop=True)
+        self.c = self.close.to_numpy()
+        self._series: Dict[Tuple, Tuple[np.ndarray, int]] = {}
+
+    def series(self, name: str, *p) -> Tuple[np.ndarray, int]:
+        """(component series, first bar where it is defined)."""
+        key = (name, *p)
+        if key not in self._series:
+            self._series[key] = self._compute(name, *p)
+        return self._series[key]
+
+    def _compute(self, name: str, *p) -> Tuple[np.ndarray, int]:
+        s, c = self.close, self.c
+        with np.errstate(invalid="ignore"):
+            if name == "trend":   # ±1: close above / not above the SMA
+                return np.where(c > sma(s, p[0]).to_numpy(), 1.0, -1.0), p[0] - 1
+            if name == "slope":   # ±1: SMA rose / did not rise over the last `bars` bars
+                m = sma(s, p[0]).to_numpy()
+                prev = np.roll(m, p[1]); prev[:p[1]] = np.nan
+                return np.where(m - prev > 0, 1.0, -1.0), p[0] - 1 + p[1]
+            if name == "rsi":     # the (RSI - 50) / 100 term
+                return (rsi_wilder(s, p[0]).to_numpy() - 50.0) / 100.0, 0
+            if name == "macd":    # ±1: MACD line above / not above its signal
+                line, sig, _ = macd_signal(s, *p)
+                return np.where(line.to_numpy() > sig.to_numpy(), 1.0, -1.0), 0
+        raise KeyError(name)
+
+
+# Component → the parameters that pick its series, and the one that weights it (None: fixed weight 1).
+_CLOSES_PARTS: Dict[str, Tuple[Tuple[str, ...], Optional[str]]] = {
+    "trend": (("trend_period",), "trend_weight"),
+    "rsi": (("rsi_period",), None),
+    "macd": (("macd_fast", "macd_slow", "macd_signal"), "macd_weight"),
+    "slope": (("slope_period", "slope_bars"), "slope_weight"),
+}  # in compute_score_from_closes's order, so the float sums match it bit for bit
+
+
+def closes_score_series(df: pd.DataFrame, params: Optional[Dict[str, Any]] = None) -> np.ndarray:
+    """compute_score_from_closes's score at every bar for one configuration (NaN before it is defined)."""
+    cfg = {**CLOSES_DEFAULTS, **(params or {})}
+    parts = _Closes(df)
+    # The recipe itself stays neutral until it has 200 closes, whatever the periods.
+    score, start = np.zeros(len(parts.c)), CLOSES_DEFAULTS["trend_period"] - 1
+    for name, (keys, weight) in _CLOSES_PARTS.items():
+        v, first = parts.series(name, *(cfg[k] for k in keys))
+        score += v * (cfg[weight] if weight else 1.0)
+        start = max(start, first)
+    score = np.round(np.clip(score, -1.0, 1.0), 4)
+    score[:start] = np.nan
+    return score
+
+
+def sweep_closes(df: pd.DataFrame, grid: Dict[str, Sequence[Any]], horizon: int = 5,
+                 chunk: int = 256) -> pd.DataFrame:
+    """sweep() for the compute_score_from_closes recipe: parameters from CLOSES_DEFAULTS, same columns."""
+    configs = grid_configs(grid, CLOSES_DEFAULTS)
+    parts = _Closes(df)
+    start = CLOSES_DEFAULTS["trend_period"] - 1
+    rows, idx, weights = [], [], []
+    for name, (keys, weight) in _CLOSES_PARTS.items():
+        distinct = sorted({tuple(cfg[k] for k in keys) for cfg in configs})
+        stacked = []
+        for key in distinct:
+            v, first = parts.series(name, *key)
+            stacked.append(v); start = max(start, first)
+        rows.append(np.stack(stacked))
+        pos = {key: i for i, key in enumerate(distinct)}
+        idx.append(np.array([pos[tuple(cfg[k] for k in keys)] for cfg in configs]))
+        weights.append(np.array([cfg[weight] if weight else 1.0 for cfg in configs]))
+
+    end = len(parts.c) - horizon
+    if end <= start:
+        raise ValueError(f"Not enough history: {len(parts.c)} bars, indicators need {start} and the horizon {horizon}.")
+    rows = [r[:, start:end] for r in rows]
+
+    def scores(sel: slice) -> np.ndarray:
+        total = sum(r[i[sel]] * w[sel, None] for r, i, w in zip(rows, idx, weights))
+        return np.round(np.clip(total, -1.0, 1.0), 4)
+
+    return _signal_table(df, grid, configs, scores, start, end, horizon, chunk)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Signal statistics
+def _signal_table(df: pd.DataFrame, grid: Dict[str, Sequence[Any]], configs: List[Dict[str, Any]],
+                  scores: Callable[[slice], np.ndarray], start: int, end: int, horizon: int,
+                  chunk: int) -> pd.DataFrame:
+    """
+    One row per configuration: its `grid` parameters, plus how its Buy/Sell signals did
+    over the next `horizon` bars. `scores(sel)` gives configs[sel]'s scores at bars start…end-1.
+    """
+    c = df["c"].to_numpy(dtype=float)
+    fwd = c[start + horizon:end + horizon] / c[start:end] - 1.0
+    buy = np.array([cfg["buy"] for cfg in configs], dtype=float)
+    strong = np.array([cfg["strong"] for cfg in configs], dtype=float)
+
+    stats = np.zeros((len(configs), 6))
+    for lo in range(0, len(configs), chunk):
+        sel = slice(lo, lo + chunk)
+        score = scores(sel)
+        b, s = buy[sel, None], strong[sel, None]
+        side = (score > b).astype(np.int8) - (score < -b).astype(np.int8)
+        strong_side = (score > s).astype(np.int8) - (score < -s).astype(np.int8)
+        signed = side * fwd
+        strong_signed = strong_side * fwd
+        stats[sel, 0] = (side != 0).sum(axis=1)
+        stats[sel, 1] = (signed > 0).sum(axis=1)
+        stats[sel, 2] = signed.sum(axis=1)
+        stats[sel, 3] = (strong_side != 0).sum(axis=1)
+        stats[sel, 4] = (strong_signed > 0).sum(axis=1)
+        stats[sel, 5] = strong_signed.sum(axis=1)
+
+    table = pd.DataFrame([{k: cfg[k] for k in grid} for cfg in configs])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        table["signals"] = stats[:, 0].astype(int)
+        table["hit_rate"] = np.round(stats[:, 1] / stats[:, 0], 4)
+        table["avg_return_bp"] = np.round(stats[:, 2] / stats[:, 0] * 1e4, 2)
+        table["strong_signals"] = stats[:, 3].astype(int)
+        table["strong_hit_rate"] = np.round(stats[:, 4] / stats[:, 3], 4)
+        table["strong_avg_return_bp"] = np.round(stats[:, 5] / stats[:, 3] * 1e4, 2)
+    table.attrs.update(bars=int(end - start), first_bar=int(df["t"].iloc[start]), horizon=horizon)
+    return table
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    import time
+
+    ap = argparse.ArgumentParser(description="Sweep vote-rule parameters over a symbol's history.")
+    ap.add_argument("symbol")
+    ap.add_argument("tf")
+    ap.add_argument("--count", type=int, default=5000, help="bars of history")
+    ap.add_argument("--recipe", choices=("tv", "closes"), default="tv",
+                    help="tv: the TradingView-style votes; closes: compute_score_from_closes")
+    ap.add_argument("--grid", default="{}", help="JSON {parameter: [values]}; see DEFAULTS / CLOSES_DEFAULTS")
+    ap.add_argument("--horizon", type=int, default=5, help="bars ahead for the forward return")
+    ap.add_argument("--sort", default="avg_return_bp")
+    ap.add_argument("--top", type=int, default=20)
+    ap.add_argument("--csv", help="write the full table here")
+    args = ap.parse_args()
+
+    frame = history_frame(args.symbol.upper(), args.tf.upper(), args.count)
+    if frame is None:
+        raise SystemExit(f"No data for {args.symbol} {args.tf}")
+    began = time.perf_counter()
+    run = sweep_closes if args.recipe == "closes" else sweep
+    result = run(frame, json.loads(args.grid), args.horizon)
+    took = time.perf_counter() - began
+    print(f"{len(result)} configurations × {result.attrs['bars']} bars in {took:.2f}s")
+    print(result.sort_values(args.sort, ascending=False).head(args.top).to_string(index=False))
+    if args.csv:
+        result.to_csv(args.csv, index=False)
@@ -0,0 +1,270 @@
+import asyncio
+import logging
+import threading
+from collections import deque
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from controllers.candles import mt5, ensure_connected, fetch_candles, TIMEFRAME, TF_SECONDS
+from controllers.ratings import tv_frozen_state, tv_live_rating, tv_rating_for_df, LIVE_MIN_BARS
+
+log = logging.getLogger(__name__)
+
+# Closed bars kept per TF (what fetch_candles would return) and the least we
+# need before the slow-path fallback can run at all (ta's ADX needs 2×14).
+LIVE_HISTORY = 300
+MIN_FALLBACK_BARS = 60
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Forming bars for every TF of one symbol
+class TickBook:
+    """
+    Maintains the forming OHLCV bar of every TF from a tick stream.
+
+    A tick costs one bucket check per TF. When a bucket rolls over the finished
+    bar is appended to the closed history and that TF's frozen indicator state
+    is marked stale; it is rebuilt lazily on the next rating read.
+    """
+
+    def __init__(self, symbol: str, tfs: Sequence[str] = tuple(TF_SECONDS)):
+        self._lock = threading.Lock()
+        self.symbol = symbol
+        self.tfs: List[str] = list(tfs)
+        self._span = [TF_SECONDS[tf] * 1000 for tf in self.tfs]
+        n = len(self.tfs)
+        self._t = [-1] * n
+        self._o = [0.0] * n; self._h = [0.0] * n; self._l = [0.0] * n
+        self._c = [0.0] * n; self._v = [0.0] * n
+        self._closed: List[deque] = [deque(maxlen=LIVE_HISTORY) for _ in range(n)]
+        self._frozen: List[Optional[Dict[str, Any]]] = [None] * n
+        self._stale = [True] * n
+        # Per TF: bumped whenever its forming bar or closed history changes; the
+        # cached rating is keyed on it, so a tick only invalidates the TFs it moved.
+        self._rev = [0] * n
+        self._rated: List[Optional[Tuple[int, Dict[str, Any]]]] = [None] * n
+        self.ticks = 0
+
+    # ── seeding ─────────────────────────────────────────────────────────────
+    def seed(self, tf: str, closed: pd.DataFrame, forming: Optional[Tuple[int, float, float, float, float, float]] = None) -> None:
+        """Load closed history (columns t,o,h,l,c,v; t in ms) and optionally the current forming bar."""
+        i = self.tfs.index(tf)
+        with self._lock:
+            cols = [closed[k].to_numpy(dtype=float) for k in ("o", "h", "l", "c")]
+            v = closed["v"].fillna(0).to_numpy(dtype=float) if "v" in closed else np.zeros(len(closed))
+            self._closed[i].clear()
+            self._closed[i].extend(zip(closed["t"].astype("int64").tolist(), *[c.tolist() for c in cols], v.tolist()))
+            self._stale[i] = True
+            if forming is not None:
+                self._t[i], self._o[i], self._h[i], self._l[i], self._c[i], self._v[i] = forming
+            self._rev[i] += 1
+
+    # ── ingestion ───────────────────────────────────────────────────────────
+    def _roll(self, i: int, start: int, o: float, h: float, l: float, c: float, v: float) -> None:
+        if self._t[i] >= 0:
+            self._closed[i].append((self._t[i], self._o[i], self._h[i], self._l[i], self._c[i], self._v[i]))
+            self._stale[i] = True
+        self._t[i], self._o[i], self._h[i], self._l[i], self._c[i], self._v[i] = start, o, h, l, c, v
+        self._rev[i] += 1
+
+    def on_tick(self, t: int, price: float, volume: float = 1.0) -> None:
+        """One tick: t in unix ms (broker time), price = bid."""
+        with self._lock:
+            for i, span in enumerate(self._span):
+                start = t - t % span
+                if start == self._t[i]:
+                    if price > self._h[i]: self._h[i] = price
+                    if price < self._l[i]: self._l[i] = price
+                    self._c[i] = price
+                    self._v[i] += volume
+                    self._rev[i] += 1
+                elif start > self._t[i]:
+                    self._roll(i, start, price, price, price, price, volume)
+                # older than the forming bar → late tick for a closed bar, dropped
+            self.ticks += 1
+
+    def on_ticks(self, t: np.ndarray, price: np.ndarray, volume: Optional[np.ndarray] = None) -> None:
+        """A batch of ticks in time order, aggregated per TF with numpy reductions."""
+        t = np.asarray(t, dtype=np.int64)
+        price = np.asarray(price, dtype=float)
+        volume = np.ones(len(t)) if volume is None else np.asarray(volume, dtype=float)
+        if not len(t):
+            return
+        with self._lock:
+            for i, span in enumerate(self._span):
+                start = t - t % span
+                keep = start >= self._t[i]
+                if not keep.all():
+                    s_, p_, v_ = start[keep], price[keep], volume[keep]
+                else:
+                    s_, p_, v_ = start, price, volume
+                if not len(s_):
+                    continue
+                cuts = np.flatnonzero(s_[1:] != s_[:-1]) + 1
+                first = np.r_[0, cuts]
+                last = np.r_[cuts, len(s_)] - 1
+                highs = np.maximum.reduceat(p_, first)
+                lows = np.minimum.reduceat(p_, first)
+                vols = np.add.reduceat(v_, first)
+                for j in range(len(first)):
+                    b = int(s_[first[j]])
+                    if b == self._t[i]:
+                        self._h[i] = max(self._h[i], float(highs[j]))
+                        self._l[i] = min(self._l[i], float(lows[j]))
+                        self._c[i] = float(p_[last[j]])
+                        self._v[i] += float(vols[j])
+                        self._rev[i] += 1
+                    else:
+                        self._roll(i, b, float(p_[first[j]]), float(highs[j]), float(lows[j]),
+                                   float(p_[last[j]]), float(vols[j]))
+            self.ticks += len(t)
+
+    # ── reads ───────────────────────────────────────────────────────────────
+    def forming(self, tf: str) -> Optional[Dict[str, float]]:
+        i = self.tfs.index(tf)
+        with self._lock:
+            if self._t[i] < 0:
+                return None
+            return {"t": self._t[i], "o": self._o[i], "h": self._h[i], "l": self._l[i], "c": self._c[i], "v": self._v[i]}
+
+    def rating(self, tf: str, *, trace: bool = False) -> Optional[Dict[str, Any]]:
+        """Rating of closed history + forming bar; None until there is enough of both."""
+        i = self.tfs.index(tf)
+        with self._lock:
+            if self._t[i] < 0:
+                return None
+            cached = self._rated[i]
+            if cached is not None and cached[0] == self._rev[i] and not trace:
+                return cached[1]
+            bar = (self._o[i], self._h[i], self._l[i], self._c[i], self._v[i])
+            if self._stale[i]:
+                self._frozen[i] = tv_frozen_state(self._closed_df(i)) if len(self._closed[i]) >= LIVE_MIN_BARS else None
+                self._stale[i] = False
+            if self._frozen[i] is not None:
+                out = tv_live_rating(self._frozen[i], *bar, trace=trace)
+            elif len(self._closed[i]) >= MIN_FALLBACK_BARS:
+                # Short history: no frozen state, run the full pipeline instead.
+                df = pd.concat([self._closed_df(i), pd.DataFrame([(self._t[i], *bar)], columns=list("tohlcv"))],
+                               ignore_index=True)
+                out = tv_rating_for_df(df, trace=trace)
+            else:
+                return None
+            out["t"] = self._t[i]
+            if not trace:
+                self._rated[i] = (self._rev[i], out)
+            return out
+
+    def _closed_df(self, i: int) -> pd.DataFrame:
+        return pd.DataFrame(list(self._closed[i]), columns=list("tohlcv"))
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Tick sources
+def read_tick_file(path: str, symbol: Optional[str] = None, chunksize: int = 100_000) -> Iterator[Tuple[str, np.ndarray, np.ndarray, np.ndarray]]:
+    """
+    Replay a CSV of ticks in file order, yielding (symbol, time_ms, bid, volume) batches.
+    Columns: time_msc (or time in seconds), bid, optional volume, optional symbol.
+    """
+    for chunk in pd.read_csv(path, chunksize=chunksize):
+        t = chunk["time_msc"] if "time_msc" in chunk else (chunk["time"] * 1000)
+        t = t.to_numpy(dtype=np.int64)
+        bid = chunk["bid"].to_numpy(dtype=float)
+        vol = chunk["volume"].to_numpy(dtype=float) if "volume" in chunk else np.ones(len(chunk))
+        if "symbol" not in chunk:
+            yield symbol or "", t, bid, vol
+            continue
+        syms = chunk["symbol"].to_numpy()
+        for sym in pd.unique(syms):
+            m = syms == sym
+            yield str(sym), t[m], bid[m], vol[m]
+
+
+def mt5_new_ticks(symbol: str, since_ms: int, seen: int) -> Tuple[np.ndarray, np.ndarray, int, int]:
+    """
+    Ticks after `since_ms` from the terminal. `seen` is how many ticks stamped
+    exactly `since_ms` were already consumed (several ticks can share one ms).
+    Returns (time_ms, bid, new_since_ms, new_seen).
+    """
+    ensure_connected()
+    ticks = mt5.copy_ticks_from(symbol, since_ms // 1000, 100_000, mt5.COPY_TICKS_ALL)
+    if ticks is None or len(ticks) == 0:
+        return np.empty(0, np.int64), np.empty(0), since_ms, seen
+    tm = ticks["time_msc"].astype(np.int64)
+    mask = tm > since_ms
+    mask[np.flatnonzero(tm == since_ms)[seen:]] = True
+    mask &= ticks["bid"] > 0
+    new_since = int(tm[-1])
+    new_seen = int(np.count_nonzero(tm == new_since))
+    return tm[mask], ticks["bid"][mask].astype(float), new_since, new_seen
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Live books fed from MT5
+books: Dict[str, TickBook] = {}
+
+
+def seed_from_mt5(symbol: str, tfs: Sequence[str]) -> Tuple[TickBook, int]:
+    """Book with closed history and the current forming bar for every TF; returns (book, last tick ms)."""
+    ensure_connected()
+    book = TickBook(symbol, tfs)
+    since = 0
+    for tf in tfs:
+        candles = fetch_candles(symbol, tf, LIVE_HISTORY)
+        forming = mt5.copy_rates_from_pos(symbol, TIMEFRAME[tf], 0, 1)
+        bar = None
+        if forming is not None and len(forming):
+            r = forming[0]
+            bar = (int(r["time"] * 1000), float(r["open"]), float(r["high"]), float(r["low"]), float(r["close"]), float(r["tick_volume"]))
+        if candles:
+            book.seed(tf, pd.DataFrame([c.dict() for c in candles]), bar)
+    tick = mt5.symbol_info_tick(symbol)
+    if tick is not None:
+        since = int(tick.time_msc)
+    return book, since
+
+
+async def run_tick_stream(symbols: Sequence[str], tfs: Sequence[str], poll_seconds: float = 0.25) -> None:
+    """Seed every symbol, then keep pulling new ticks into its book."""
+    cursors: Dict[str, Tuple[int, int]] = {}
+    for sym in symbols:
+        try:
+            book, since = await asyncio.to_thread(seed_from_mt5, sym, tfs)
+        except Exception:
+            log.exception("tick stream: seeding %s failed", sym)
+            continue
+        books[sym] = book
+        cursors[sym] = (since, 1)
+
+    def poll() -> None:
+        for sym, (since, seen) in cursors.items():
+            t, bid, since, seen = mt5_new_ticks(sym, since, seen)
+            cursors[sym] = (since, seen)
+            if len(t):
+                books[sym].on_ticks(t, bid)
+
+    while True:
+        try:
+            await asyncio.to_thread(poll)
+        except Exception:
+            log.exception("tick stream poll failed")
+        await asyncio.sleep(poll_seconds)
+
+
+if __name__ == "__main__":
+    # Replay a tick file and report throughput:  python -m controllers.ticks ticks.csv [SYMBOL]
+    import sys
+    import time
+
+    replay: Dict[str, TickBook] = {}
+    n, began = 0, time.perf_counter()
+    for sym, t, bid, vol in read_tick_file(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else None):
+        replay.setdefault(sym, TickBook(sym)).on_ticks(t, bid, vol)
+        n += len(t)
+    took = time.perf_counter() - began
+    print(f"{n} ticks in {took:.3f}s → {n / max(took, 1e-9):,.0f} ticks/s")
+    for sym, book in replay.items():
+        for tf in book.tfs:
+            r = book.rating(tf)
+            print(sym, tf, book.forming(tf), r and (r["score"], r["rating"]))
@@ -0,0 +1,239 @@
+"""
+All TradingView scanner access, through one scheduler.
+
+- A host-wide token bucket (kept in the shared cache store) caps calls/second.
+- Two lanes: INTERACTIVE (user queries) always goes ahead of BACKGROUND
+  (bulk sweeps nobody waits on); within a lane it is first come, first served. The order
+  holds inside one process only: the token bucket is host-wide, the queues
+  are not, so another worker's BACKGROUND call can take a slot first.
+- Symbol lists are split into chunks of TV_CHUNK, each cached and fetched on its own.
+- 429/5xx/network errors put the bucket on hold with exponential backoff
+  (or the server's Retry-After) and the call is retried while its deadline allows.
+- A call that cannot get a slot before its deadline, or finds its lane's queue
+  full, is shed: the caller gets the last cached (stale) data instead, and only
+  fails if there is none. A cache load is leased per lane, so an INTERACTIVE
+  caller never waits on a BACKGROUND load of the same chunk.
+- The BACKGROUND lane is fed by run_prewarmer, which reloads the heatmap
+  chunks ahead of their expiry so interactive pages are served from cache.
+"""
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from controllers.shared_cache import cache
+
+log = logging.getLogger(__name__)
+
+INTERACTIVE, BACKGROUND = "interactive", "background"
+LANES = (INTERACTIVE, BACKGROUND)
+
+# TradingView summaries are shared by every worker on the host for this long.
+TV_CACHE_TTL = float(os.getenv("TV_CACHE_TTL", "30"))
+TV_RATE = float(os.getenv("TV_RATE", "2"))       # scanner calls per second, host-wide
+TV_BURST = float(os.getenv("TV_BURST", "7"))     # one heatmap sweep
+TV_CHUNK = int(os.getenv("TV_CHUNK", "100"))     # symbols per scanner call
+TV_TIMEOUT = float(os.getenv("TV_TIMEOUT", "10"))
+BUCKET = "tradingview"
+
+
+class Shed(Exception):
+    """No upstream slot in time (queue full or deadline); serve cached data instead."""
+
+
+class UpstreamError(Exception):
+    """The scanner throttled us (429), failed (5xx) or could not be reached."""
+
+    def __init__(self, status: Optional[int], retry_after: Optional[float] = None, detail: str = ""):
+        super().__init__(f"TradingView scanner {'HTTP ' + str(status) if status else 'unreachable'} {detail}".strip())
+        self.status = status
+        self.retry_after = retry_after
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Scanner call
+def scan(screener: str, interval: str, symbols: Sequence[str]) -> Dict[str, Optional[dict]]:
+    """One scanner request → {EXCHANGE:SYMBOL: summary | None}, like get_multiple_analysis but status-aware."""
+    import requests
+    from tradingview_ta import TradingView, __version__
+    from tradingview_ta.main import calculate
+
+    # TV_SCAN_URL points the scanner client somewhere else (e.g. bench/scanner_replay.py).
+    base = (os.getenv("TV_SCAN_URL") or TradingView.scan_url).rstrip("/") + "/"
+    keys = TradingView.indicators
+    try:
+        resp = requests.post(f"{base}{screener.lower()}/scan", json=TradingView.data(list(symbols), interval, keys),
+                             headers={"User-Agent": f"tradingview_ta/{__version__}"}, timeout=TV_TIMEOUT)
+    except requests.RequestException as e:
+        raise UpstreamError(None, detail=type(e).__name__) from e
+    if resp.status_code == 429 or resp.status_code >= 500:
+        retry_after = resp.headers.get("Retry-After")
+        raise UpstreamError(resp.status_code, float(retry_after) if retry_after and retry_after.isdigit() else None)
+    resp.raise_for_status()
+
+    out: Dict[str, Optional[dict]] = {s.upper(): None for s in symbols}
+    for row in resp.json()["data"]:
+        exchange, ticker = row["s"].split(":")
+        analysis = calculate(indicators=dict(zip(keys, row["d"])), indicators_key=keys, screener=screener,
+                             symbol=ticker, exchange=exchange, interval=interval)
+        out[row["s"]] = analysis.summary if analysis else None
+    return out
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Scheduler
+class _LaneStats:
+    def __init__(self):
+        self.counts = {"submitted": 0, "completed": 0, "rejected": 0, "shed": 0, "upstream_errors": 0, "retries": 0}
+        self.waits: Deque[float] = deque(maxlen=2000)
+
+    def snapshot(self, depth: int) -> Dict[str, Any]:
+        w = np.array(self.waits) * 1000.0
+        return {**self.counts, "queued": depth,
+                "wait_ms": {"p50": round(float(np.percentile(w, 50)), 2) if len(w) else None,
+                            "p95": round(float(np.percentile(w, 95)), 2) if len(w) else None,
+                            "max": round(float(w.max()), 2) if len(w) else None}}
+
+
+class UpstreamScheduler:
+    def __init__(self, rate: float = TV_RATE, burst: float = TV_BURST,
+                 max_wait: Optional[Dict[str, float]] = None, max_queue: Optional[Dict[str, int]] = None,
+                 max_attempts: int = 3, backoff_base: float = 1.0, backoff_cap: float = 60.0):
+        self.rate, self.burst = rate, burst
+        self.max_wait = max_wait or {INTERACTIVE: 5.0, BACKGROUND: 20.0}
+        self.max_queue = max_queue or {INTERACTIVE: 64, BACKGROUND: 16}
+        self.max_attempts = max_attempts
+        self.backoff_base, self.backoff_cap = backoff_base, backoff_cap
+        self._backoff = 0.0
+        self._cond = threading.Condition()
+        self._queues: Dict[str, Deque[object]] = {lane: deque() for lane in LANES}
+        self._stats = {lane: _LaneStats() for lane in LANES}
+
+    def _count(self, lane: str, name: str) -> None:
+        with self._cond:
+            self._stats[lane].counts[name] += 1
+
+    def _ahead(self, lane: str, ticket: object) -> int:
+        """Callers that will be served before `ticket`."""
+        n = 0
+        for other in LANES:
+            if other == lane:
+                return n + self._queues[lane].index(ticket)
+            n += len(self._queues[other])
+        return n
+
+    def _acquire(self, lane: str, deadline: float) -> None:
+        began = time.monotonic()
+        stats = self._stats[lane]
+        with self._cond:
+            queue = self._queues[lane]
+            if len(queue) >= self.max_queue[lane]:
+                stats.counts["rejected"] += 1
+                raise Shed(f"{lane} queue full")
+            ticket = object()
+            queue.append(ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    ahead = self._ahead(lane, ticket)
+                    wait = cache.take(BUCKET, self.rate, self.burst) if ahead == 0 else 0.0
+                    if ahead == 0 and wait == 0:
+                        stats.waits.append(now - began)
+                        return
+                    # Shed as soon as the slot clearly can't come in time, not at the deadline.
+                    if now + wait + ahead / self.rate > deadline:
+                        stats.counts["shed"] += 1
+                        raise Shed(f"no {lane} slot within {self.max_wait[lane]:.0f}s")
+                    self._cond.wait(min(wait, deadline - now) if ahead == 0 else deadline - now)
+            finally:
+                queue.remove(ticket)
+                self._cond.notify_all()
+
+    def run(self, fn: Callable[[], Any], lane: str = INTERACTIVE, timeout: Optional[float] = None) -> Any:
+        """Call `fn` once a slot is free in `lane`; retries on UpstreamError while the deadline allows."""
+        deadline = time.monotonic() + (timeout if timeout is not None else self.max_wait[lane])
+        self._count(lane, "submitted")
+        for attempt in range(self.max_attempts):
+            self._acquire(lane, deadline)
+            try:
+                result = fn()
+            except UpstreamError as e:
+                self._count(lane, "upstream_errors")
+                self._back_off(e.retry_after)
+                log.warning("tradingview: %s (attempt %d)", e, attempt + 1)
+                if attempt + 1 == self.max_attempts:
+                    raise
+                self._count(lane, "retries")
+                continue
+            self._backoff = 0.0
+            self._count(lane, "completed")
+            return result
+
+    def _back_off(self, retry_after: Optional[float]) -> None:
+        self._backoff = min(max(self._backoff * 2, self.backoff_base), self.backoff_cap)
+        cache.hold(BUCKET, max(retry_after or 0.0, self._backoff * random.uniform(0.5, 1.0)))
+        with self._cond:
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            lanes = {lane: self._stats[lane].snapshot(len(self._queues[lane])) for lane in LANES}
+        return {"rate": self.rate, "burst": self.burst, "backoff_seconds": self._backoff, "lanes": lanes}
+
+
+scheduler = UpstreamScheduler()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Cached summaries
+def tv_summaries(screener: str, interval: str, symbols: Sequence[str],
+                 lane: str = INTERACTIVE, refresh_ahead: float = 0.0) -> Tuple[Dict[str, Optional[dict]], bool]:
+    """
+    ({symbol: summary | None}, stale) for `symbols`, upper-cased, in request order.
+    `stale` is True when upstream was unavailable and older cached data was served.
+    """
+    wanted = list(dict.fromkeys(s.upper() for s in symbols))
+    for symbol in wanted:
+        exchange, _, ticker = symbol.partition(":")
+        if not exchange or not ticker or ":" in ticker:
+            raise ValueError(f"Invalid symbol '{symbol}', expected EXCHANGE:SYMBOL.")
+    canonical = sorted(wanted)
+    out: Dict[str, Optional[dict]] = {}
+    stale = False
+    for i in range(0, len(canonical), TV_CHUNK):
+        chunk = tuple(canonical[i:i + TV_CHUNK])
+        key = ("tv", screener, interval, chunk)
+        try:
+            part = cache.get_or_load(key, TV_CACHE_TTL,
+                                     lambda: scheduler.run(lambda: scan(screener, interval, chunk), lane),
+                                     lease_seconds=60.0, lease=key + (lane,),
+                                     wait_seconds=scheduler.max_wait[lane], refresh_ahead=refresh_ahead)
+        except (Shed, UpstreamError, TimeoutError):
+            old = cache.get(key)
+            if old is None:
+                raise
+            part, stale = old[0], True
+        out.update(part)
+    return {s: out.get(s) for s in wanted}, stale
+
+
+async def run_prewarmer(screener: str, intervals: Sequence[str], symbols: Sequence[str],
+                        every: float = TV_CACHE_TTL / 3) -> None:
+    """
+    Keep `symbols` cached on every interval through the BACKGROUND lane: each
+    pass reloads chunks in the last half of their TTL, so INTERACTIVE readers
+    (the heatmap) hit the cache instead of queueing for the scanner.
+    """
+    while True:
+        for interval in intervals:
+            try:
+                await asyncio.to_thread(tv_summaries, screener, interval, symbols, BACKGROUND, TV_CACHE_TTL / 2)
+            except Exception as e:
+                log.warning("tradingview prewarm %s %s: %s", screener, interval, e)
+        await asyncio.sleep(every)
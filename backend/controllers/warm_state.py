@@ -0,0 +1,177 @@
+"""
+Warm restart: candle blocks and rating snapshots saved on shutdown, restored on boot.
+
+File layout: MAGIC, header length (u8), JSON header (keys, expiries, numpy
+dtype descriptions, snapshots), then each rates array as raw bytes at a
+64-byte aligned offset. On restore the file is memory-mapped
+and the arrays are numpy views over it, so nothing is parsed or copied up
+front. Restored entries keep their original expiry; whatever went stale is
+topped up by the normal cache paths (fetch_rates only pulls the missing bars,
+refresh_cell only recomputes cells whose bar moved on).
+
+WARM_STATE_PATH picks the file; WARM_STATE=0 turns it off. By default it lives
+in a per-user cache directory created 0700. The file is written 0600, and a
+file that is not ours or is readable by others is never loaded.
+"""
+import json
+import logging
+import mmap
+import os
+import stat
+import struct
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from controllers.candles import TF_SECONDS
+from controllers.screener import index
+from controllers.shared_cache import cache
+
+log = logging.getLogger(__name__)
+
+ENABLED = os.getenv("WARM_STATE", "1").lower() not in ("0", "off", "false")
+STATE_DIR = os.path.join(os.getenv("LOCALAPPDATA") or os.getenv("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"),
+                         "fundamental-dashboard")
+PATH = os.getenv("WARM_STATE_PATH") or os.path.join(STATE_DIR, "warm.bin")
+MAGIC = b"FDWARM02"
+ALIGN = 64
+
+_mapped: List[mmap.mmap] = []  # keeps restored arrays' buffers alive
+
+
+def save(path: str = PATH) -> Dict[str, int]:
+    """Write every cached rates block and snapshot to `path` (atomically)."""
+    rates, snapshots = [], []
+    for key, value, expires in cache.items(("rates", "snapshot")):
+        if key[0] == "rates" and isinstance(value, np.ndarray) and len(value):
+            rates.append((key, value, expires))
+        elif key[0] == "snapshot" and value is not None:
+            snapshots.append((key, value, expires))
+
+    entries: List[List[Any]] = []
+    offset = 0
+    for key, arr, expires in rates:
+        entries.append([list(key), expires, arr.dtype.descr, offset, len(arr)])
+        offset += -(-arr.nbytes // ALIGN) * ALIGN
+    header = json.dumps({"saved_at": time.time(), "rates": entries,
+                         "snapshots": [[list(key), snap, expires] for key, snap, expires in snapshots]},
+                        default=_json_default).encode()
+    base = -(-(len(MAGIC) + 8 + len(header)) // ALIGN) * ALIGN
+
+    os.makedirs(os.path.dirname(path) or ".", mode=0o700, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0)
+    try:
+        fd = os.open(tmp, flags, 0o600)
+    except FileExistsError:  # left over from a crash; never write through whatever is there
+        os.unlink(tmp)
+        fd = os.open(tmp, flags, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(MAGIC + struct.pack("<Q", len(header)) + header)
+        for (_, arr, _), (_, _, _, off, _) in zip(rates, entries):
+            f.seek(base + off)
+            f.write(np.ascontiguousarray(arr).tobytes())
+    os.replace(tmp, path)
+    return {"rates": len(rates), "snapshots": len(snapshots), "bytes": base + offset}
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _dtype(descr: Any) -> np.dtype:
+    # JSON turns the (name, format) pairs of a structured dtype into lists.
+    return np.dtype(descr if isinstance(descr, str) else [tuple(field) for field in descr])
+
+
+def _open_private(path: str) -> Optional[int]:
+    """Read-only fd for `path` if it is a regular file owned by us and not accessible to others."""
+    try:
+        fd = os.open(path, os.O_RDONLY | getattr(os, "O_NOFOLLOW", 0) | getattr(os, "O_BINARY", 0))
+    except FileNotFoundError:
+        return None
+    except OSError as e:  # e.g. ELOOP: a symlink where the file should be
+        log.warning("warm state: ignoring %s: %s", path, e.strerror)
+        return None
+    st = os.fstat(fd)
+    problem = None
+    if not stat.S_ISREG(st.st_mode):
+        problem = "not a regular file"
+    elif hasattr(os, "geteuid") and st.st_uid != os.geteuid():
+        problem = f"owned by uid {st.st_uid}"
+    elif hasattr(os, "geteuid") and st.st_mode & 0o077:
+        problem = f"mode {stat.S_IMODE(st.st_mode):o} (must not be group/other accessible)"
+    if problem:
+        os.close(fd)
+        log.warning("warm state: ignoring %s: %s", path, problem)
+        return None
+    return fd
+
+
+def restore(path: str = PATH) -> Optional[Dict[str, int]]:
+    """Load `path` into the cache and the screener index; None if there is no usable file."""
+    fd = _open_private(path)
+    if fd is None:
+        return None
+    try:
+        mm = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+    finally:
+        os.close(fd)
+    if mm[:len(MAGIC)] != MAGIC:
+        log.warning("warm state: %s is not a state file, ignoring it", path)
+        return None
+    (size,) = struct.unpack_from("<Q", mm, len(MAGIC))
+    start = len(MAGIC) + 8
+    state = json.loads(mm[start:start + size])
+    base = -(-(start + size) // ALIGN) * ALIGN
+    _mapped.append(mm)
+
+    now = time.time()
+    # Stale rates stay as top-up bases; a snapshot stays right while its bar is the last closed one.
+    snapshots = [(tuple(key), snap) for key, snap, _ in state["snapshots"]]
+    entries = [(tuple(key), np.frombuffer(mm, dtype=_dtype(descr), count=n, offset=base + off), expires - now)
+               for key, expires, descr, off, n in state["rates"]]
+    entries += [(key, snap, 2 * TF_SECONDS[key[2]]) for key, snap in snapshots]
+    cache.put_many(entries)
+    latest: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    for key, snap in snapshots:
+        _, symbol, tf, t, _count = key
+        if t > latest.get((symbol, tf), {}).get("t", -1):
+            latest[(symbol, tf)] = snap
+    for (symbol, tf), snap in latest.items():
+        if tf in index.tfs:
+            index.update(symbol, tf, snap)
+    return {"rates": len(state["rates"]), "snapshots": len(state["snapshots"]),
+            "age_seconds": int(now - state["saved_at"])}
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Lifespan hooks
+def on_startup() -> None:
+    if not ENABLED:
+        return
+    try:
+        began = time.perf_counter()
+        restored = restore()
+    except Exception:
+        log.exception("warm state: could not restore %s", PATH)
+        return
+    if restored:
+        log.info("warm state: restored %d candle blocks and %d snapshots saved %ds ago in %.1f ms",
+                 restored["rates"], restored["snapshots"], restored["age_seconds"],
+                 (time.perf_counter() - began) * 1000)
+
+
+def on_shutdown() -> None:
+    # With several workers only the one holding the shared store writes the file.
+    if not ENABLED or not cache.owns_store:
+        return
+    try:
+        saved = save()
+    except Exception:
+        log.exception("warm state: could not save %s", PATH)
+        return
+    log.info("warm state: saved %(rates)d candle blocks and %(snapshots)d snapshots (%(bytes)d bytes)", saved)
@@ -1,8 +1,41 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from routes.candles import candle
+from routes.candles import candle, DEFAULT_TFS
 from fastapi.middleware.cors import CORSMiddleware
-from routes.ratings import rating
-app = FastAPI()
+from routes.ratings import rating, DEFAULT_PAIRS_FOREX, TIMEFRAME_MAP
+from routes.screener import screener, SCREENER_SYMBOLS
+from routes.alerts import alert
+from routes.live import live
+from routes.history import history
+from routes.correlations import correlations
+from controllers.screener import run_refresher
+from controllers.tradingview import run_prewarmer
+from controllers.history import writer as history_writer
+from controllers import warm_state
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Serve the last run's candles and ratings right away; the refresher tops up what went stale.
+    await asyncio.to_thread(warm_state.on_startup)
+    # Keep the screener index current: refreshed whenever a bar closes.
+    tasks = [asyncio.create_task(run_refresher(SCREENER_SYMBOLS, DEFAULT_TFS))]
+    # Keep the heatmap's TradingView summaries warm through the BACKGROUND lane (TV_PREWARM=0 turns it off).
+    if os.getenv("TV_PREWARM", "1").lower() not in ("0", "off", "false"):
+        tasks.append(asyncio.create_task(run_prewarmer("forex", list(TIMEFRAME_MAP.values()), DEFAULT_PAIRS_FOREX)))
+    # Intrabar ratings from ticks are opt-in: LIVE_TICKS=1
+    if os.getenv("LIVE_TICKS"):
+        from controllers.ticks import run_tick_stream
+        tasks.append(asyncio.create_task(run_tick_stream(SCREENER_SYMBOLS, DEFAULT_TFS)))
+    yield
+    for task in tasks:
+        task.cancel()
+    await asyncio.to_thread(warm_state.on_shutdown)
+    # Write out rating snapshots still queued for Mongo.
+    await asyncio.to_thread(history_writer.close)
+
+app = FastAPI(lifespan=lifespan)
 # Allow CORS for your frontend
 app.add_middleware(
     CORSMiddleware,
@@ -13,4 +46,8 @@ app.add_middleware(
 )
 app.include_router(candle)
 app.include_router(rating)
-
+app.include_router(screener)
+app.include_router(alert)
+app.include_router(live)
+app.include_router(history)
+app.include_router(correlations)
@@ -0,0 +1,40 @@
+from fastapi import APIRouter, Query, HTTPException
+from controllers.alerts import changes, alerts, engine
+from schemas.alerts import AlertRule
+alert = APIRouter()
+
+@alert.get("/events")
+def rating_changes(
+    cursor: int = Query(0, ge=0, description="Last seq already seen; 0 for everything still kept"),
+    limit: int = Query(500, ge=1, le=5000),
+):
+    """
+    Rating changes per (symbol, TF), oldest first.
+    Pass the returned `cursor` on the next call; `missed` means events were dropped in between.
+    """
+    return changes.read(cursor, limit)
+
+@alert.get("/alerts")
+def fired_alerts(
+    cursor: int = Query(0, ge=0),
+    limit: int = Query(500, ge=1, le=5000),
+):
+    return alerts.read(cursor, limit)
+
+@alert.get("/alerts/rules")
+def list_rules():
+    return {"rules": engine.rules()}
+
+@alert.post("/alerts/rules")
+def create_rule(rule: AlertRule):
+    """Example: {"rating": "Strong Buy", "min_tfs": 3} → fires when a pair reaches Strong Buy on 3+ TFs."""
+    try:
+        return {"id": engine.add_rule(rule)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@alert.delete("/alerts/rules/{rule_id}")
+def delete_rule(rule_id: str):
+    if not engine.remove_rule(rule_id):
+        raise HTTPException(status_code=404, detail=f"No rule '{rule_id}'.")
+    return {"deleted": rule_id}
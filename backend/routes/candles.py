@@ -1,10 +1,35 @@
-from typing import List, Dict, Optional
+import json
+from typing import List, Dict, Optional, Union
 from fastapi import Query, HTTPException, APIRouter
-from controllers.candles import fetch_all_tfs_for_symbol, fetch_candles
-from schemas.candles import Candle
+from controllers.candles import fetch_all_tfs_for_symbol, fetch_candles, sync_candles, TIMEFRAME
+from schemas.candles import Candle, CandleSync, CandleSyncRequest
 candle = APIRouter()
 DEFAULT_TFS: List[str] = ["M1","M5","M15","M30","H1","H4","D"]
 
+def _parse_cursors(cursors: Optional[str]) -> Optional[dict]:
+    """The `cursors` JSON object of the multi-candle routes; None when not syncing."""
+    if cursors is None:
+        return None
+    try:
+        parsed = json.loads(cursors)
+    except ValueError:
+        parsed = None
+    if not isinstance(parsed, dict):
+        raise HTTPException(status_code=400, detail="cursors must be a JSON object.")
+    return parsed
+
+def _tf_cursors(obj, where: str) -> Dict[str, Optional[str]]:
+    """{TF: cursor string or null}, else 400."""
+    if not isinstance(obj, dict) or not all(isinstance(v, str) or v is None for v in obj.values()):
+        raise HTTPException(status_code=400, detail=f'cursors{where} must map TFs to cursor strings, e.g. {{"H1": "<cursor>"}}.')
+    return obj
+
+def _sync(symbol: str, tf: str, count: int, cursor: Optional[str]) -> dict:
+    try:
+        return sync_candles(symbol, tf, count, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @candle.get("/candles/{symbol}/all")
 def candles_all_tfs_for_symbol(
     symbol: str,
@@ -12,17 +37,40 @@ def candles_all_tfs_for_symbol(
     tfs: Optional[List[str]] = Query(
         None, description="Repeat param e.g. tfs=M1&tfs=H1; defaults to all"
     ),
+    cursors: Optional[str] = Query(
+        None, description='Incremental sync: JSON {"H1": "<cursor>", ...}; TFs without one get everything'
+    ),
 ):
     use_tfs = tfs or DEFAULT_TFS
+    sync = _parse_cursors(cursors)
+    if sync is not None:
+        sync = _tf_cursors(sync, "")
+        return {"symbol": symbol,
+                "timeframes": {tf: _sync(symbol, tf, count, sync.get(tf)) for tf in use_tfs if tf in TIMEFRAME}}
     return {
         "symbol": symbol,
         "timeframes": { tf: [c.dict() for c in candles]
                         for tf, candles in fetch_all_tfs_for_symbol(symbol, use_tfs, count).items() }
     }
 
-@candle.get("/candles/{symbol}/{tf}", response_model=List[Candle])
-def get_candles(symbol: str, tf: str, count: int = 300):
-    return fetch_candles(symbol, tf, count)
+@candle.get("/candles/{symbol}/{tf}", response_model=Union[List[Candle], CandleSync])
+def get_candles(
+    symbol: str,
+    tf: str,
+    count: int = 300,
+    since: Optional[int] = Query(None, description="Only bars newer than this open time (unix ms)"),
+    cursor: Optional[str] = Query(None, description="Cursor from the previous sync; detects revised bars"),
+):
+    """
+    All `count` bars, or with `since` / `cursor` only the new ones:
+    {"candles": [...], "cursor": ..., "replace_from": ...}.
+    """
+    if since is None and cursor is None:
+        return fetch_candles(symbol, tf, count)
+    try:
+        return sync_candles(symbol, tf, count, since=since, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @candle.get("/candles/all")
 def candles_all(
@@ -34,6 +82,10 @@ def candles_all(
     tfs: Optional[List[str]] = Query(
         None, description="Repeat param: tfs=M15&tfs=H1; defaults to all"
     ),
+    cursors: Optional[str] = Query(
+        None, description='Incremental sync: JSON {"EURUSD": {"H1": "<cursor>"}, ...}; pairs without one get everything. '
+                          'For many pairs use POST /candles/all, which takes them in the body.'
+    ),
 ):
     syms: List[str] = symbols or []
     if symbols_csv:
@@ -44,6 +96,11 @@ def candles_all(
         raise HTTPException(status_code=400, detail="At least one symbol is required.")
 
     use_tfs = tfs or DEFAULT_TFS
+    sync = _parse_cursors(cursors)
+
+    if sync is not None:
+        per_symbol = {str(k).upper(): _tf_cursors(v, f".{k}") for k, v in sync.items()}
+        return _sync_all(syms, use_tfs, count, per_symbol)
 
     result: Dict[str, Dict[str, List[dict]]] = {}
     for sym in syms:
@@ -51,3 +108,18 @@ def candles_all(
         result[sym] = { tf: [c.dict() for c in candles] for tf, candles in tf_map.items() }
 
     return result
+
+@candle.post("/candles/all")
+def candles_sync_all(body: CandleSyncRequest):
+    """
+    Same as GET /candles/all with `cursors`, for clients syncing many pairs:
+    a cursor for every pair × TF no longer fits in a URL.
+    """
+    syms = [s.upper() for s in body.symbols]
+    if not syms:
+        raise HTTPException(status_code=400, detail="At least one symbol is required.")
+    return _sync_all(syms, body.tfs or DEFAULT_TFS, body.count, {k.upper(): v for k, v in body.cursors.items()})
+
+def _sync_all(syms: List[str], tfs: List[str], count: int, cursors: Dict[str, Dict[str, Optional[str]]]) -> dict:
+    return {sym: {tf: _sync(sym, tf, count, cursors.get(sym, {}).get(tf)) for tf in tfs if tf in TIMEFRAME}
+            for sym in syms}
@@ -0,0 +1,19 @@
+from fastapi import APIRouter, Query, HTTPException
+from controllers.candles import TIMEFRAME
+from controllers.correlations import correlations as rolling_correlations, MAX_WINDOW
+from routes.ratings import DEFAULT_PAIRS_FOREX
+correlations = APIRouter()
+
+CORRELATION_SYMBOLS = [p.split(":", 1)[-1] for p in DEFAULT_PAIRS_FOREX]
+
+@correlations.get("/correlations/{tf}")
+def get_correlations(tf: str, window: int = Query(100, ge=2, le=MAX_WINDOW, description="Bars of returns")):
+    """
+    Rolling correlation of bar-to-bar log returns between the default forex pairs:
+    {"symbols": [...], "matrix": [[...]]}, matrix[i][j] for symbols[i] vs symbols[j].
+    Updated incrementally as bars close.
+    """
+    tf = tf.upper()
+    if tf not in TIMEFRAME:
+        raise HTTPException(status_code=400, detail=f"Unknown timeframe '{tf}'.")
+    return rolling_correlations(CORRELATION_SYMBOLS, tf, window)
@@ -0,0 +1,45 @@
+import time
+from typing import Optional
+from fastapi import APIRouter, Query, HTTPException
+from controllers.candles import TF_SECONDS
+from controllers.history import history as read_history, rating_at
+history = APIRouter()
+
+def _check_tf(tf: str) -> str:
+    tf = tf.upper()
+    if tf not in TF_SECONDS:
+        raise HTTPException(status_code=400, detail=f"Unknown timeframe '{tf}'.")
+    return tf
+
+@history.get("/history/{symbol}/{tf}")
+def rating_history(
+    symbol: str,
+    tf: str,
+    start: Optional[int] = Query(None, description="Unix ms, inclusive; defaults to 24h before `end`"),
+    end: Optional[int] = Query(None, description="Unix ms, inclusive; defaults to now"),
+):
+    """
+    Stored rating snapshots in a time range, as columns ready for charting:
+    {"t": [...], "score": [...], "rating": [...]}.
+    """
+    tf = _check_tf(tf)
+    end = end if end is not None else int(time.time() * 1000)
+    start = start if start is not None else end - 86_400_000
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must be <= end.")
+    try:
+        return read_history(symbol.upper(), tf, start, end)
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Rating history unavailable: {e}")
+
+@history.get("/history/{symbol}/{tf}/at")
+def rating_history_at(symbol: str, tf: str, t: int = Query(..., description="Unix ms")):
+    """The rating in force at `t`, e.g. EURUSD H4 at 08:00 yesterday."""
+    tf = _check_tf(tf)
+    try:
+        snap = rating_at(symbol.upper(), tf, t)
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Rating history unavailable: {e}")
+    if snap is None:
+        raise HTTPException(status_code=404, detail=f"No stored rating for {symbol.upper()} {tf} at or before {t}.")
+    return snap
@@ -0,0 +1,24 @@
+from typing import List, Optional
+from fastapi import APIRouter, Query, HTTPException
+live = APIRouter()
+
+@live.get("/ratings/live/{symbol}")
+def live_ratings(
+    symbol: str,
+    tfs: Optional[List[str]] = Query(None, description="Repeat param e.g. tfs=M15&tfs=H1; defaults to all"),
+    trace: bool = False,
+):
+    """
+    Intrabar ratings: closed history plus the bar that is still forming, kept
+    current from the tick stream (start the API with LIVE_TICKS=1).
+    """
+    from controllers.ticks import books  # pulls in pandas/ta; only needed with LIVE_TICKS=1
+    book = books.get(symbol.upper())
+    if book is None:
+        raise HTTPException(status_code=404, detail=f"No live tick stream for '{symbol}'.")
+    use_tfs = [tf for tf in (tfs or book.tfs) if tf in book.tfs]
+    return {
+        "symbol": book.symbol,
+        "ticks": book.ticks,
+        "timeframes": {tf: {"bar": book.forming(tf), "rating": book.rating(tf, trace=trace)} for tf in use_tfs},
+    }
@@ -1,9 +1,7 @@
-from typing import List, Dict, Optional
+import asyncio
+from typing import List, Optional
 from fastapi import APIRouter,Query, HTTPException
-from controllers.candles import fetch_candles, TIMEFRAME
-import pandas as pd
-from controllers.ratings import compute_score_from_closes, rating_from_score,tv_rating_for_df
-from tradingview_ta import TA_Handler, Interval, Exchange, get_multiple_analysis
+from controllers.tradingview import tv_summaries, scheduler, Shed, UpstreamError, INTERACTIVE
 rating = APIRouter()
 
 DEFAULT_TFS: List[str] = ["M1","M5","M15","M30","H1","H4","D"]
@@ -105,19 +103,24 @@ DEFAULT_PAIRS_FOREX = [
     "oanda:NZDJPY", "oanda:NZDCHF", "oanda:NZDCAD"
 ]
 
-# A mapping from string timeframes to the Interval enum
+# A mapping from string timeframes to tradingview_ta's Interval values
+# (spelled out so the module, and requests with it, load on first use).
 TIMEFRAME_MAP = {
-    "1m": Interval.INTERVAL_1_MINUTE,
-    "5m": Interval.INTERVAL_5_MINUTES,
-    "15m": Interval.INTERVAL_15_MINUTES,
-    "30m": Interval.INTERVAL_30_MINUTES,
-    "1h": Interval.INTERVAL_1_HOUR,
-    # "2h": Interval.INTERVAL_2_HOURS,
-    "4h": Interval.INTERVAL_4_HOURS,
-    "1d": Interval.INTERVAL_1_DAY,
-    # "1w": Interval.INTERVAL_1_WEEK,
-    # "1M": Interval.INTERVAL_1_MONTH,
+    "1m": "1m",    # Interval.INTERVAL_1_MINUTE
+    "5m": "5m",    # Interval.INTERVAL_5_MINUTES
+    "15m": "15m",  # Interval.INTERVAL_15_MINUTES
+    "30m": "30m",  # Interval.INTERVAL_30_MINUTES
+    "1h": "1h",    # Interval.INTERVAL_1_HOUR
+    # "2h": "2h",  # Interval.INTERVAL_2_HOURS
+    "4h": "4h",    # Interval.INTERVAL_4_HOURS
+    "1d": "1d",    # Interval.INTERVAL_1_DAY
+    # "1w": "1W",  # Interval.INTERVAL_1_WEEK
+    # "1M": "1M",  # Interval.INTERVAL_1_MONTH
 }
+
+# Retry-After sent with a 503 when TradingView is unavailable and nothing is cached.
+SHED_RETRY_AFTER = 5
+
 @rating.get("/get_analysis")
 async def get_analysis(
     # Use Query to define the query parameters.
@@ -145,27 +148,28 @@ async def get_analysis(
         raise HTTPException(status_code=400, detail=f"Invalid timeframe: '{timeframe}'. Please use one of: {', '.join(TIMEFRAME_MAP.keys())}")
 
     try:
-        # Use get_multiple_analysis to fetch data for all symbols in a single request.
-        # This is much more efficient and less likely to hit a rate limit.
-        analysis = get_multiple_analysis(
-            screener=screener.lower(),
-            interval=interval_enum,
-            symbols=target_symbols
-        )
+        # Batched scanner calls through the upstream scheduler (interactive lane);
+        # when it is saturated or throttled we get the last cached data instead.
+        analysis, stale = await asyncio.to_thread(tv_summaries, screener.lower(), interval_enum, target_symbols, INTERACTIVE)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except (Shed, UpstreamError, TimeoutError) as e:
+        raise HTTPException(status_code=503, detail=f"TradingView is busy, try again shortly: {e}",
+                            headers={"Retry-After": str(SHED_RETRY_AFTER)})
     except Exception as e:
         # If an error occurs during the bulk request, raise an HTTPException.
         raise HTTPException(status_code=500, detail=f"Failed to get data from TradingView: {e}")
 
     results = {}
     # Iterate through the returned analysis and format the data
-    for symbol, analysis_object in analysis.items():
-        if analysis_object:
-            results[symbol] = analysis_object.summary
+    for symbol, summary in analysis.items():
+        if summary:
+            results[symbol] = summary
         else:
             # Handle cases where no analysis was found for a specific symbol.
             results[symbol] = {"error": "Could not find data for this symbol on the specified screener."}
     
-    return {"analysis_data": results}
+    return {"analysis_data": results, "stale": stale}
 
 @rating.get("/get_heatmap")
 async def get_heatmap():
@@ -174,24 +178,31 @@ async def get_heatmap():
     across all available timeframes.
     Makes exactly 1 API call per timeframe (batched symbols).
     """
-    heatmap_data = {symbol: {} for symbol in DEFAULT_PAIRS_FOREX}
+    # tv_summaries keys by the upper-cased symbol; key the cells the same way.
+    heatmap_data = {symbol.upper(): {} for symbol in DEFAULT_PAIRS_FOREX}
+    stale_tfs = []
 
     for tf_str, interval_enum in TIMEFRAME_MAP.items():
         try:
-            analysis = get_multiple_analysis(
-                screener="forex",
-                interval=interval_enum,
-                symbols=DEFAULT_PAIRS_FOREX
-            )
-            for symbol, analysis_object in analysis.items():
+            # A user is waiting on this page, so it queues as INTERACTIVE; run_prewarmer
+            # keeps these chunks warm through BACKGROUND, so this is normally a cache hit.
+            analysis, stale = await asyncio.to_thread(tv_summaries, "forex", interval_enum, DEFAULT_PAIRS_FOREX, INTERACTIVE)
+            if stale:
+                stale_tfs.append(tf_str)
+            for symbol, summary in analysis.items():
                 heatmap_data[symbol][tf_str] = (
-                    analysis_object.summary if analysis_object
+                    summary if summary
                     else {"error": f"No data for {symbol} on {tf_str}"}
                 )
         except Exception as e:
-            for symbol in DEFAULT_PAIRS_FOREX:
+            for symbol in heatmap_data:
                 heatmap_data[symbol][tf_str] = {
                     "error": f"Failed to get data on {tf_str}: {e}"
                 }
 
-    return {"heatmap_data": heatmap_data}
+    return {"heatmap_data": heatmap_data, "stale_timeframes": stale_tfs}
+
+@rating.get("/upstream/stats")
+def upstream_stats():
+    """TradingView scheduler: per-lane queue wait (ms), queue depth, shed/rejected counts, upstream errors."""
+    return scheduler.stats()
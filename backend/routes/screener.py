@@ -0,0 +1,43 @@
+import os
+from typing import List, Optional
+from fastapi import APIRouter, Query, HTTPException
+from controllers.screener import index
+from routes.ratings import DEFAULT_PAIRS_FOREX
+screener = APIRouter()
+
+# Universe kept in the index. Override with SCREENER_SYMBOLS=EURUSD,GBPUSD,...
+SCREENER_SYMBOLS: List[str] = [
+    s.strip().upper() for s in os.getenv("SCREENER_SYMBOLS", "").split(",") if s.strip()
+] or [p.split(":", 1)[-1] for p in DEFAULT_PAIRS_FOREX]
+
+@screener.get("/screener")
+def run_screener(
+    where: Optional[str] = Query(
+        None, alias="filter",
+        description="e.g. 'H1.RSI < 30 and D.close > D.SMA200'"
+    ),
+    sort: Optional[str] = Query(None, description="Column or expression to sort by, e.g. 'H1.score'"),
+    order: str = Query("desc", description="'asc' or 'desc'"),
+    limit: int = Query(50, ge=1, le=5000),
+    fields: Optional[str] = Query(None, description="Comma-separated extra columns, e.g. 'H4.rating,D.score'"),
+):
+    """
+    Filters all symbols at once against the latest indicator values.
+    Served from memory; no MT5 access and no indicator recomputation.
+    """
+    if order.lower() not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="order must be 'asc' or 'desc'.")
+    extra = [f.strip() for f in (fields or "").split(",") if f.strip()]
+    for f in extra:
+        tf, _, name = f.partition(".")
+        if not name:
+            raise HTTPException(status_code=400, detail=f"Invalid field '{f}', expected '<TF>.<column>'.")
+    try:
+        return index.query(where, sort, order.lower() == "desc", limit, extra)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@screener.get("/screener/fields")
+def screener_fields():
+    """Columns available per timeframe."""
+    return {"symbols": len(index), "fields": index.fields()}
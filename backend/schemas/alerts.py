@@ -0,0 +1,12 @@
+from typing import List, Literal, Optional
+from pydantic import BaseModel, Field
+
+Rating = Literal["Strong Buy", "Buy", "Neutral", "Sell", "Strong Sell"]
+
+class AlertRule(BaseModel):
+    """Fires when `symbol` reaches `rating` on at least `min_tfs` of `tfs`."""
+    rating: Rating
+    min_tfs: int = Field(1, ge=1)
+    tfs: Optional[List[str]] = None      # None → every TF
+    symbols: Optional[List[str]] = None  # None → every symbol
+    name: Optional[str] = None
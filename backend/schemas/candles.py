@@ -1,3 +1,4 @@
+from typing import Dict, List, Optional
 from pydantic import BaseModel
 class Candle(BaseModel):
     t: int   # unix ms
@@ -7,4 +8,15 @@ class Candle(BaseModel):
     c: float
     v: float | int | None = None  # << add volume
 
+class CandleSync(BaseModel):
+    """Bars since a client's cursor; drop local bars with t >= replace_from (if set), then append."""
+    candles: List[Candle]
+    cursor: Optional[str] = None
+    replace_from: Optional[int] = None
 
+class CandleSyncRequest(BaseModel):
+    """POST /candles/all: the multi-symbol sync with the cursors in the body instead of the query string."""
+    symbols: List[str]
+    tfs: Optional[List[str]] = None          # None → every TF
+    count: int = 300
+    cursors: Dict[str, Dict[str, Optional[str]]] = {}  # {"EURUSD": {"H1": "<cursor>"}}; missing → everything
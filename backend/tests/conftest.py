@@ -0,0 +1,8 @@
+"""Tests run on the in-process fake market with a private cache, never a broker or a shared store."""
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ["MARKET_DATA"] = "fake"
+os.environ["SHARED_CACHE"] = "0"
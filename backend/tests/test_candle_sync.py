@@ -0,0 +1,123 @@
+"""Incremental candle sync: cursor handling in sync_candles and the sync routes."""
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import controllers.candles as candles
+import routes.candles as candle_routes
+from controllers.candles import SYNC_CHECK_BARS, make_cursor, sync_candles
+
+T0 = 1_700_000_000 - 1_700_000_000 % 3600
+RATES = np.dtype([("time", "<i8"), ("open", "<f8"), ("high", "<f8"), ("low", "<f8"), ("close", "<f8"),
+                  ("tick_volume", "<u8"), ("spread", "<i4"), ("real_volume", "<u8")])
+
+
+def bars(n: int, first: int = 0) -> np.ndarray:
+    out = np.zeros(n, RATES)
+    out["time"] = T0 + (first + np.arange(n)) * 3600
+    out["close"] = 1.1 + np.arange(n) * 1e-4
+    out["open"], out["high"], out["low"] = out["close"] - 5e-5, out["close"] + 1e-4, out["close"] - 1e-4
+    out["tick_volume"] = 100
+    return out
+
+
+@pytest.fixture
+def block(monkeypatch):
+    """The broker's closed H1 bars; edit it to revise or add bars."""
+    state = {"rates": bars(10)}
+    monkeypatch.setattr(candles, "fetch_rates", lambda symbol, tf, count=300: state["rates"][-count:])
+    return state
+
+
+def times(out) -> list:
+    return [c.t // 1000 for c in out["candles"]]
+
+
+def test_no_cursor_sends_everything(block):
+    out = sync_candles("EURUSD", "H1", 10)
+    assert times(out) == block["rates"]["time"].tolist()
+    assert out["replace_from"] == 0 and out["cursor"] == make_cursor(block["rates"])
+
+
+def test_matching_checksum_appends(block):
+    out = sync_candles("EURUSD", "H1", 10, cursor=make_cursor(block["rates"][:8]))
+    assert times(out) == block["rates"]["time"][8:].tolist()
+    assert out["replace_from"] is None and out["cursor"] == make_cursor(block["rates"])
+    # Up to date: nothing new, same cursor.
+    again = sync_candles("EURUSD", "H1", 10, cursor=out["cursor"])
+    assert again["candles"] == [] and again["replace_from"] is None and again["cursor"] == out["cursor"]
+
+
+def test_since_appends_without_a_checksum(block):
+    out = sync_candles("EURUSD", "H1", 10, since=int(block["rates"]["time"][7]) * 1000)
+    assert times(out) == block["rates"]["time"][8:].tolist() and out["replace_from"] is None
+
+
+def test_revised_bar_is_resent_from_the_checked_tail(block):
+    cursor = make_cursor(block["rates"][:8])
+    block["rates"]["close"][6] += 1e-3  # the broker revised a bar the client holds
+    out = sync_candles("EURUSD", "H1", 10, cursor=cursor)
+    first = 8 - SYNC_CHECK_BARS
+    assert times(out) == block["rates"]["time"][first:].tolist()
+    assert out["replace_from"] == int(block["rates"]["time"][first]) * 1000
+
+
+@pytest.mark.parametrize("held", [
+    lambda r: make_cursor(bars(3, first=-5)),                           # older than the block
+    lambda r: f"{(int(r['time'][4]) + 60) * 1000}.{0:08x}",              # a bar time we never had
+])
+def test_unknown_cursor_gets_a_full_resend(block, held):
+    out = sync_candles("EURUSD", "H1", 10, cursor=held(block["rates"]))
+    assert times(out) == block["rates"]["time"].tolist() and out["replace_from"] == 0
+
+
+def test_block_moved_past_the_client(block):
+    cursor = make_cursor(block["rates"][:3])
+    block["rates"] = bars(10, first=8)  # count bars later: the client's bars are gone
+    out = sync_candles("EURUSD", "H1", 10, cursor=cursor)
+    assert times(out) == block["rates"]["time"].tolist() and out["replace_from"] == 0
+
+
+@pytest.mark.parametrize("cursor", ["abc", "123", "123.zz", ".1f", "1.2.3"])
+def test_malformed_cursor_is_a_value_error(block, cursor):
+    with pytest.raises(ValueError):
+        sync_candles("EURUSD", "H1", 10, cursor=cursor)
+
+
+@pytest.fixture
+def client(block):
+    app = FastAPI()
+    app.include_router(candle_routes.candle)
+    return TestClient(app, raise_server_exceptions=False)
+
+
+def test_malformed_cursors_are_400(client):
+    assert client.get("/candles/EURUSD/H1", params={"cursor": "abc"}).status_code == 400
+    for cursors in ['{"EURUSD": {"H1": "x.y"}}', "not json", "[1]", '{"EURUSD": {"H1": 5}}', '{"EURUSD": "x"}']:
+        r = client.get("/candles/all", params={"symbols": "EURUSD", "tfs": "H1", "cursors": cursors})
+        assert r.status_code == 400, cursors
+
+
+def test_post_sync_all(client, block):
+    cursor = make_cursor(block["rates"][:8])
+    r = client.post("/candles/all", json={"symbols": ["eurusd", "gbpusd"], "tfs": ["H1", "XX"], "count": 10,
+                                          "cursors": {"eurusd": {"H1": cursor}}})
+    assert r.status_code == 200
+    body = r.json()
+    assert set(body) == {"EURUSD", "GBPUSD"} and set(body["EURUSD"]) == {"H1"}
+    assert body["EURUSD"]["H1"]["replace_from"] is None and len(body["EURUSD"]["H1"]["candles"]) == 2
+    assert body["GBPUSD"]["H1"]["replace_from"] == 0 and len(body["GBPUSD"]["H1"]["candles"]) == 10
+
+
+@pytest.mark.parametrize("payload, status", [
+    ({}, 422),                                                      # symbols is required
+    ({"symbols": "EURUSD"}, 422),                                   # not a list
+    ({"symbols": ["EURUSD"], "count": "many"}, 422),
+    ({"symbols": ["EURUSD"], "cursors": {"EURUSD": "x"}}, 422),     # must map TFs to cursors
+    ({"symbols": ["EURUSD"], "cursors": {"EURUSD": {"H1": 5}}}, 422),
+    ({"symbols": []}, 400),
+    ({"symbols": ["EURUSD"], "tfs": ["H1"], "cursors": {"EURUSD": {"H1": "x.y"}}}, 400),
+])
+def test_post_sync_all_validates_the_body(client, payload, status):
+    assert client.post("/candles/all", json=payload).status_code == status
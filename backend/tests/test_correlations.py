@@ -0,0 +1,58 @@
+"""RollingCorrelation and correlations() against np.corrcoef over the same window."""
+import time
+
+import numpy as np
+import pytest
+
+from controllers import correlations as c
+from controllers.candles import TF_SECONDS
+from routes.correlations import CORRELATION_SYMBOLS
+
+
+def assert_same(got: np.ndarray, want: np.ndarray, tol: float) -> None:
+    assert (np.isnan(got) == np.isnan(want)).all()
+    both = ~np.isnan(want)
+    assert np.abs(got[both] - want[both]).max() <= tol
+
+
+@pytest.mark.parametrize("reanchor_every", [None, 10 ** 12], ids=["re-anchored", "never-re-anchored"])
+def test_rolling_matches_corrcoef(reanchor_every):
+    rng = np.random.default_rng(3)
+    n, window = 12, 50
+    # Small returns around a common drift: the hard case for running sums.
+    returns = rng.normal(size=(2000, n)) @ (rng.normal(size=(n, n)) / np.sqrt(n)) * 1e-3 + 5e-4
+    book = c.RollingCorrelation([str(i) for i in range(n)], window, reanchor_every=reanchor_every)
+    for i, row in enumerate(returns):
+        book.push(row, i)
+        if i >= window and i % 37 == 0:
+            assert_same(book.matrix(), np.corrcoef(returns[i - window + 1:i + 1], rowvar=False), 1e-9)
+
+
+def test_reanchor_rebuilds_sums_from_the_buffer():
+    rng = np.random.default_rng(5)
+    book = c.RollingCorrelation(["a", "b", "c"], 20, reanchor_every=10 ** 12)
+    book.extend(rng.normal(size=(500, 3)), range(500))
+    rows = book.rows()
+    book.reanchor()
+    assert np.array_equal(book._sum, rows.sum(axis=0))
+    assert np.array_equal(book._cross, rows.T @ rows)
+
+
+@pytest.mark.parametrize("tf", ["M5", "H1"])
+def test_correlations_follow_bar_closes(tf, monkeypatch):
+    real = time.time
+    now = real()
+    window = 60
+    first = None
+    for step in range(4):
+        monkeypatch.setattr(time, "time", lambda: now + step * TF_SECONDS[tf])
+        out = c.correlations(CORRELATION_SYMBOLS, tf, window)
+        first = first or c._books[(tf, window)]
+        names, times, returns = c.aligned_returns(CORRELATION_SYMBOLS, tf)
+        got = np.array([[np.nan if v is None else v for v in row] for row in out["matrix"]], dtype=float)
+        assert out["symbols"] == names
+        assert out["t"] == int(times[-1])
+        assert_same(got, np.round(np.corrcoef(returns[-window:], rowvar=False), 4), 0.0)
+    # One book throughout: later bars were pushed, not rebuilt.
+    assert c._books[(tf, window)] is first
+    assert len(first.corr) == window
@@ -0,0 +1,105 @@
+"""
+Rating history buckets: idempotent appends and point-in-time reads.
+
+The append pipeline needs a real server: set MONGO_URI and the tests write to a
+throwaway collection in the scratch database `fd_test` (never the app's own).
+The read tests also run on mongomock when it is installed.
+"""
+import os
+import uuid
+
+import pytest
+
+from controllers.history import DAY_MS, COLLECTION, HistoryWriter, bucket_updates, day_of, history, rating_at
+
+HOUR = 3_600_000
+DAY = 1_700_006_400_000 - 1_700_006_400_000 % DAY_MS  # a UTC midnight
+
+
+def mongo_collection():
+    if not os.getenv("MONGO_URI"):
+        pytest.skip("needs MONGO_URI (uses the scratch database fd_test)")
+    from pymongo import MongoClient
+    client = MongoClient(os.environ["MONGO_URI"], serverSelectionTimeoutMS=2000)
+    coll = client["fd_test"][f"{COLLECTION}_{uuid.uuid4().hex[:8]}"]
+    coll.create_index([("symbol", 1), ("tf", 1), ("day", 1)], unique=True)
+    return client, coll
+
+
+@pytest.fixture
+def coll():
+    client, coll = mongo_collection()
+    yield coll
+    coll.drop()
+    client.close()
+
+
+@pytest.fixture(params=["mongomock", "mongo"])
+def read_coll(request):
+    """A collection holding EURUSD H1 buckets for DAY (22:00, 23:00) and DAY+1 (01:00, 02:00)."""
+    if request.param == "mongomock":
+        mongomock = pytest.importorskip("mongomock")
+        client, coll = None, mongomock.MongoClient().db[COLLECTION]
+    else:
+        client, coll = mongo_collection()
+    for day, hours in ((DAY, (22, 23)), (DAY + DAY_MS, (1, 2))):
+        ts = [day + h * HOUR for h in hours]
+        coll.insert_one({"symbol": "EURUSD", "tf": "H1", "day": day_of(day), "t": ts,
+                         "score": [h / 100 for h in hours], "rating": ["Buy"] * len(ts), "last": ts[-1], "n": len(ts)})
+    yield coll
+    if client is not None:
+        coll.drop()
+        client.close()
+
+
+def rows(*bars, score=0.1):
+    return [("EURUSD", "H1", t, score, "Buy") for t in bars]
+
+
+def stored(coll, day=DAY):
+    return coll.find_one({"symbol": "EURUSD", "tf": "H1", "day": day_of(day)}, {"_id": 0})
+
+
+def test_reappend_is_idempotent(coll):
+    batch = rows(DAY + HOUR, DAY + 2 * HOUR)
+    coll.bulk_write(bucket_updates(batch), ordered=False)
+    first = stored(coll)
+    coll.bulk_write(bucket_updates(batch), ordered=False)
+    assert stored(coll) == first
+    assert first["t"] == [DAY + HOUR, DAY + 2 * HOUR] and first["n"] == 2 and first["last"] == DAY + 2 * HOUR
+
+
+def test_bars_at_or_before_last_are_skipped(coll):
+    coll.bulk_write(bucket_updates(rows(DAY + 2 * HOUR, score=0.1)), ordered=False)
+    # Another worker re-sends an old bar (with a different score) along with a new one.
+    coll.bulk_write(bucket_updates(rows(DAY + HOUR, DAY + 2 * HOUR, DAY + 3 * HOUR, score=0.5)), ordered=False)
+    doc = stored(coll)
+    assert doc["t"] == [DAY + 2 * HOUR, DAY + 3 * HOUR]
+    assert doc["score"] == [0.1, 0.5] and doc["n"] == 2 and doc["last"] == DAY + 3 * HOUR
+
+
+def test_newest_row_wins_within_a_batch_and_days_split(coll):
+    batch = rows(DAY + HOUR, score=0.1) + rows(DAY + HOUR, score=0.3) + rows(DAY + DAY_MS + HOUR, score=0.2)
+    writer = HistoryWriter(collection=lambda: coll)
+    writer.add(batch)
+    writer.close()
+    assert stored(coll)["score"] == [0.3]
+    assert stored(coll, DAY + DAY_MS)["t"] == [DAY + DAY_MS + HOUR]
+    assert writer.stats["written"] == 3 and writer.stats["errors"] == 0
+
+
+def test_rating_at_across_buckets(read_coll):
+    at = lambda t: (rating_at("EURUSD", "H1", t, coll=read_coll) or {}).get("t")
+    assert at(DAY + 23 * HOUR + 1) == DAY + 23 * HOUR
+    # First bar of DAY+1 not yet open: the last one of the previous bucket is in force.
+    assert at(DAY + DAY_MS + HOUR - 1) == DAY + 23 * HOUR
+    assert at(DAY + DAY_MS + HOUR) == DAY + DAY_MS + HOUR
+    # Three days without buckets (a weekend) still find DAY+1's last bar.
+    assert at(DAY + 4 * DAY_MS) == DAY + DAY_MS + 2 * HOUR
+    assert at(DAY + 22 * HOUR - 1) is None
+
+
+def test_history_range_spans_buckets(read_coll):
+    out = history("EURUSD", "H1", DAY + 23 * HOUR, DAY + DAY_MS + HOUR, coll=read_coll)
+    assert out["t"] == [DAY + 23 * HOUR, DAY + DAY_MS + HOUR]
+    assert out["score"] == [0.23, 0.01]
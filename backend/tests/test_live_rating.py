@@ -0,0 +1,65 @@
+"""The forming-bar path (tv_frozen_state + tv_live_rating) votes exactly like tv_rating_for_df."""
+import numpy as np
+import pandas as pd
+import pytest
+
+import controllers.ratings as ratings
+from controllers.ratings import tv_frozen_state, tv_live_rating, tv_rating_for_df, tv_votes_from_raw
+
+
+def trending_frame(n: int, seed: int) -> pd.DataFrame:
+    """Random walk with regular one-way runs, which pin RSI / StochRSI at their extremes (k == d)."""
+    rng = np.random.default_rng(seed)
+    steps = rng.normal(0.0, 1.0, n)
+    for start in range(0, n, 40):
+        sign = 1.0 if (start // 40) % 2 else -1.0
+        steps[start:start + 12] = sign * (np.abs(steps[start:start + 12]) + 0.5)
+    c = 100.0 + np.cumsum(steps) * 0.1
+    o = np.r_[c[0], c[:-1]]
+    return pd.DataFrame({"t": np.arange(n) * 60_000, "o": o, "h": np.maximum(o, c) + 0.05,
+                         "l": np.minimum(o, c) - 0.05, "c": c, "v": np.full(n, 100.0)})
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_live_votes_match_full_recompute(seed):
+    df = trending_frame(400, seed)
+    for i in range(220, len(df)):
+        st = tv_frozen_state(df.iloc[:i])
+        bar = df.iloc[i]
+        live = tv_live_rating(st, bar.o, bar.h, bar.l, bar.c, bar.v, trace=True)
+        full = tv_rating_for_df(df.iloc[:i + 1], trace=True)
+        assert live["votes"] == full["votes"], f"bar {i}"
+        assert live["score"] == full["score"], f"bar {i}"
+
+
+def test_stochrsi_tie_within_rounding_is_level():
+    raw = {"MAs": {"close": 1.0}, "Oscillators": {"StochRSI": {"k": 98.18840820521234, "d": 98.18840820521237},
+                                                 "Stoch": {"k": 3.2288580557911666, "d": 3.2288580557911515}}}
+    votes = tv_votes_from_raw(raw, 1.0, 1.0)["Oscillators"]
+    assert votes == {"StochRSI": 0, "Stoch": 0}
+
+
+@pytest.mark.parametrize("seed", range(2))
+def test_closed_bar_votes_only_move_within_tolerance(seed, monkeypatch):
+    # CROSS_TOL applies to closed bars as well: compared with an exact k/d
+    # comparison, only Stoch/StochRSI with |k - d| <= CROSS_TOL may change, and only to level.
+    df = trending_frame(300, seed)
+    for i in range(220, len(df)):
+        full = tv_rating_for_df(df.iloc[:i + 1], trace=True)
+        with monkeypatch.context() as m:
+            m.setattr(ratings, "CROSS_TOL", 0.0)
+            exact = tv_votes_from_raw(full["raw"], float(df["h"].iloc[i - 1]), float(df["l"].iloc[i - 1]))
+        assert exact["MAs"] == full["votes"]["MAs"], f"bar {i}"
+        for name, vote in full["votes"]["Oscillators"].items():
+            if vote != exact["Oscillators"][name]:
+                kd = full["raw"]["Oscillators"][name]
+                assert name in ("Stoch", "StochRSI") and vote == 0, f"bar {i} {name}"
+                assert abs(kd["k"] - kd["d"]) <= ratings.CROSS_TOL, f"bar {i} {name}"
+
+
+def test_closed_bar_tie_within_rounding_is_level():
+    # The same raw values on a closed bar: exact comparison would call these crosses.
+    raw = {"MAs": {"close": 1.0}, "Oscillators": {"StochRSI": {"k": 98.18840820521234, "d": 98.18840820521237}}}
+    assert tv_votes_from_raw(raw, 1.0, 1.0)["Oscillators"]["StochRSI"] == 0
+    raw["Oscillators"]["StochRSI"]["d"] = 98.18840820521234 + 2 * ratings.CROSS_TOL
+    assert tv_votes_from_raw(raw, 1.0, 1.0)["Oscillators"]["StochRSI"] == -1
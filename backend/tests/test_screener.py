@@ -0,0 +1,103 @@
+"""Screener expressions over a small hand-built IndicatorIndex, through the route."""
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import routes.screener as screener_routes
+from controllers.screener import IndicatorIndex
+
+
+def snap(rsi: float, rating: str, t: int = 1) -> dict:
+    return {"t": t, "score": rsi / 100, "ma_score": 0.0, "osc_score": 0.0, "rating": rating,
+            "raw": {"Oscillators": {"RSI": {"last": rsi, "prev": rsi - 1}}},
+            "votes": {"Oscillators": {"RSI": 0}}}
+
+
+@pytest.fixture
+def index():
+    idx = IndicatorIndex(["H1"])
+    for sym, rsi, rating in (("EURUSD", 25.0, "Buy"), ("GBPUSD", 55.0, "Neutral"), ("USDJPY", 75.0, "Sell")):
+        idx.update(sym, "H1", snap(rsi, rating))
+    return idx
+
+
+@pytest.fixture
+def client(index, monkeypatch):
+    monkeypatch.setattr(screener_routes, "index", index)
+    app = FastAPI()
+    app.include_router(screener_routes.screener)
+    return TestClient(app, raise_server_exceptions=False)
+
+
+@pytest.mark.parametrize("expr", [
+    "H1.rating > 30",          # text vs number
+    "H1.rating + 1",           # arithmetic on text
+    "-H1.rating > 1",
+    "H1.rating < 'Sell'",      # text only supports == / !=
+    "symbol",                  # not a condition
+    "H1.RSI",
+    "H1.RSI and H1.RSI < 50",  # and/or/not need conditions
+    "not H1.RSI",
+    "H1.nope < 1",             # unknown column
+    "XX.RSI < 1",              # unknown TF
+    "H1.RSI <",                # syntax
+])
+def test_bad_filters_are_400(client, expr):
+    r = client.get("/screener", params={"filter": expr})
+    assert r.status_code == 400, r.text
+
+
+def test_filters(client):
+    r = client.get("/screener", params={"filter": "H1.RSI < 50 or H1.rating == 'Sell'"})
+    assert r.status_code == 200
+    assert sorted(d["symbol"] for d in r.json()["data"]) == ["EURUSD", "USDJPY"]
+    assert client.get("/screener", params={"filter": "symbol == 'GBPUSD'"}).json()["count"] == 1
+
+
+def test_sort(client):
+    r = client.get("/screener", params={"sort": "H1.RSI", "order": "asc"})
+    assert [d["symbol"] for d in r.json()["data"]] == ["EURUSD", "GBPUSD", "USDJPY"]
+    # A constant sort key is valid and keeps every row.
+    r = client.get("/screener", params={"sort": "1"})
+    assert r.status_code == 200 and len(r.json()["data"]) == 3
+    assert client.get("/screener", params={"sort": "H1.rating"}).status_code == 400
+
+
+def test_fields_are_normalised(client):
+    r = client.get("/screener", params={"filter": "H1.RSI < 30", "fields": "h1.rating,H1.RSI_prev"})
+    assert r.json()["data"] == [{"symbol": "EURUSD", "H1.RSI": 25.0, "H1.rating": "Buy", "H1.RSI_prev": 24.0}]
+
+
+def test_view_is_a_copy(index):
+    _, cols = index._view()
+    before = cols["H1"]["RSI"].copy()
+    index.update("EURUSD", "H1", snap(90.0, "Strong Sell", t=2))
+    assert np.array_equal(cols["H1"]["RSI"], before)
+    assert not np.shares_memory(cols["H1"]["RSI"], index._cols["H1"]["RSI"])
+
+
+def test_refresher_follows_the_brokers_bar_times(monkeypatch):
+    import asyncio
+    from controllers import screener as sc
+
+    # An H4 bar that closes at a broker offset: the time changes whenever it likes, not on our H4 slot.
+    bar = {"t": 1_000}
+    computed = []
+    monkeypatch.setattr(sc, "index", IndicatorIndex(["H4"]))
+    monkeypatch.setattr(sc, "last_closed_bar_time", lambda symbol, tf: bar["t"])
+    monkeypatch.setattr(sc, "compute_snapshot",
+                        lambda symbol, tf, count=300: computed.append(bar["t"]) or {**snap(50.0, "Neutral"), "t": bar["t"]})
+    seen = []
+    monkeypatch.setattr(sc, "_listeners", [lambda snaps: seen.extend(s["t"] for s in snaps)])
+
+    async def run():
+        task = asyncio.create_task(sc.run_refresher(["EURUSD"], ["H4"], poll_seconds=0.01))
+        await asyncio.sleep(0.05)
+        bar["t"] = 1_000 + 3 * 3600_000 + 7 * 60_000   # next bar, off any local boundary
+        await asyncio.sleep(0.05)
+        task.cancel()
+
+    asyncio.run(run())
+    assert seen == [1_000, bar["t"]]
+    assert computed == seen  # once per closed bar, not once per poll
@@ -0,0 +1,141 @@
+"""get_or_load across two SharedCache clients of one served CacheStore, and the in-process fallback."""
+import os
+import secrets
+import socket
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+import controllers.shared_cache as shared_cache
+from controllers.shared_cache import RETRY_TTL, SharedCache
+
+BACKEND = Path(__file__).resolve().parents[1]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def clients(monkeypatch):
+    """Two workers' clients: the first to connect hosts the store, the second talks to it over the socket."""
+    monkeypatch.setattr(shared_cache, "AUTHKEY", secrets.token_hex(16).encode())
+    address = ("127.0.0.1", free_port())
+    a, b = SharedCache(enabled=True, address=address), SharedCache(enabled=True, address=address)
+    a.stats(), b.stats()
+    assert a.hosting and not b.hosting
+    return a, b
+
+
+def test_one_loader_per_key(clients):
+    a, b = clients
+    loads, got = [], []
+
+    def loader():
+        loads.append(threading.get_ident())
+        time.sleep(0.2)
+        return {"v": 1}
+
+    threads = [threading.Thread(target=lambda c=c: got.append(c.get_or_load("k", 60, loader)))
+               for c in (a, b) * 4]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+    assert len(loads) == 1
+    assert got == [{"v": 1}] * 8
+
+
+def test_expired_lease_passes_to_another_worker(clients):
+    a, b = clients
+    stuck, release = threading.Event(), threading.Event()
+
+    def hung():
+        stuck.set()
+        release.wait(5)
+        return {"from": "a"}
+
+    first = threading.Thread(target=a.get_or_load, args=("k", 60, hung), kwargs={"lease_seconds": 0.2})
+    first.start()
+    stuck.wait(5)
+    began = time.monotonic()
+    # Nothing cached, so b waits for a's load until a's lease runs out, then loads it itself.
+    assert b.get_or_load("k", 60, lambda: {"from": "b"}, lease_seconds=0.2) == {"from": "b"}
+    assert 0.1 < time.monotonic() - began < 2.0
+    release.set()
+    first.join(5)
+
+
+def test_waiter_times_out_without_a_value(clients):
+    a, b = clients
+    a._call("lease", "k", "another-worker", 5.0)
+    with pytest.raises(TimeoutError):
+        b.get_or_load("k", 60, lambda: {"v": 1}, wait_seconds=0.1)
+
+
+@pytest.mark.parametrize("result", [None, {}, "raise"])
+def test_failed_load_keeps_the_stale_value(clients, result):
+    a, b = clients
+    a.put("k", {"v": "old"}, 0.01)
+    time.sleep(0.02)
+
+    def loader():
+        if result == "raise":
+            raise RuntimeError("upstream down")
+        return result
+
+    if result == "raise":
+        with pytest.raises(RuntimeError):
+            b.get_or_load("k", 60, loader)
+        assert a.get("k")[0] == {"v": "old"}
+        return
+    assert b.get_or_load("k", 60, loader) == {"v": "old"}
+    value, expires = a.get("k")
+    assert value == {"v": "old"}
+    # Kept, but retried after RETRY_TTL rather than the full TTL.
+    assert time.time() < expires <= time.time() + RETRY_TTL
+
+
+def test_top_up_extends_the_stale_value(clients):
+    a, b = clients
+    loaded, topped = [], []
+
+    def loader():
+        loaded.append(1)
+        return [1, 2]
+
+    def top_up(old):
+        topped.append(list(old))
+        return old + [3]
+
+    assert a.get_or_load("k", 0.01, loader, top_up=top_up) == [1, 2]  # nothing cached: full load
+    time.sleep(0.02)
+    assert b.get_or_load("k", 60, loader, top_up=top_up) == [1, 2, 3]
+    assert loaded == [1] and topped == [[1, 2]]
+    assert a.get_or_load("k", 60, loader, top_up=top_up) == [1, 2, 3]  # fresh now: neither runs
+    assert loaded == [1] and topped == [[1, 2]]
+
+
+def run_module(env: dict, code: str) -> subprocess.CompletedProcess:
+    env = {k: v for k, v in {**os.environ, **env}.items() if v is not None}
+    return subprocess.run([sys.executable, "-c", "import controllers.shared_cache as sc\n" + code],
+                          cwd=BACKEND, env=env, capture_output=True, text=True, timeout=30)
+
+
+def test_no_key_means_an_in_process_cache():
+    r = run_module({"SHARED_CACHE_KEY": None, "SHARED_CACHE": None, "SHARED_CACHE_PORT": str(free_port())},
+                   "assert not sc.ENABLED and sc.cache.owns_store and not sc.cache.hosting\n"
+                   "assert sc.cache.get_or_load('k', 60, lambda: [1]) == [1]\n"
+                   "assert sc.cache.stats()['entries'] == 1 and not sc.cache.hosting\n")
+    assert r.returncode == 0, r.stderr
+
+
+def test_sharing_without_a_key_refuses_to_start():
+    r = run_module({"SHARED_CACHE_KEY": None, "SHARED_CACHE": "1"}, "")
+    assert r.returncode != 0 and "SHARED_CACHE_KEY" in r.stderr
@@ -0,0 +1,43 @@
+"""At the default parameters the sweep's score series equal the single-bar ratings on each prefix."""
+import numpy as np
+import pytest
+
+from controllers import sweep as sw
+from controllers.ratings import compute_score_from_closes, tv_rating_for_df
+
+
+@pytest.fixture(scope="module")
+def history():
+    return sw.history_frame("EURUSD", "H1", 600)
+
+
+def sample_bars(score: np.ndarray, n: int = 12) -> np.ndarray:
+    start = int(np.argmax(~np.isnan(score)))
+    return np.linspace(start, len(score) - 1, n).astype(int)
+
+
+def test_vote_recipe_matches_tv_rating(history):
+    score = sw.score_series(history)
+    for i in sample_bars(score):
+        assert tv_rating_for_df(history.iloc[:i + 1].reset_index(drop=True))["score"] == round(float(score[i]), 4)
+
+
+def test_closes_recipe_matches_compute_score_from_closes(history):
+    score = sw.closes_score_series(history)
+    closes = history["c"].tolist()
+    for i in sample_bars(score):
+        assert compute_score_from_closes(closes[:i + 1])["score"] == score[i]
+
+
+def test_sweeps_score_defaults_like_the_series(history):
+    # The default value first, so row 0 is the default configuration.
+    for run, series, grid in ((sw.sweep, sw.score_series, {"buy": [0.1, 0.2]}),
+                              (sw.sweep_closes, sw.closes_score_series, {"trend_period": [200, 100]})):
+        table = run(history, grid, horizon=5)
+        score = series(history)
+        start = int(np.argmax(~np.isnan(score)))
+        fwd = history["c"].to_numpy()[start + 5:] / history["c"].to_numpy()[start:-5] - 1.0
+        side = (score[start:-5] > 0.1).astype(int) - (score[start:-5] < -0.1).astype(int)
+        row = table.iloc[0]
+        assert row["signals"] == np.count_nonzero(side)
+        assert row["hit_rate"] == round(float((side * fwd > 0).sum() / np.count_nonzero(side)), 4)
@@ -0,0 +1,48 @@
+"""TickBook's cached rating is invalidated per (symbol, TF), only by ticks that move that TF's bars."""
+import pytest
+
+import controllers.ticks as ticks
+from controllers.ticks import TickBook
+from test_live_rating import trending_frame
+
+MINUTE = 60_000
+
+
+@pytest.fixture
+def rated(monkeypatch):
+    """Counts tv_live_rating calls per book symbol."""
+    calls = []
+    live = ticks.tv_live_rating
+
+    def counting(st, *bar, **kw):
+        calls.append(bar)
+        return live(st, *bar, **kw)
+
+    monkeypatch.setattr(ticks, "tv_live_rating", counting)
+    return calls
+
+
+def book(symbol: str) -> TickBook:
+    df = trending_frame(300, 1)
+    b = TickBook(symbol, ["M1", "M5"])
+    for tf in b.tfs:
+        b.seed(tf, df.iloc[:-1])
+    last = int(df["t"].iloc[-1])
+    b.on_tick(last, float(df["c"].iloc[-1]))
+    return b
+
+
+def test_rating_is_cached_until_its_bars_move(rated):
+    eur, gbp = book("EURUSD"), book("GBPUSD")
+    t = eur.forming("M1")["t"]
+    first = eur.rating("M1")
+    assert eur.rating("M1") is first and len(rated) == 1
+
+    gbp.on_tick(t + 1, 101.0)                  # another symbol
+    eur.on_tick(t - MINUTE, 99.0)              # late tick for a closed M1 bar: dropped
+    assert eur.forming("M1")["c"] != 99.0
+    assert eur.rating("M1") is first and len(rated) == 1
+
+    eur.on_tick(t + 1, 101.0)
+    assert eur.rating("M1") is not first and len(rated) == 2
+    assert eur.rating("M1") is eur.rating("M1") and len(rated) == 2
@@ -0,0 +1,155 @@
+"""The TradingView scheduler's lanes and shedding, and the routes on top of it, with a stub scanner."""
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import controllers.tradingview as tv
+import routes.ratings as rating_routes
+from controllers.shared_cache import SharedCache
+from controllers.tradingview import BACKGROUND, INTERACTIVE, Shed, UpstreamScheduler
+
+SUMMARY = {"RECOMMENDATION": "BUY", "BUY": 12, "SELL": 3, "NEUTRAL": 11}
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """A private cache and scheduler per test; returns the list of scanner calls made."""
+    monkeypatch.setattr(tv, "cache", SharedCache(enabled=False))
+    monkeypatch.setattr(tv, "scheduler", UpstreamScheduler(rate=1000.0, burst=1000.0))
+    made = []
+
+    def scan(screener, interval, symbols):
+        made.append((interval, tuple(symbols)))
+        return {s.upper(): dict(SUMMARY) for s in symbols}
+
+    monkeypatch.setattr(tv, "scan", scan)
+    return made
+
+
+def queued(scheduler: UpstreamScheduler, lane: str, n: int) -> None:
+    """Wait until `n` callers are queued in `lane`."""
+    for _ in range(500):
+        with scheduler._cond:
+            if len(scheduler._queues[lane]) >= n:
+                return
+        time.sleep(0.002)
+    raise AssertionError(f"{lane} queue never reached {n}")
+
+
+def start(fn, *args) -> threading.Thread:
+    thread = threading.Thread(target=fn, args=args, daemon=True)
+    thread.start()
+    return thread
+
+
+def test_interactive_goes_ahead_of_earlier_background(calls):
+    sched = UpstreamScheduler(rate=50.0, burst=1.0)
+    order = []
+    tv.cache.hold(tv.BUCKET, 0.3)
+    bg = start(sched.run, lambda: order.append(BACKGROUND), BACKGROUND)
+    queued(sched, BACKGROUND, 1)
+    fg = start(sched.run, lambda: order.append(INTERACTIVE), INTERACTIVE)
+    queued(sched, INTERACTIVE, 1)
+    bg.join(5), fg.join(5)
+    assert order == [INTERACTIVE, BACKGROUND]
+
+
+def test_background_is_shed_first(calls):
+    # Three interactive callers ahead at 2/s is 1.5s of queue: more than the background lane may wait.
+    sched = UpstreamScheduler(rate=2.0, burst=1.0, max_wait={INTERACTIVE: 5.0, BACKGROUND: 1.0})
+    tv.cache.hold(tv.BUCKET, 0.2)
+    served = []
+    threads = [start(sched.run, lambda: served.append(INTERACTIVE), INTERACTIVE) for _ in range(3)]
+    queued(sched, INTERACTIVE, 3)
+    began = time.monotonic()
+    with pytest.raises(Shed):
+        sched.run(lambda: served.append(BACKGROUND), BACKGROUND)
+    assert time.monotonic() - began < 0.5  # shed on arrival, not at its deadline
+    for t in threads:
+        t.join(5)
+    assert served == [INTERACTIVE] * 3
+    lanes = sched.stats()["lanes"]
+    assert lanes[BACKGROUND]["shed"] == 1 and lanes[INTERACTIVE]["completed"] == 3
+
+
+def test_full_queue_is_rejected(calls):
+    sched = UpstreamScheduler(rate=50.0, burst=1.0, max_queue={INTERACTIVE: 1, BACKGROUND: 1})
+    tv.cache.hold(tv.BUCKET, 0.2)
+    first = start(sched.run, lambda: None, INTERACTIVE)
+    queued(sched, INTERACTIVE, 1)
+    with pytest.raises(Shed, match="queue full"):
+        sched.run(lambda: None, INTERACTIVE)
+    first.join(5)
+    assert sched.stats()["lanes"][INTERACTIVE]["rejected"] == 1
+
+
+def test_unreachable_deadline_sheds_early(calls):
+    sched = UpstreamScheduler(rate=50.0, burst=1.0, max_wait={INTERACTIVE: 1.0, BACKGROUND: 1.0})
+    tv.cache.hold(tv.BUCKET, 10.0)
+    began = time.monotonic()
+    with pytest.raises(Shed):
+        sched.run(lambda: None, INTERACTIVE)
+    assert time.monotonic() - began < 0.5
+
+
+def test_prewarmer_feeds_the_cache_through_background(calls):
+    pairs = ["oanda:EURUSD", "oanda:GBPUSD"]
+
+    async def warm():
+        task = asyncio.create_task(tv.run_prewarmer("forex", ["1h", "1d"], pairs, every=60))
+        for _ in range(500):
+            if len(calls) == 2:
+                break
+            await asyncio.sleep(0.01)
+        task.cancel()
+
+    asyncio.run(warm())
+    assert [interval for interval, _ in calls] == ["1h", "1d"]
+    assert tv.scheduler.stats()["lanes"][BACKGROUND]["completed"] == 2
+    # An interactive reader of the same list (the heatmap) is now served from the cache.
+    analysis, stale = tv.tv_summaries("forex", "1h", pairs, INTERACTIVE)
+    assert analysis == {"OANDA:EURUSD": SUMMARY, "OANDA:GBPUSD": SUMMARY} and not stale
+    assert len(calls) == 2 and tv.scheduler.stats()["lanes"][INTERACTIVE]["submitted"] == 0
+
+
+def test_refresh_ahead_reloads_before_expiry(calls, monkeypatch):
+    monkeypatch.setattr(tv, "TV_CACHE_TTL", 1.0)
+    tv.tv_summaries("forex", "1h", ["oanda:EURUSD"], BACKGROUND)
+    tv.tv_summaries("forex", "1h", ["oanda:EURUSD"], BACKGROUND, refresh_ahead=0.5)
+    assert len(calls) == 1
+    time.sleep(0.6)
+    tv.tv_summaries("forex", "1h", ["oanda:EURUSD"], INTERACTIVE)  # still fresh for readers
+    assert len(calls) == 1
+    tv.tv_summaries("forex", "1h", ["oanda:EURUSD"], BACKGROUND, refresh_ahead=0.5)
+    assert len(calls) == 2
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(rating_routes.rating)
+    return TestClient(app, raise_server_exceptions=False)
+
+
+def test_heatmap_cells_are_filled(calls, client):
+    body = client.get("/get_heatmap").json()
+    data = body["heatmap_data"]
+    assert set(data) == {s.upper() for s in rating_routes.DEFAULT_PAIRS_FOREX}
+    for cells in data.values():
+        assert set(cells) == set(rating_routes.TIMEFRAME_MAP)
+        assert all(cell == SUMMARY for cell in cells.values())
+    assert body["stale_timeframes"] == []
+
+
+def test_analysis_timeout_is_503(calls, client, monkeypatch):
+    def timeout(*args):
+        raise TimeoutError("no value within 5.0s")
+
+    monkeypatch.setattr(rating_routes, "tv_summaries", timeout)
+    r = client.get("/get_analysis", params={"symbols": "oanda:EURUSD", "timeframe": "1h"})
+    assert r.status_code == 503
+    assert r.headers["Retry-After"] == str(rating_routes.SHED_RETRY_AFTER)